@@ -0,0 +1,162 @@
+"""Measure batched garment analysis throughput against a local fake model server.
+
+The fake model answers ``POST /analyze`` in the same shape as
+``ANALYSIS_ENDPOINT`` backends: a fixed latency per request plus a little
+per image, at most --max-images images per request, and 429 responses once
+more than --quota requests arrive within a minute. Each case analyses the
+same synthetic catalog with a different batch size and worker count, all
+under the same --rate-limit; the last case goes through
+``POST /api/generate/analyze-garment/batch`` end to end.
+
+Usage: python benchmarks/bench_analysis.py [--products 200] [--latency 0.3] [--rate-limit 600]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+
+class FakeModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency, per_image, max_images, quota):
+        self.latency = latency
+        self.per_image = per_image
+        self.max_images = max_images
+        self.quota = quota
+        self.lock = threading.Lock()
+        self.reset()
+        super().__init__(('127.0.0.1', 0), FakeModelHandler)
+
+    def reset(self):
+        self.recent = deque()
+        self.requests = self.throttled = 0
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/analyze'
+
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        count = len(body['images'])
+        with server.lock:
+            now = time.monotonic()
+            while server.recent and server.recent[0] < now - 60:
+                server.recent.popleft()
+            if len(server.recent) >= server.quota:
+                server.throttled += 1
+                status = 429
+            elif count > server.max_images:
+                status = 400
+            else:
+                status = 200
+                server.recent.append(now)
+                server.requests += 1
+        if status != 200:
+            self.reply(status, {'error': 'rate limited' if status == 429 else 'too many images'})
+            return
+        time.sleep(server.latency + server.per_image * count)
+        analyses = [f'Image {number}: a well-cut garment for everyday styling.' for number in range(1, count + 1)]
+        self.reply(200, {'text': json.dumps(analyses)})
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds per model request')
+    parser.add_argument('--per-image', type=float, default=0.02, help='extra seconds per image in a request')
+    parser.add_argument('--max-images', type=int, default=8)
+    parser.add_argument('--rate-limit', type=float, default=600, help='model requests per minute we allow ourselves')
+    parser.add_argument('--quota', type=int, default=600, help='requests per minute the fake model accepts')
+    args = parser.parse_args()
+
+    server = FakeModelServer(args.latency, args.per_image, args.max_images, args.quota)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    from generate_data import STATIC_DIR, FileWriter, generate, plan_counts
+
+    synthetic_dirs = [os.path.join(STATIC_DIR, folder, 'synthetic') for folder in ('uploads', 'generated')]
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'bench.db')
+        os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+        os.environ['TRACING_ENABLED'] = 'false'
+        try:
+            generate(f'sqlite:///{database}', plan_counts(args.products, users=1, products=args.products, content=0),
+                     files=FileWriter(STATIC_DIR), log=lambda message: None)
+
+            from src.main import app
+            from src.models.product import Product
+            from src.utils import analysis
+            from src.utils.analysis import BatchAnalyzer, HTTPBackend
+            from src.utils.reaper import static_path
+
+            with app.app_context():
+                products = Product.query.order_by(Product.id).all()
+                items = [
+                    {'path': static_path(product.image_url), 'fabric_type': product.fabric_type, 'fit': product.fit}
+                    for product in products
+                ]
+            # Warm the downscaled copies so every case measures the model calls alone
+            for item in items:
+                analysis.load_analysis_image(item['path'])
+
+            cases = [(1, 1), (1, 4), (args.max_images, 1), (args.max_images, 4)]
+            print(f"{len(items)} images, {args.latency * 1000:.0f}ms per model request, "
+                  f"rate limit {args.rate_limit:g}/min, model quota {args.quota}/min")
+            print(f"{'case':<30} {'seconds':>8} {'images/s':>9} {'requests':>9} {'429s':>5} {'errors':>7} {'limiter wait s':>15}")
+
+            def report(label, elapsed, errors, stats):
+                print(f"{label:<30} {elapsed:>8.2f} {len(items) / elapsed:>9.1f} {server.requests:>9} "
+                      f"{server.throttled:>5} {errors:>7} {stats['rate_limit_wait_seconds']:>15.2f}")
+
+            for batch_size, workers in cases:
+                server.reset()
+                analyzer = BatchAnalyzer(HTTPBackend(server.url, max_images=args.max_images),
+                                         batch_size=batch_size, workers=workers, rate_limit=args.rate_limit)
+                started = time.perf_counter()
+                errors = sum(error is not None for _, _, error in analyzer.analyze_many(items))
+                report(f'batch {batch_size}, {workers} workers', time.perf_counter() - started, errors, analyzer.stats())
+
+            server.reset()
+            analysis.garment_analyzer = BatchAnalyzer(HTTPBackend(server.url, max_images=args.max_images),
+                                                      batch_size=args.max_images, workers=4, rate_limit=args.rate_limit)
+            client = app.test_client()
+            started = time.perf_counter()
+            response = client.post('/api/generate/analyze-garment/batch', json={'product_ids': [product.id for product in products]})
+            results = [json.loads(line) for line in response.data.decode().splitlines()]
+            errors = sum(result['status'] == 'error' for result in results)
+            report('POST analyze-garment/batch', time.perf_counter() - started, errors, analysis.garment_analyzer.stats())
+        finally:
+            for folder in synthetic_dirs:
+                shutil.rmtree(folder, ignore_errors=True)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
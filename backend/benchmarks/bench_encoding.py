@@ -0,0 +1,81 @@
+"""Compare encode time and output size of rendered stills across formats.
+
+Each image is encoded with every setting a deployment can pick through
+IMAGE_FORMAT / IMAGE_QUALITY / IMAGE_OPTIMIZE / IMAGE_PROGRESSIVE (or a
+request's ``output`` options). The placeholder render is flat artwork; the
+synthetic photo stands in for real model output. Pass --image to include
+an existing render. Usage: python benchmarks/bench_encoding.py [--image PATH]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SETTINGS = [
+    ('png', {'format': 'png', 'optimize': False}),
+    ('png optimize', {'format': 'png', 'optimize': True}),
+    ('jpeg q85', {'format': 'jpeg', 'quality': 85, 'optimize': False, 'progressive': False}),
+    ('jpeg q85 progressive', {'format': 'jpeg', 'quality': 85, 'optimize': True, 'progressive': True}),
+    ('webp q80', {'format': 'webp', 'quality': 80, 'optimize': False}),
+    ('webp q80 method 6', {'format': 'webp', 'quality': 80, 'optimize': True}),
+]
+
+
+def make_photo(size):
+    """Smooth gradients plus sensor-like noise, which is what makes photos expensive to store losslessly"""
+    from PIL import Image, ImageChops, ImageDraw, ImageFilter
+    img = Image.linear_gradient('L').resize(size).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for i in range(0, size[0], 64):
+        draw.ellipse([i, i * 1.2, i + 220, i * 1.2 + 380], fill=((i * 7) % 255, 120, 170))
+    img = img.filter(ImageFilter.GaussianBlur(6))
+    noise = Image.effect_noise(size, 24).convert('RGB')
+    return ImageChops.blend(img, noise, 0.12)
+
+
+def measure(img, settings, repeat):
+    from src.utils.encoding import IMAGE_FORMATS, resolve_output_format, save_options
+
+    resolved = resolve_output_format(settings)
+    pil_format = IMAGE_FORMATS[resolved['format']][0]
+    if pil_format == 'JPEG':
+        img = img.convert('RGB')
+    timings = []
+    for _ in range(repeat):
+        buffer = io.BytesIO()
+        started = time.perf_counter()
+        img.save(buffer, pil_format, **save_options(resolved))
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2], buffer.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', action='append', default=[], help='an existing render to include')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from src.routes.generate import draw_enhanced_placeholder
+    from src.utils.images import load_image
+
+    images = [
+        ('placeholder', draw_enhanced_placeholder({'name': 'Linen Shirt'}, {'name': 'Model'}, {'name': 'Studio'})),
+        ('synthetic photo', make_photo((1024, 1536))),
+    ]
+    images += [(os.path.basename(path), load_image(path)) for path in args.image]
+
+    print(f"{'image':<18} {'setting':<22} {'ms':>8} {'bytes':>10} {'vs png':>7}")
+    for name, img in images:
+        baseline = None
+        for label, settings in SETTINGS:
+            seconds, size = measure(img, settings, args.repeat)
+            baseline = baseline or size
+            print(f'{name:<18} {label:<22} {seconds * 1000:>8.1f} {size:>10} {size / baseline:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
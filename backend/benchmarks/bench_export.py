@@ -0,0 +1,107 @@
+"""Benchmark the streaming ZIP export against building the archive in memory.
+
+Each case runs in a fresh process against the same synthetic database and
+files, and reports the archive size, the time to read the whole body and
+the peak RSS growth while serving it. The streamed export should stay flat
+as --rows grows; the buffered archive grows with it.
+
+Usage: python benchmarks/bench_export.py [--rows 20000]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+CASES = [
+    ('buffered zip', '/bench/buffered-export?user_id=1'),
+    ('streamed zip', '/api/generate/export?user_id=1'),
+]
+
+
+def run_case(database, url):
+    """Serve one export in this process and print its measurements (child side)"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ['TRACING_ENABLED'] = 'false'
+    import io
+    import zipfile
+    from flask import request, send_file
+    from src.main import app
+    from src.models.product import GeneratedContent
+    from src.utils.reaper import static_path
+
+    # The obvious implementation: write every file into an in-memory archive first
+    def buffered_export():
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for content in GeneratedContent.query.filter_by(user_id=request.args.get('user_id', 1)).all():
+                path = static_path(content.content_url)
+                if path and os.path.exists(path):
+                    archive.write(path, f'{content.content_type}s/{content.id}.{path.rsplit(".", 1)[-1]}')
+        buffer.seek(0)
+        return send_file(buffer, mimetype='application/zip')
+
+    app.add_url_rule('/bench/buffered-export', view_func=buffered_export)
+
+    client = app.test_client()
+    client.get('/api/init/status')  # warm up imports and the connection pool
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    response = client.get(url, buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    elapsed = time.perf_counter() - started
+    response.close()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        'bytes': size,
+        'seconds': round(elapsed, 2),
+        'rss_growth_mb': round((peak - baseline) / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--case', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(*args.case)
+        return
+
+    from generate_data import STATIC_DIR, FileWriter, generate, plan_counts
+
+    synthetic_dirs = [os.path.join(STATIC_DIR, folder, 'synthetic') for folder in ('uploads', 'generated')]
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'bench.db')
+        # A single user owns every row so one export covers them all
+        counts = plan_counts(args.rows, users=1)
+        try:
+            generate(f'sqlite:///{database}', counts, files=FileWriter(STATIC_DIR), log=lambda message: None)
+            print(f"Generated {counts['content']} generated content rows with files")
+
+            print(f"{'case':<16} {'bytes':>12} {'seconds':>8} {'peak RSS +MB':>13}")
+            for label, url in CASES:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--case', database, url],
+                    stdout=subprocess.PIPE, check=True
+                ).stdout.decode()
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{label:<16} {result['bytes']:>12} {result['seconds']:>8.2f} {result['rss_growth_mb']:>13.1f}")
+        finally:
+            for folder in synthetic_dirs:
+                shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
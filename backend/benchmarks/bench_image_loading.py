@@ -0,0 +1,87 @@
+"""Compare peak RSS and latency of full decodes against bounded decodes.
+
+The test photo is made and each strategy runs in a fresh interpreter:
+Linux carries a process's peak RSS across fork/exec, so a parent that
+had decoded a large image would hide the children's peaks. Usage: python benchmarks/bench_image_loading.py
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STRATEGIES = ('full_decode', 'load_image', 'cached')
+
+
+def make_photo(path, size):
+    from PIL import Image, ImageDraw
+    img = Image.new('RGB', size, (180, 160, 140))
+    draw = ImageDraw.Draw(img)
+    for i in range(0, size[0], 150):
+        draw.rectangle([i, i, i + 900, i + 1400], fill=((i * 7) % 255, 90, 160))
+    img.save(path, 'JPEG', quality=92)
+
+
+def run_strategy(strategy, path, repeat):
+    from PIL import Image
+    from src.utils.images import ANALYSIS_MAX_SIDE, load_analysis_image, load_image
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        if strategy == 'full_decode':
+            # What analyze_garment_with_gemini did before: decode everything
+            img = Image.open(path)
+            img.load()
+        elif strategy == 'load_image':
+            img = load_image(path, (ANALYSIS_MAX_SIDE, ANALYSIS_MAX_SIDE))
+        else:
+            img = load_analysis_image(path)
+            img.load()
+        timings.append(time.perf_counter() - started)
+        del img
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings.sort()
+    print(f'{strategy},{timings[len(timings) // 2] * 1000:.1f},{(peak - baseline) / 1024:.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=int, default=6000)
+    parser.add_argument('--height', type=int, default=8000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--worker', nargs=2, metavar=('STRATEGY', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        if args.worker[0] == 'make_photo':
+            make_photo(args.worker[1], (args.width, args.height))
+        else:
+            run_strategy(args.worker[0], args.worker[1], args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'photo.jpg')
+        subprocess.run(
+            [sys.executable, __file__, '--width', str(args.width), '--height', str(args.height), '--worker', 'make_photo', path],
+            check=True
+        )
+        print(f'{args.width}x{args.height} JPEG, {os.path.getsize(path) / 1e6:.1f} MB on disk')
+        print(f"{'strategy':<12} {'p50 ms':>8} {'peak RSS delta MB':>18}")
+        for strategy in STRATEGIES:
+            output = subprocess.run(
+                [sys.executable, __file__, '--repeat', str(args.repeat), '--worker', strategy, path],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            name, latency, rss = output.split(',')
+            print(f'{name:<12} {float(latency):>8.1f} {float(rss):>18.1f}')
+        print(f'Analysis input size on disk: {os.path.getsize(os.path.join(tmp, "photo.analysis.jpg")) / 1e3:.0f} kB')
+
+
+if __name__ == '__main__':
+    main()
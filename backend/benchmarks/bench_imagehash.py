@@ -0,0 +1,55 @@
+"""Benchmark near-duplicate lookups in the perceptual-hash index.
+
+Usage: python benchmarks/bench_imagehash.py [--images 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.imagehash import NEAR_DUPLICATE_DISTANCE, HammingIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=10_000)
+    parser.add_argument('--distance', type=int, default=NEAR_DUPLICATE_DISTANCE)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    hashes = rng.integers(0, 2 ** 64, size=args.images, dtype=np.uint64)
+
+    index = HammingIndex()
+    started = time.perf_counter()
+    index.add_many(list(range(1, args.images + 1)), hashes.tolist())
+    index._merge()
+    print(f'Indexed {args.images} hashes in {time.perf_counter() - started:.2f}s')
+
+    # Queries are stored hashes with up to `distance` random bits flipped
+    targets = rng.integers(0, args.images, size=args.queries)
+    queries = []
+    for target in targets:
+        flips = rng.choice(64, size=rng.integers(0, args.distance + 1), replace=False)
+        queries.append(int(hashes[target]) ^ sum(1 << int(bit) for bit in flips))
+
+    timings = []
+    found = 0
+    for target, query in zip(targets, queries):
+        started = time.perf_counter()
+        matches = index.search(query, args.distance)
+        timings.append(time.perf_counter() - started)
+        found += any(match_id == target + 1 for match_id, _ in matches)
+
+    timings = np.array(timings) * 1e6
+    print(f'Recall: {found}/{args.queries}')
+    print(f'Lookup latency: p50 {np.percentile(timings, 50):.0f}us  '
+          f'p99 {np.percentile(timings, 99):.0f}us  mean {timings.mean():.0f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Benchmark remote image ingestion against a local stand-in CDN.
+
+The stand-in serves generated JPEGs with a fixed per-request latency and
+counts the TCP connections it accepts. Three cases are compared:
+
+- one ``requests.get`` per image, one after another (a new connection each)
+- ``RemoteImageFetcher`` with the pooled keep-alive session and N workers
+- ``POST /api/products/ingest`` end to end, including storage and rows
+
+Usage: python benchmarks/bench_ingest.py [--images 300] [--latency 0.05] [--workers 16]
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_images(count):
+    """``count`` distinct JPEGs of a few tens of KB, like CDN product shots"""
+    from PIL import Image, ImageDraw
+    images = []
+    for i in range(count):
+        img = Image.new('RGB', (600, 900), ((i * 37) % 255, (i * 91) % 255, 180))
+        draw = ImageDraw.Draw(img)
+        draw.ellipse([100 + i % 50, 150, 500, 750], fill=(240, (i * 13) % 255, 90))
+        draw.text((40, 40), f'garment {i}', fill=(0, 0, 0))
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Serves /img/<n>.jpg from memory; /img/<n>.jpg?dup=1 returns the same bytes under another URL"""
+
+    daemon_threads = True
+
+    def __init__(self, images, latency):
+        self.images = images
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.latency)
+        name = self.path.split('?')[0].rsplit('/', 1)[-1]
+        index = name.split('.')[0]
+        if not index.isdigit() or int(index) >= len(self.server.images):
+            self.send_error(404)
+            return
+        body = self.server.images[int(index)]
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(server, fn):
+    with server.lock:
+        server.connections = server.requests = 0
+    started = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - started
+    return count, elapsed, server.connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the stand-in waits per request')
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+
+    images = make_images(args.images)
+    server = StandInServer(images, args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Every tenth URL is a second address for an image already in the list
+    urls = [server.url(f'/img/{i}.jpg') for i in range(args.images)]
+    urls += [server.url(f'/img/{i}.jpg?dup=1') for i in range(0, args.images, 10)]
+
+    import requests
+    from src.utils.ingest import RemoteImageFetcher
+
+    def sequential():
+        return sum(len(requests.get(url, timeout=10).content) > 0 for url in urls)
+
+    # The stand-in listens on 127.0.0.1, which the fetcher refuses by default
+    fetcher = RemoteImageFetcher(workers=args.workers, allow_private=True)
+
+    def pooled():
+        return sum(error is None for _, _, error in fetcher.fetch_many(urls))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['TRACING_ENABLED'] = 'false'
+        from src.main import app
+        from src.routes import product as product_routes
+        product_routes.remote_image_fetcher = fetcher
+        client = app.test_client()
+        statuses = {}
+        stored = set()
+
+        def endpoint():
+            products = [
+                {'image_url': url, 'name': f'Garment {i}', 'fabric_type': 'Cotton', 'fit': 'Regular', 'size': 'M'}
+                for i, url in enumerate(urls)
+            ]
+            response = client.post('/api/products/ingest', json={'user_id': 1, 'products': products})
+            for line in response.data.decode().splitlines():
+                result = json.loads(line)
+                statuses[result['status']] = statuses.get(result['status'], 0) + 1
+                if 'image_url' in result:
+                    stored.add(result['image_url'])
+            return statuses.get('created', 0)
+
+        try:
+            print(f"{len(urls)} URLs ({args.images} distinct images), {args.latency * 1000:.0f}ms stand-in latency")
+            print(f"{'case':<34} {'ok':>5} {'seconds':>8} {'images/s':>9} {'connections':>12}")
+            for label, fn in [
+                ('sequential, new connection each', sequential),
+                (f'pooled, {args.workers} workers', pooled),
+                (f'POST /api/products/ingest', endpoint),
+            ]:
+                count, elapsed, connections = timed(server, fn)
+                print(f'{label:<34} {count:>5} {elapsed:>8.2f} {len(urls) / elapsed:>9.1f} {connections:>12}')
+            print(f'ingest results: {statuses}, {len(stored)} files stored')
+        finally:
+            for url in stored:
+                path = os.path.join(product_routes.UPLOAD_DIR, os.path.basename(url))
+                if os.path.exists(path):
+                    os.remove(path)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark catalog search against a synthetic product table.
+
+Usage: python benchmarks/bench_search.py [--rows 1000000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db, User
+from src.models.product import Product
+from src.models.search import init_search_index, search_catalog
+
+ADJECTIVES = ['Classic', 'Slim', 'Relaxed', 'Vintage', 'Summer', 'Winter', 'Organic', 'Cropped', 'Tailored', 'Washed']
+GARMENTS = ['Shirt', 'Jacket', 'Dress', 'Chinos', 'Hoodie', 'Blazer', 'Skirt', 'Jeans', 'Sweater', 'Coat']
+FABRICS = ['Cotton', 'Denim', 'Silk', 'Linen', 'Wool', 'Polyester']
+FITS = ['Slim', 'Regular', 'Oversized']
+SIZES = ['XS', 'S', 'M', 'L', 'XL']
+
+QUERIES = [
+    ('q=shirt', {'query': 'shirt'}),
+    ('q=vintage denim', {'query': 'vintage denim'}),
+    ('q=tail (prefix)', {'query': 'tail'}),
+    ('fabric_type=Silk', {'filters': {'fabric_type': 'Silk'}}),
+    ('q=jacket + fit=Slim + size=M', {'query': 'jacket', 'filters': {'fit': 'Slim', 'size': 'M'}}),
+    ('q=coat page 50', {'query': 'coat', 'page': 50}),
+]
+
+
+def populate(rows):
+    rng = random.Random(42)
+    db.session.add(User(username='bench', email='bench@example.com'))
+    db.session.commit()
+
+    batch = []
+    for i in range(rows):
+        adjective, garment, fabric = rng.choice(ADJECTIVES), rng.choice(GARMENTS), rng.choice(FABRICS)
+        batch.append({
+            'name': f'{adjective} {fabric} {garment} {i}',
+            'description': f'{adjective.lower()} {garment.lower()} in {fabric.lower()}',
+            'fabric_type': fabric,
+            'fit': rng.choice(FITS),
+            'size': rng.choice(SIZES),
+            'user_id': 1,
+        })
+        if len(batch) == 50000:
+            db.session.execute(Product.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Product.__table__.insert(), batch)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+
+            started = time.perf_counter()
+            populate(args.rows)
+            print(f'Inserted {args.rows} products in {time.perf_counter() - started:.1f}s')
+
+            started = time.perf_counter()
+            init_search_index()
+            print(f'Built search index in {time.perf_counter() - started:.1f}s')
+
+            print(f"{'query':<32} {'total':>9} {'p50 ms':>8} {'p95 ms':>8}")
+            for label, kwargs in QUERIES:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    items, total, _, _ = search_catalog('products', **kwargs)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    db.session.expunge_all()
+                timings.sort()
+                p95 = timings[int(len(timings) * 0.95) - 1]
+                print(f'{label:<32} {total:>9} {statistics.median(timings):>8.2f} {p95:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark streamed vs buffered JSON list responses, with and without compression.
+
+Each case runs in a fresh process against the same synthetic database and
+reports the peak RSS growth while serving the request, the bytes on the
+wire and the time to read the whole body.
+
+Usage: python benchmarks/bench_streaming.py [--rows 100000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+CASES = [
+    ('products, buffered', '/bench/buffered-products', None),
+    ('products, streamed', '/api/products', None),
+    ('products, streamed + gzip', '/api/products', 'gzip'),
+    ('products, streamed + br', '/api/products', 'br'),
+    ('content, buffered', '/bench/buffered-content?user_id=1', None),
+    ('content, buffered + gzip', '/bench/buffered-content?user_id=1', 'gzip'),
+    ('content, streamed', '/api/generate/content?user_id=1', None),
+    ('content, streamed + gzip', '/api/generate/content?user_id=1', 'gzip'),
+    ('content, streamed + br', '/api/generate/content?user_id=1', 'br'),
+]
+
+
+def run_case(database, url, encoding):
+    """Serve one request in this process and print its measurements (child side)"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ['TRACING_ENABLED'] = 'false'
+    from flask import jsonify, request
+    from src.main import app
+    from src.models.product import Product, GeneratedContent
+
+    # The list endpoints as they were before streaming
+    def buffered_products():
+        return jsonify([product.to_dict() for product in Product.query.all()])
+
+    def buffered_content():
+        content = GeneratedContent.query.filter_by(user_id=request.args.get('user_id', 1)).all()
+        return jsonify([item.to_dict() for item in content])
+
+    app.add_url_rule('/bench/buffered-products', view_func=buffered_products)
+    app.add_url_rule('/bench/buffered-content', view_func=buffered_content)
+
+    client = app.test_client()
+    headers = {'Accept-Encoding': encoding} if encoding else {'Accept-Encoding': 'identity'}
+    client.get('/api/init/status')  # warm up imports and the connection pool
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    response = client.get(url, headers=headers, buffered=False)
+    wire_bytes = sum(len(chunk) for chunk in response.response)
+    elapsed = time.perf_counter() - started
+    response.close()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        'encoding': response.headers.get('Content-Encoding', 'identity'),
+        'bytes': wire_bytes,
+        'seconds': round(elapsed, 2),
+        'rss_growth_mb': round((peak - baseline) / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--case', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        database, url, encoding = args.case
+        run_case(database, url, encoding if encoding != '-' else None)
+        return
+
+    from generate_data import generate, plan_counts
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'bench.db')
+        # A single user owns every row so one request returns them all
+        counts = plan_counts(args.rows, users=1)
+        generate(f'sqlite:///{database}', counts, log=lambda message: None)
+        print(f"Generated {counts['products']} products and {counts['content']} generated content rows")
+
+        print(f"{'case':<30} {'encoding':>9} {'bytes':>12} {'seconds':>8} {'peak RSS +MB':>13}")
+        for label, url, encoding in CASES:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--case', database, url, encoding or '-'],
+                stdout=subprocess.PIPE, check=True
+            ).stdout.decode()
+            result = json.loads(output.strip().splitlines()[-1])
+            if encoding and result['encoding'] != encoding:
+                print(f'{label:<30} {"skipped (" + encoding + " unavailable)":>45}')
+                continue
+            print(f"{label:<30} {result['encoding']:>9} {result['bytes']:>12} {result['seconds']:>8.2f} {result['rss_growth_mb']:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""Populate a database with synthetic users, catalog items and generated content.
+
+Row counts are derived from --scale (the number of products and of
+generated content rows) and can be overridden one by one. Ownership is
+skewed so a few users own most of the data, as in production.
+
+Usage: python scripts/generate_data.py --scale 100000 [--database src/database/synthetic.db] [--files]
+
+Then run the app against it with DATABASE_URL=sqlite:///<path> python src/main.py
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from PIL import Image
+from sqlalchemy import event
+from src.models.user import db, User
+from src.models.product import Product, Avatar, Scene, GeneratedContent
+from src.models.catalog import PRESET_AVATARS, PRESET_SCENES, normalize_avatar, normalize_scene
+from src.models.search import init_search_index
+from src.models.stats import rebuild_usage_stats
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATABASE = os.path.join(BACKEND_DIR, 'src', 'database', 'synthetic.db')
+STATIC_DIR = os.path.join(BACKEND_DIR, 'src', 'static')
+
+FIRST_NAMES = ['alex', 'maya', 'jordan', 'sofia', 'liam', 'zoe', 'noah', 'ava', 'kai', 'mila', 'omar', 'lena']
+ADJECTIVES = ['Classic', 'Slim', 'Relaxed', 'Vintage', 'Summer', 'Winter', 'Organic', 'Cropped', 'Tailored', 'Washed']
+GARMENTS = ['Shirt', 'Jacket', 'Dress', 'Chinos', 'Hoodie', 'Blazer', 'Skirt', 'Jeans', 'Sweater', 'Coat']
+FABRICS = ['Cotton', 'Denim', 'Silk', 'Linen', 'Wool', 'Polyester']
+FITS = ['Slim', 'Regular', 'Oversized']
+SIZES = ['XS', 'S', 'M', 'L', 'XL']
+ETHNICITIES = ['Asian', 'Black', 'Latina', 'Latino', 'Middle Eastern', 'Mixed', 'White']
+BODY_TYPES = ['ectomorph', 'mesomorph', 'endomorph']
+AGE_RANGES = ['18-25', '22-28', '26-35', '36-45', '46-60']
+GENDERS = ['female', 'male', 'non-binary']
+SCENE_CATEGORIES = ['Urban', 'Studio', 'Nature', 'Indoor']
+LIGHTING_PRESETS = ['Natural', 'Studio', 'Golden Hour', 'Moody']
+POSES = ['standing', 'walking', 'sitting', 'leaning', 'hands_on_hips', 'crossed_arms', 'looking_away', 'profile']
+
+# Share of generated content rows that are turnaround videos
+VIDEO_SHARE = 0.1
+# Share of generated content rendered with a preset avatar rather than a custom one
+PRESET_AVATAR_SHARE = 0.7
+# History covered by created_at timestamps
+HISTORY = timedelta(days=365)
+
+
+def plan_counts(scale, users=None, products=None, avatars=None, scenes=None, content=None):
+    """Row counts for a scale, with per-table overrides"""
+    return {
+        'users': users or max(1, scale // 100),
+        'products': products if products is not None else scale,
+        'avatars': avatars if avatars is not None else scale // 100,
+        'scenes': scenes if scenes is not None else scale // 1000,
+        'content': content if content is not None else scale,
+    }
+
+
+def skewed(rng, count):
+    """Pick an id in 1..count, favouring low ids (roughly a power law)"""
+    return int(count * rng.random() ** 3) + 1
+
+
+def timestamps(count):
+    """Evenly spaced creation times over HISTORY, oldest first"""
+    start = datetime.utcnow() - HISTORY
+    step = HISTORY / max(count, 1)
+    return (start + step * i for i in range(count))
+
+
+def make_placeholders(size, fmt, variants=8):
+    """A few encoded placeholder images to write in place of real files"""
+    placeholders = []
+    for i in range(variants):
+        shade = 120 + i * 15
+        img = Image.new('RGB', size, (shade, 200 - i * 10, 220 - shade // 2))
+        buffer = io.BytesIO()
+        img.save(buffer, fmt)
+        placeholders.append(buffer.getvalue())
+    return placeholders
+
+
+class FileWriter:
+    """Write placeholder files for synthetic rows under the static folder"""
+
+    def __init__(self, static_dir):
+        self.static_dir = static_dir
+        self.images = {
+            'jpg': make_placeholders((256, 384), 'JPEG'),
+            'png': make_placeholders((256, 384), 'PNG'),
+            'webp': make_placeholders((256, 384), 'WEBP'),
+        }
+        self.written = 0
+
+    def write(self, url, index):
+        path = os.path.join(self.static_dir, url.lstrip('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        variants = self.images[url.rsplit('.', 1)[-1]]
+        with open(path, 'wb') as f:
+            f.write(variants[index % len(variants)])
+        self.written += 1
+
+
+def insert_rows(table, rows, batch_size):
+    """Insert an iterable of row dicts with executemany in fixed-size batches"""
+    inserted = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            db.session.execute(table.insert(), batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        inserted += len(batch)
+    db.session.commit()
+    return inserted
+
+
+def user_rows(counts, rng):
+    for i in range(1, counts['users'] + 1):
+        name = f'{rng.choice(FIRST_NAMES)}{i}'
+        yield {'id': i, 'username': name, 'email': f'{name}@example.com'}
+
+
+def product_rows(counts, rng, files):
+    for i, created_at in enumerate(timestamps(counts['products']), start=1):
+        adjective, garment, fabric = rng.choice(ADJECTIVES), rng.choice(GARMENTS), rng.choice(FABRICS)
+        image_url = f'/uploads/synthetic/product-{i}.jpg'
+        if files:
+            files.write(image_url, i)
+        yield {
+            'id': i,
+            'name': f'{adjective} {fabric} {garment}',
+            'description': f'{adjective.lower()} {garment.lower()} in {fabric.lower()}',
+            'fabric_type': fabric,
+            'fit': rng.choice(FITS),
+            'size': rng.choice(SIZES),
+            'image_url': image_url,
+            'digital_twin_url': f'/api/digital-twins/{i}.obj',
+            'created_at': created_at,
+            'user_id': skewed(rng, counts['users']),
+        }
+
+
+def avatar_rows(counts, rng):
+    rows = [normalize_avatar(avatar) for avatar in PRESET_AVATARS]
+    for i in range(1, counts['avatars'] + 1):
+        rows.append(normalize_avatar({
+            'name': f'Custom Avatar {i}',
+            'description': 'Synthetic custom avatar',
+            'ethnicity': rng.choice(ETHNICITIES),
+            'body_type': rng.choice(BODY_TYPES),
+            'age_range': rng.choice(AGE_RANGES),
+            'gender': rng.choice(GENDERS),
+            'image_url': f'/avatars/custom-{i}.jpg',
+            'model_url': f'/models/custom-{i}.obj',
+        }, user_id=skewed(rng, counts['users'])))
+    for i, row in enumerate(rows, start=1):
+        yield {'id': i, **row}
+
+
+def scene_rows(counts, rng):
+    rows = [normalize_scene(scene) for scene in PRESET_SCENES]
+    for i in range(1, counts['scenes'] + 1):
+        category = rng.choice(SCENE_CATEGORIES)
+        rows.append(normalize_scene({
+            'name': f'{category} Scene {i}',
+            'description': f'Synthetic {category.lower()} environment',
+            'category': category,
+            'image_url': f'/scenes/synthetic-{i}.jpg',
+            'environment_url': f'/environments/synthetic-{i}.hdr',
+            'lighting_preset': rng.choice(LIGHTING_PRESETS),
+        }))
+    for i, row in enumerate(rows, start=1):
+        yield {'id': i, **row}
+
+
+def content_rows(counts, rng, files):
+    preset_avatars, preset_scenes = len(PRESET_AVATARS), len(PRESET_SCENES)
+    avatars = preset_avatars + counts['avatars']
+    scenes = preset_scenes + counts['scenes']
+    for i, created_at in enumerate(timestamps(counts['content']), start=1):
+        if rng.random() < VIDEO_SHARE:
+            content_type, pose, content_url = 'video', 'turnaround', f'/generated/synthetic/{i}.webp'
+        else:
+            content_type, pose, content_url = 'image', rng.choice(POSES), f'/generated/synthetic/{i}.png'
+        if files:
+            files.write(content_url, i)
+        if avatars == preset_avatars or rng.random() < PRESET_AVATAR_SHARE:
+            avatar_id = rng.randint(1, preset_avatars)
+        else:
+            avatar_id = rng.randint(preset_avatars + 1, avatars)
+        yield {
+            'id': i,
+            'product_id': skewed(rng, counts['products']),
+            'avatar_id': avatar_id,
+            'scene_id': rng.randint(1, preset_scenes) if rng.random() < 0.8 else rng.randint(1, scenes),
+            'content_type': content_type,
+            'content_url': content_url,
+            'pose': pose,
+            'created_at': created_at,
+            'user_id': skewed(rng, counts['users']),
+        }
+
+
+def _fast_sqlite_load(dbapi_connection, connection_record):
+    # Bulk load only: a crash mid-load leaves a database you regenerate anyway
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA synchronous=OFF')
+    cursor.execute('PRAGMA journal_mode=MEMORY')
+    cursor.close()
+
+
+def generate(database_uri, counts, seed=42, files=None, batch_size=50000, log=print):
+    """Create the schema in ``database_uri`` and fill it with synthetic rows"""
+    rng = random.Random(seed)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    db.init_app(app)
+
+    timings = {}
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _fast_sqlite_load)
+        db.create_all()
+
+        steps = [
+            ('users', User, user_rows(counts, rng)),
+            ('products', Product, product_rows(counts, rng, files)),
+            ('avatars', Avatar, avatar_rows(counts, rng)),
+            ('scenes', Scene, scene_rows(counts, rng)),
+            ('content', GeneratedContent, content_rows(counts, rng, files)),
+        ]
+        for name, model, rows in steps:
+            started = time.perf_counter()
+            inserted = insert_rows(model.__table__, rows, batch_size)
+            timings[name] = time.perf_counter() - started
+            log(f'Inserted {inserted} {name} in {timings[name]:.1f}s')
+
+        # Indexing after the load is much faster than maintaining FTS triggers row by row
+        started = time.perf_counter()
+        init_search_index()
+        timings['search_index'] = time.perf_counter() - started
+        log(f"Built search index in {timings['search_index']:.1f}s")
+
+        # Usage counters are maintained incrementally by the app; count the bulk load once
+        started = time.perf_counter()
+        stats = rebuild_usage_stats()
+        timings['usage_stats'] = time.perf_counter() - started
+        log(f"Counted {stats} usage stats in {timings['usage_stats']:.1f}s")
+
+        db.engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=10000, help='products and generated content rows (default 10000)')
+    parser.add_argument('--users', type=int, help='default: scale / 100')
+    parser.add_argument('--products', type=int, help='default: scale')
+    parser.add_argument('--avatars', type=int, help='custom avatars on top of the presets (default: scale / 100)')
+    parser.add_argument('--scenes', type=int, help='scenes on top of the presets (default: scale / 1000)')
+    parser.add_argument('--content', type=int, help='generated content rows (default: scale)')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='SQLite file or SQLAlchemy URL')
+    parser.add_argument('--force', action='store_true', help='replace an existing SQLite file')
+    parser.add_argument('--files', action='store_true', help='write placeholder files for uploads and generated content')
+    parser.add_argument('--static-dir', default=STATIC_DIR, help='where --files writes (default: src/static)')
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    database_uri = args.database
+    if '://' not in database_uri:
+        path = os.path.abspath(database_uri)
+        if os.path.exists(path):
+            if not args.force:
+                parser.error(f'{path} already exists; pass --force to replace it')
+            os.remove(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        database_uri = f'sqlite:///{path}'
+
+    counts = plan_counts(args.scale, args.users, args.products, args.avatars, args.scenes, args.content)
+    files = FileWriter(args.static_dir) if args.files else None
+    print('Generating ' + ', '.join(f'{count} {name}' for name, count in counts.items()))
+
+    started = time.perf_counter()
+    generate(database_uri, counts, args.seed, files, args.batch_size)
+    print(f'Done in {time.perf_counter() - started:.1f}s' + (f', wrote {files.written} files' if files else ''))
+    print(f'Run the app against it with DATABASE_URL={database_uri}')
+
+
+if __name__ == '__main__':
+    main()
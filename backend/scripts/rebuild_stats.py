@@ -0,0 +1,51 @@
+"""Recount the usage stats table from GeneratedContent.
+
+With --check the counters are compared against a fresh count and any
+drift is reported without writing anything; the exit status is 1 when
+they differ. Uses the app's database (set DATABASE_URL to pick another).
+
+Usage: python scripts/rebuild_stats.py [--check]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import app
+from src.models.stats import UsageStat, compute_usage_stats, rebuild_usage_stats
+
+
+def check():
+    expected = compute_usage_stats()
+    actual = {(row.user_id, row.dimension, row.key): row.count for row in UsageStat.query.all()}
+    drift = sorted(
+        (key, actual.get(key, 0), expected.get(key, 0))
+        for key in expected.keys() | actual.keys()
+        if actual.get(key, 0) != expected.get(key, 0)
+    )
+    for (user_id, dimension, key), stored, counted in drift[:50]:
+        print(f'user {user_id} {dimension}={key!r}: stored {stored}, counted {counted}')
+    if len(drift) > 50:
+        print(f'... and {len(drift) - 50} more')
+    print(f'{len(expected)} counters checked, {len(drift)} differ')
+    return not drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help='compare against a fresh count instead of rebuilding')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.check:
+            sys.exit(0 if check() else 1)
+
+        started = time.perf_counter()
+        rows = rebuild_usage_stats()
+        print(f'Rebuilt {rows} usage counters in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Measure endpoint latency against growing synthetic datasets.
+
+For each scale a database is generated with scripts/generate_data.py and
+the endpoint set is timed in a fresh process running the app against it.
+An endpoint whose median exceeds --budget is not run at larger scales,
+which is where it stopped scaling. Results are written as JSON and, when
+matplotlib is installed, plotted as latency against row count.
+
+Usage: python scripts/scaling_harness.py [--scales 10000,100000,1000000] [--plot scaling.png]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_data import generate, plan_counts
+
+# label -> URL; {product_id}, {content_id} and {user_id} are filled per scale
+ENDPOINTS = {
+    'GET /products': '/api/products',
+    'GET /products/<id>': '/api/products/{product_id}',
+    'GET /avatars': '/api/avatars',
+    'GET /scenes': '/api/scenes',
+    'GET /users': '/api/users',
+    'GET /generate/content?user_id': '/api/generate/content?user_id={user_id}',
+    'GET /generate/content/<id>': '/api/generate/content/{content_id}',
+    'GET /search/products?q': '/api/search/products?q=vintage+denim',
+    'GET /search/products?fabric_type': '/api/search/products?fabric_type=Silk&page=50',
+    'GET /init/status': '/api/init/status',
+}
+
+
+def measure(database, labels, repeat):
+    """Time the given endpoints in this process against ``database`` (runs in the child)"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ.setdefault('TRACING_ENABLED', 'false')
+    from src.main import app
+
+    client = app.test_client()
+    counts = json.loads(os.environ['SCALING_COUNTS'])
+    ids = {
+        'product_id': max(1, counts['products'] // 2),
+        'content_id': max(1, counts['content'] // 2),
+        # Ownership is skewed towards low ids, so user 1 is the heaviest user
+        'user_id': 1,
+    }
+
+    for label in labels:
+        url = ENDPOINTS[label].format(**ids)
+        timings = []
+        size = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - started)
+            size = len(response.data)
+            if response.status_code != 200:
+                print(f'{label} returned {response.status_code}', file=sys.stderr)
+        print(json.dumps({
+            'endpoint': label,
+            'p50_ms': round(statistics.median(timings) * 1000, 2),
+            'max_ms': round(max(timings) * 1000, 2),
+            'bytes': size,
+        }), flush=True)
+
+
+def run_scale(database, counts, labels, repeat, timeout):
+    """Measure one scale in a child process so each run starts with a cold app"""
+    env = {**os.environ, 'SCALING_COUNTS': json.dumps(counts)}
+    command = [sys.executable, os.path.abspath(__file__), '--measure', database, '--repeat', str(repeat),
+               '--endpoints', json.dumps(labels)]
+    try:
+        output = subprocess.run(command, env=env, stdout=subprocess.PIPE, timeout=timeout, check=True).stdout
+    except subprocess.TimeoutExpired as e:
+        output = e.stdout or b''
+        print(f'Measurement timed out after {timeout}s; keeping completed endpoints')
+    return [json.loads(line) for line in output.decode().splitlines() if line.startswith('{')]
+
+
+def plot(results, path):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print('matplotlib is not installed, skipping the plot')
+        return
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for label in ENDPOINTS:
+        points = [(run['rows'], item['p50_ms']) for run in results for item in run['endpoints'] if item['endpoint'] == label]
+        if points:
+            ax.plot(*zip(*points), marker='o', label=label)
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel('rows (products + generated content)')
+    ax.set_ylabel('median latency (ms)')
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend(fontsize='small')
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f'Wrote {path}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='10000,100000,1000000', help='comma-separated --scale values')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=2000, help='median ms beyond which an endpoint is dropped')
+    parser.add_argument('--timeout', type=int, default=1800, help='seconds allowed for measuring one scale')
+    parser.add_argument('--workdir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scaling'))
+    parser.add_argument('--reuse', action='store_true', help='reuse databases already in --workdir')
+    parser.add_argument('--output', default='scaling_results.json')
+    parser.add_argument('--plot', default='scaling.png')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    parser.add_argument('--endpoints', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, json.loads(args.endpoints), args.repeat)
+        return
+
+    os.makedirs(args.workdir, exist_ok=True)
+    labels = list(ENDPOINTS)
+    results = []
+
+    for scale in (int(value) for value in args.scales.split(',')):
+        counts = plan_counts(scale)
+        database = os.path.join(args.workdir, f'scale-{scale}.db')
+        if not (args.reuse and os.path.exists(database)):
+            if os.path.exists(database):
+                os.remove(database)
+            print(f'Generating scale {scale}')
+            generate(f'sqlite:///{database}', counts, log=lambda message: print(f'  {message}'))
+
+        endpoints = run_scale(database, counts, labels, args.repeat, args.timeout)
+        rows = counts['products'] + counts['content']
+        results.append({'scale': scale, 'rows': rows, 'counts': counts, 'endpoints': endpoints})
+
+        print(f"{'endpoint':<42} {'p50 ms':>10} {'max ms':>10} {'bytes':>12}   (scale {scale})")
+        for item in endpoints:
+            print(f"{item['endpoint']:<42} {item['p50_ms']:>10.2f} {item['max_ms']:>10.2f} {item['bytes']:>12}")
+
+        measured = {item['endpoint'] for item in endpoints}
+        over_budget = [item['endpoint'] for item in endpoints if item['p50_ms'] > args.budget]
+        for label in over_budget + [label for label in labels if label not in measured]:
+            print(f'  {label} stopped scaling at {scale}; skipping larger scales')
+        labels = [label for label in labels if label in measured and label not in over_budget]
+        if not labels:
+            break
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Wrote {args.output}')
+    plot(results, args.plot)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,16 +3,28 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask, request, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
-from src.models.product import Product, Avatar, Scene, GeneratedContent  # Import all models
+from src.models.product import Product, Avatar, Scene, GeneratedContent, ContactSheetTile, ImageHash, GarmentAnalysis  # Import all models
+from src.models.idempotency import IdempotencyKey
+from src.models.stats import UsageStat, init_usage_stats
 from src.routes.user import user_bp
 from src.routes.product import product_bp
 from src.routes.avatar import avatar_bp
 from src.routes.scene import scene_bp
 from src.routes.generate import generate_bp
 from src.routes.init import init_bp
+from src.routes.search import search_bp
+from src.routes.debug import debug_bp
+from src.routes.jobs import jobs_bp
+from src.routes.stats import stats_bp
+from src.models.migrations import migrate_schema
+from src.models.search import init_search_index
+from src.utils.profiling import init_profiling
+from src.utils.tracing import init_tracing
+from src.utils.compression import init_compression
+from src.utils.encoding import negotiate_image
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -20,6 +32,15 @@ app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 # Enable CORS for all routes
 CORS(app)
 
+# Sampled request profiling (off unless PROFILE_SAMPLE_RATE or PROFILE_TOKEN is set)
+init_profiling(app)
+
+# Stage-level timings in a Server-Timing header and per-stage histograms
+init_tracing(app)
+
+# gzip/brotli for text responses above COMPRESS_MIN_SIZE, including streamed lists
+init_compression(app)
+
 # Register all blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(product_bp, url_prefix='/api')
@@ -27,6 +48,10 @@ app.register_blueprint(avatar_bp, url_prefix='/api')
 app.register_blueprint(scene_bp, url_prefix='/api')
 app.register_blueprint(generate_bp, url_prefix='/api')
 app.register_blueprint(init_bp, url_prefix='/api')
+app.register_blueprint(search_bp, url_prefix='/api')
+app.register_blueprint(debug_bp, url_prefix='/api')
+app.register_blueprint(jobs_bp, url_prefix='/api')
+app.register_blueprint(stats_bp, url_prefix='/api')
 
 # Serve uploaded files from /uploads/
 @app.route('/uploads/<path:filename>')
@@ -34,18 +59,36 @@ def uploaded_file(filename):
     uploads_dir = os.path.join(app.static_folder, 'uploads')
     return send_from_directory(uploads_dir, filename)
 
-# Serve generated files from /generated/
+# Serve generated files from /generated/, converting stills to a format the client prefers
 @app.route('/generated/<path:filename>')
 def generated_file(filename):
     generated_dir = os.path.join(app.static_folder, 'generated')
-    return send_from_directory(generated_dir, filename)
+    filename, mimetype = negotiate_image(generated_dir, filename, request.accept_mimetypes)
+    response = send_from_directory(generated_dir, filename, mimetype=mimetype)
+    if mimetype:
+        response.vary.add('Accept')
+    return response
 
 # uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# DATABASE_URL points the app at another database, e.g. one from scripts/generate_data.py
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    'DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
-with app.app_context():
-    db.create_all()
+
+def init_database():
+    """Create missing tables and bring an existing database up to date"""
+    with app.app_context():
+        db.create_all()
+        # Fails startup if the existing database cannot be brought up to date
+        migrate_schema()
+        init_search_index()
+        init_usage_stats()
+
+# Render workers started with spawn re-import this script as __mp_main__; only the server sets up the schema
+if __name__ != '__mp_main__':
+    init_database()
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -0,0 +1,138 @@
+import os
+import time
+from sqlalchemy import delete, func, or_, select
+from src.models.user import db, User
+from src.models.product import Product, Avatar, GeneratedContent, ContactSheetTile, ImageHash, GarmentAnalysis
+from src.models.idempotency import IdempotencyKey
+from src.models.stats import record_usage
+from src.utils.reaper import UPLOAD_GRACE_SECONDS, file_reaper, files_for_urls
+
+# Rows removed per transaction; each batch commits before the next starts so
+# a large cascade never holds the write lock for long
+DELETE_BATCH_SIZE = int(os.getenv('DELETE_BATCH_SIZE', 1000))
+
+
+def _no_progress(**counts):
+    pass
+
+
+def _chunks(ids, size=DELETE_BATCH_SIZE):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def delete_generated_content(where, report=_no_progress):
+    """Delete generated content matching ``where`` in batches.
+
+    Contact sheet tiles pointing at a deleted render (or belonging to a
+    deleted sheet) go with it, and the usage counters are decremented in
+    the same transaction. Files are handed to the reaper after each batch
+    commits.
+    """
+    deleted = 0
+    while True:
+        rows = db.session.execute(
+            select(
+                GeneratedContent.id, GeneratedContent.content_url, GeneratedContent.user_id,
+                GeneratedContent.product_id, GeneratedContent.scene_id, GeneratedContent.avatar_id,
+                GeneratedContent.pose, GeneratedContent.content_type, GeneratedContent.created_at
+            ).where(where).limit(DELETE_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return deleted
+
+        ids = [row.id for row in rows]
+        tiles = db.session.execute(
+            delete(ContactSheetTile).where(or_(ContactSheetTile.sheet_id.in_(ids), ContactSheetTile.tile_id.in_(ids)))
+        ).rowcount
+        db.session.execute(delete(GeneratedContent).where(GeneratedContent.id.in_(ids)))
+        record_usage(rows, sign=-1)
+        db.session.commit()
+
+        queued = file_reaper.enqueue(files_for_urls(row.content_url for row in rows))
+        report(generated_content=len(ids), contact_sheet_tiles=tiles, files_queued=queued)
+        deleted += len(ids)
+
+
+def delete_products(where, report=_no_progress):
+    """Delete products matching ``where`` with everything generated from them.
+
+    Uploaded images (and their perceptual hashes) are only removed once no
+    remaining product or garment analysis uses them. Files written within
+    UPLOAD_GRACE_SECONDS are left on disk, since uploads are content-addressed
+    and a recent one may be waiting to be attached to a new product.
+    """
+    deleted = 0
+    while True:
+        rows = db.session.execute(
+            select(Product.id, Product.image_url).where(where).limit(DELETE_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return deleted
+
+        ids = [row.id for row in rows]
+        # Taken before the orphan check, so an upload rewriting a file after it is kept
+        keep_modified_after = time.time() - UPLOAD_GRACE_SECONDS
+        delete_generated_content(GeneratedContent.product_id.in_(ids), report)
+        analyses = db.session.execute(delete(GarmentAnalysis).where(GarmentAnalysis.product_id.in_(ids))).rowcount
+        db.session.execute(delete(Product).where(Product.id.in_(ids)))
+
+        urls = {row.image_url for row in rows if row.image_url}
+        still_used = set(db.session.scalars(select(Product.image_url).where(Product.image_url.in_(urls))))
+        still_used.update(db.session.scalars(select(GarmentAnalysis.image_url).where(GarmentAnalysis.image_url.in_(urls))))
+        orphaned = urls - still_used
+        hashes = db.session.execute(delete(ImageHash).where(ImageHash.image_url.in_(orphaned))).rowcount
+        db.session.commit()
+
+        queued = file_reaper.enqueue(files_for_urls(orphaned), keep_modified_after)
+        report(products=len(ids), garment_analyses=analyses, image_hashes=hashes, files_queued=queued)
+        deleted += len(ids)
+
+
+def delete_product_ids(product_ids, report=_no_progress):
+    """Delete products by id, keeping each IN list within one batch"""
+    return sum(delete_products(Product.id.in_(chunk), report) for chunk in _chunks(product_ids))
+
+
+def delete_users(user_ids, report=_no_progress):
+    """Delete users with their products, renders, custom avatars and idempotency keys"""
+    deleted = 0
+    for chunk in _chunks(user_ids):
+        delete_products(Product.user_id.in_(chunk), report)
+        delete_generated_content(GeneratedContent.user_id.in_(chunk), report)
+
+        # Other users' renders of a custom avatar go with the avatar
+        avatar_ids = list(db.session.scalars(select(Avatar.id).where(Avatar.user_id.in_(chunk))))
+        for avatar_chunk in _chunks(avatar_ids):
+            delete_generated_content(GeneratedContent.avatar_id.in_(avatar_chunk), report)
+        avatars = db.session.execute(delete(Avatar).where(Avatar.user_id.in_(chunk))).rowcount
+        analyses = db.session.execute(delete(GarmentAnalysis).where(GarmentAnalysis.user_id.in_(chunk))).rowcount
+
+        # Idempotency keys are stored scoped as "<user_id>:<key>"
+        keys = db.session.execute(
+            delete(IdempotencyKey).where(or_(*[IdempotencyKey.key.like(f'{user_id}:%') for user_id in chunk]))
+        ).rowcount
+        users = db.session.execute(delete(User).where(User.id.in_(chunk))).rowcount
+        db.session.commit()
+
+        report(users=users, avatars=avatars, garment_analyses=analyses, idempotency_keys=keys)
+        deleted += users
+    return deleted
+
+
+def count_product_cascade(where):
+    """Products and generated content rows a product delete would remove"""
+    product_ids = select(Product.id).where(where)
+    return (
+        db.session.scalar(select(func.count()).select_from(Product).where(where))
+        + db.session.scalar(select(func.count()).select_from(GeneratedContent).where(GeneratedContent.product_id.in_(product_ids)))
+    )
+
+
+def count_user_cascade(user_ids):
+    """Rough size of a user delete: the products and renders they own"""
+    return (
+        db.session.scalar(select(func.count()).select_from(Product).where(Product.user_id.in_(user_ids)))
+        + db.session.scalar(select(func.count()).select_from(GeneratedContent).where(GeneratedContent.user_id.in_(user_ids)))
+    )
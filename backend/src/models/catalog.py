@@ -0,0 +1,208 @@
+from sqlalchemy import func, literal_column, or_, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from src.models.user import db
+from src.models.product import Avatar, Scene
+
+# Preset catalog shipped with every install. This is the single source for
+# /api/init/database, /api/avatars/preset and /api/scenes/preset.
+PRESET_AVATARS = [
+    {
+        'name': 'Alex - Urban Style',
+        'description': 'Young professional, urban aesthetic',
+        'ethnicity': 'Mixed',
+        'body_type': 'mesomorph',
+        'age_range': '25-30',
+        'gender': 'male',
+        'image_url': '/avatars/alex.jpg',
+        'model_url': '/models/alex.obj',
+        'is_custom': False
+    },
+    {
+        'name': 'Maya - Fashion Forward',
+        'description': 'Fashion-forward model with elegant style',
+        'ethnicity': 'Asian',
+        'body_type': 'ectomorph',
+        'age_range': '22-28',
+        'gender': 'female',
+        'image_url': '/avatars/maya.jpg',
+        'model_url': '/models/maya.obj',
+        'is_custom': False
+    },
+    {
+        'name': 'Jordan - Athletic',
+        'description': 'Athletic build, sporty aesthetic',
+        'ethnicity': 'African American',
+        'body_type': 'mesomorph',
+        'age_range': '20-25',
+        'gender': 'male',
+        'image_url': '/avatars/jordan.jpg',
+        'model_url': '/models/jordan.obj',
+        'is_custom': False
+    },
+    {
+        'name': 'Sofia - Classic',
+        'description': 'Classic beauty with timeless appeal',
+        'ethnicity': 'Latina',
+        'body_type': 'mesomorph',
+        'age_range': '26-32',
+        'gender': 'female',
+        'image_url': '/avatars/sofia.jpg',
+        'model_url': '/models/sofia.obj',
+        'is_custom': False
+    }
+]
+
+PRESET_SCENES = [
+    {
+        'name': 'Urban Street',
+        'description': 'Modern city street with urban architecture',
+        'category': 'Urban',
+        'image_url': '/scenes/urban_street.jpg',
+        'environment_url': '/environments/urban_street.hdr',
+        'lighting_preset': 'Natural'
+    },
+    {
+        'name': 'Minimalist Studio',
+        'description': 'Clean white studio with professional lighting',
+        'category': 'Studio',
+        'image_url': '/scenes/minimalist_studio.jpg',
+        'environment_url': '/environments/studio.hdr',
+        'lighting_preset': 'Studio'
+    },
+    {
+        'name': 'Golden Hour Park',
+        'description': 'Beautiful park setting during golden hour',
+        'category': 'Nature',
+        'image_url': '/scenes/golden_hour_park.jpg',
+        'environment_url': '/environments/park.hdr',
+        'lighting_preset': 'Golden Hour'
+    },
+    {
+        'name': 'Industrial Loft',
+        'description': 'Modern industrial loft with exposed brick',
+        'category': 'Indoor',
+        'image_url': '/scenes/industrial_loft.jpg',
+        'environment_url': '/environments/loft.hdr',
+        'lighting_preset': 'Moody'
+    },
+    {
+        'name': 'Beach Sunset',
+        'description': 'Tropical beach with stunning sunset backdrop',
+        'category': 'Nature',
+        'image_url': '/scenes/beach_sunset.jpg',
+        'environment_url': '/environments/beach.hdr',
+        'lighting_preset': 'Golden Hour'
+    },
+    {
+        'name': 'Rooftop City View',
+        'description': 'Modern rooftop with city skyline view',
+        'category': 'Urban',
+        'image_url': '/scenes/rooftop_city.jpg',
+        'environment_url': '/environments/rooftop.hdr',
+        'lighting_preset': 'Natural'
+    }
+]
+
+AVATAR_FIELDS = ('name', 'description', 'ethnicity', 'body_type', 'age_range', 'gender',
+                 'image_url', 'model_url', 'is_custom', 'user_id')
+SCENE_FIELDS = ('name', 'description', 'category', 'image_url', 'environment_url', 'lighting_preset')
+
+# Rows per statement, kept well under SQLite's bound-parameter limit
+UPSERT_CHUNK_SIZE = 1000
+
+
+def normalize_avatar(data, user_id=None):
+    """Fill defaults the same way POST /api/avatars does"""
+    is_custom = data.get('is_custom', user_id is not None)
+    if is_custom and user_id is None:
+        raise ValueError(f"Custom avatar '{data['name']}' needs an owning user_id")
+    return {
+        'name': data['name'],
+        'description': data.get('description', ''),
+        'ethnicity': data.get('ethnicity', ''),
+        'body_type': data.get('body_type', ''),
+        'age_range': data.get('age_range', ''),
+        'gender': data.get('gender', ''),
+        'image_url': data.get('image_url', ''),
+        'model_url': data.get('model_url', ''),
+        'is_custom': is_custom,
+        # Custom avatars always belong to the caller's user, never to one named in the item
+        'user_id': user_id if is_custom else None
+    }
+
+
+def normalize_scene(data):
+    """Fill defaults the same way POST /api/scenes does"""
+    return {
+        'name': data['name'],
+        'description': data.get('description', ''),
+        'category': data.get('category', ''),
+        'image_url': data.get('image_url', ''),
+        'environment_url': data.get('environment_url', ''),
+        'lighting_preset': data.get('lighting_preset', 'Natural')
+    }
+
+
+def _upsert(model, fields, key_columns, key_of, rows, commit=True):
+    """Insert or update rows by natural key in a few set-based statements.
+
+    Existing rows for each chunk are fetched with one query so the result
+    can report created/updated/unchanged, and unchanged rows are not
+    written at all. The ON CONFLICT clause only rewrites rows whose values
+    differ, which also covers rows changed concurrently since the read.
+    With ``commit=False`` the writes stay in the caller's transaction.
+    """
+    # Last occurrence wins when a payload repeats a key
+    rows = list({key_of(row): row for row in rows}.values())
+    created, updated, unchanged = [], [], 0
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+        keys = [key_of(row) for row in chunk]
+        existing = {
+            tuple(row[:len(key_columns)]): row[len(key_columns):]
+            for row in db.session.execute(
+                db.select(*key_columns, *[getattr(model, field) for field in fields])
+                .where(tuple_(*key_columns).in_(keys))
+            )
+        }
+
+        writes = []
+        for key, row in zip(keys, chunk):
+            current = existing.get(key)
+            if current is None:
+                created.append(row['name'])
+                writes.append(row)
+            elif tuple(current) != tuple(row[field] for field in fields):
+                updated.append(row['name'])
+                writes.append(row)
+            else:
+                unchanged += 1
+
+        if writes:
+            stmt = insert(model).values(writes)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=key_columns,
+                set_={field: stmt.excluded[field] for field in fields},
+                where=or_(*[getattr(model, field).is_distinct_from(stmt.excluded[field]) for field in fields])
+            )
+            db.session.execute(stmt)
+
+    if commit:
+        db.session.commit()
+    return {'created': created, 'updated': updated, 'unchanged': unchanged}
+
+
+def upsert_avatars(rows, commit=True):
+    """Upsert normalized avatars keyed by (owner, name); presets have no owner"""
+    return _upsert(
+        Avatar, AVATAR_FIELDS,
+        [func.coalesce(Avatar.user_id, literal_column('0')), Avatar.name],
+        lambda row: (row['user_id'] or 0, row['name']),
+        rows, commit
+    )
+
+
+def upsert_scenes(rows, commit=True):
+    """Upsert normalized scenes keyed by name"""
+    return _upsert(Scene, SCENE_FIELDS, [Scene.name], lambda row: (row['name'],), rows, commit)
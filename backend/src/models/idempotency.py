@@ -0,0 +1,24 @@
+from datetime import datetime
+from src.models.user import db
+
+class IdempotencyKey(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), unique=True, nullable=False)  # scoped as "<user_id>:<header value>"
+    request_hash = db.Column(db.String(64), nullable=False)  # fingerprint of the normalized request body
+    status_code = db.Column(db.Integer)  # null while the original request is still running
+    response_body = db.Column(db.Text)  # JSON response replayed to retries
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'key': self.key,
+            'request_hash': self.request_hash,
+            'status_code': self.status_code,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
@@ -0,0 +1,91 @@
+from sqlalchemy import bindparam, func, select, text, update
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.product import Avatar, Scene
+from src.models.stats import rebuild_usage_stats
+
+# Unique natural keys added after release. Databases created before them may
+# hold duplicates, which are merged into the oldest row before the index is built.
+MERGE_DUPLICATES_FOR = {
+    'ux_avatar_owner_name': Avatar,
+    'ux_scene_name': Scene,
+}
+
+
+class SchemaMigrationError(RuntimeError):
+    pass
+
+
+def _referencing_columns(model):
+    """Foreign key columns, across all tables, that point at ``model``'s id"""
+    return [
+        fk.parent
+        for source_table in db.metadata.sorted_tables
+        for fk in source_table.foreign_keys
+        if fk.column is model.__table__.c.id
+    ]
+
+
+def merge_duplicates(conn, model, index):
+    """Point references at the oldest row of each duplicate key and delete the rest, returning the count removed"""
+    keep_id = func.min(model.id).over(partition_by=list(index.expressions))
+    ranked = select(model.id.label('id'), keep_id.label('keep_id')).subquery()
+    duplicates = conn.execute(select(ranked.c.id, ranked.c.keep_id).where(ranked.c.id != ranked.c.keep_id)).all()
+    if not duplicates:
+        return 0
+
+    for column in _referencing_columns(model):
+        conn.execute(
+            update(column.table).where(column == bindparam('duplicate_id')).values({column.name: bindparam('keep_id')}),
+            [{'duplicate_id': duplicate_id, 'keep_id': keep} for duplicate_id, keep in duplicates]
+        )
+    conn.execute(
+        model.__table__.delete().where(model.id == bindparam('duplicate_id')),
+        [{'duplicate_id': duplicate_id} for duplicate_id, _ in duplicates]
+    )
+    return len(duplicates)
+
+
+def create_missing_indexes(conn):
+    """Create indexes declared on the models but missing from the database, returning rows merged.
+
+    create_all() only creates missing tables, so indexes added later
+    (attribute filters, foreign keys, natural keys) have to be added to
+    databases created before them.
+    """
+    existing_indexes = {
+        row.name for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))
+    }
+    merged = 0
+    for source_table in db.metadata.sorted_tables:
+        for index in source_table.indexes:
+            if index.name in existing_indexes:
+                continue
+            if index.unique and index.name in MERGE_DUPLICATES_FOR:
+                removed = merge_duplicates(conn, MERGE_DUPLICATES_FOR[index.name], index)
+                if removed:
+                    print(f'Merged {removed} duplicate {source_table.name} rows before creating {index.name}')
+                merged += removed
+            try:
+                index.create(conn)
+            except IntegrityError as e:
+                raise SchemaMigrationError(f'Could not create unique index {index.name}: {e.orig}') from e
+    return merged
+
+
+def migrate_schema():
+    """Bring an existing database up to the current models; raises SchemaMigrationError if it cannot.
+
+    Runs after create_all() and before anything that relies on the
+    natural-key indexes, such as catalog upserts.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        print('Schema migrations only support SQLite, skipping')
+        return
+
+    with db.engine.begin() as conn:
+        merged = create_missing_indexes(conn)
+
+    if merged:
+        # Counters keyed by a merged avatar or scene id are now stale
+        print(f'Recounted {rebuild_usage_stats()} usage counters after merging duplicates')
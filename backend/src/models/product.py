@@ -6,13 +6,13 @@ class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    fabric_type = db.Column(db.String(50), nullable=False)  # Cotton, Denim, Silk, etc.
-    fit = db.Column(db.String(20), nullable=False)  # Slim, Regular, Oversized
-    size = db.Column(db.String(10), nullable=False)  # S, M, L, XL
-    image_url = db.Column(db.String(255))  # URL to uploaded product image
+    fabric_type = db.Column(db.String(50), nullable=False, index=True)  # Cotton, Denim, Silk, etc.
+    fit = db.Column(db.String(20), nullable=False, index=True)  # Slim, Regular, Oversized
+    size = db.Column(db.String(10), nullable=False, index=True)  # S, M, L, XL
+    image_url = db.Column(db.String(255), index=True)  # URL to uploaded product image
     digital_twin_url = db.Column(db.String(255))  # URL to processed 3D model
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
 
     def __repr__(self):
         return f'<Product {self.name}>'
@@ -36,14 +36,19 @@ class Avatar(db.Model):
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     ethnicity = db.Column(db.String(50))
-    body_type = db.Column(db.String(20))  # ectomorph, mesomorph, endomorph
-    age_range = db.Column(db.String(10))  # 18-25, 26-35, etc.
-    gender = db.Column(db.String(10))
+    body_type = db.Column(db.String(20), index=True)  # ectomorph, mesomorph, endomorph
+    age_range = db.Column(db.String(10), index=True)  # 18-25, 26-35, etc.
+    gender = db.Column(db.String(10), index=True)
     image_url = db.Column(db.String(255))  # Preview image
     model_url = db.Column(db.String(255))  # 3D model URL
     is_custom = db.Column(db.Boolean, default=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # null for preset avatars
 
+    # Natural key for catalog upserts: name is unique per owner, presets share owner 0
+    __table_args__ = (
+        db.Index('ux_avatar_owner_name', db.func.coalesce(user_id, 0), name, unique=True),
+    )
+
     def __repr__(self):
         return f'<Avatar {self.name}>'
 
@@ -66,10 +71,14 @@ class Scene(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    category = db.Column(db.String(50))  # Urban, Studio, Nature, etc.
+    category = db.Column(db.String(50), index=True)  # Urban, Studio, Nature, etc.
     image_url = db.Column(db.String(255))  # Preview image
     environment_url = db.Column(db.String(255))  # 3D environment URL
-    lighting_preset = db.Column(db.String(50))  # Golden Hour, Studio, Natural, etc.
+    lighting_preset = db.Column(db.String(50), index=True)  # Golden Hour, Studio, Natural, etc.
+
+    __table_args__ = (
+        db.Index('ux_scene_name', name, unique=True),
+    )
 
     def __repr__(self):
         return f'<Scene {self.name}>'
@@ -87,14 +96,14 @@ class Scene(db.Model):
 
 class GeneratedContent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
-    avatar_id = db.Column(db.Integer, db.ForeignKey('avatar.id'), nullable=False)
-    scene_id = db.Column(db.Integer, db.ForeignKey('scene.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
+    avatar_id = db.Column(db.Integer, db.ForeignKey('avatar.id'), nullable=False, index=True)
+    scene_id = db.Column(db.Integer, db.ForeignKey('scene.id'), nullable=False, index=True)
     content_type = db.Column(db.String(20), nullable=False)  # image, video
     content_url = db.Column(db.String(255), nullable=False)
     pose = db.Column(db.String(50))  # pose name or description
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
 
     # Relationships
     product = db.relationship('Product', backref='generated_content')
@@ -120,3 +129,71 @@ class GeneratedContent(db.Model):
             'scene': self.scene.to_dict() if self.scene else None
         }
 
+
+class ContactSheetTile(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    sheet_id = db.Column(db.Integer, db.ForeignKey('generated_content.id'), nullable=False, index=True)
+    tile_id = db.Column(db.Integer, db.ForeignKey('generated_content.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)  # row-major index in the grid
+    pose = db.Column(db.String(50))
+
+    # Relationships
+    sheet = db.relationship('GeneratedContent', foreign_keys=[sheet_id], backref='tiles')
+    tile = db.relationship('GeneratedContent', foreign_keys=[tile_id])
+
+    def __repr__(self):
+        return f'<ContactSheetTile {self.sheet_id}:{self.position}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'sheet_id': self.sheet_id,
+            'tile_id': self.tile_id,
+            'position': self.position,
+            'pose': self.pose,
+            'content_url': self.tile.content_url if self.tile else None
+        }
+
+class ImageHash(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    image_url = db.Column(db.String(255), unique=True, nullable=False)
+    hash = db.Column(db.BigInteger, nullable=False)  # 64-bit dHash stored as signed integer
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ImageHash {self.image_url}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'image_url': self.image_url,
+            'hash': f'{self.hash & 0xFFFFFFFFFFFFFFFF:016x}',
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class GarmentAnalysis(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), index=True)  # None for images analysed on their own
+    image_url = db.Column(db.String(255), nullable=False, index=True)
+    fabric_type = db.Column(db.String(50))
+    fit = db.Column(db.String(20))
+    analysis = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    product = db.relationship('Product', backref='analyses')
+
+    def __repr__(self):
+        return f'<GarmentAnalysis {self.image_url}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'product_id': self.product_id,
+            'image_url': self.image_url,
+            'fabric_type': self.fabric_type,
+            'fit': self.fit,
+            'analysis': self.analysis,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,113 @@
+import re
+from sqlalchemy import column, func, select, table, text
+from src.models.user import db
+from src.models.product import Product, Avatar, Scene
+
+# Searchable catalogs: model, full-text columns and the attribute filters
+# that can be combined with a query. Each filter column carries an index.
+SEARCH_CATALOGS = {
+    'products': (Product, ('name', 'description'), ('fabric_type', 'fit', 'size')),
+    'avatars': (Avatar, ('name', 'description'), ('gender', 'body_type', 'age_range')),
+    'scenes': (Scene, ('name', 'description'), ('category', 'lighting_preset')),
+}
+
+MAX_PER_PAGE = 100
+
+
+def _fts_table_name(model):
+    return f'{model.__tablename__}_fts'
+
+
+def init_search_index():
+    """Create FTS5 indexes and sync triggers for every searchable catalog.
+
+    The FTS tables use external content, so they only store the inverted
+    index; triggers keep them in step with inserts, updates and deletes.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        print('Full-text search requires SQLite FTS5, skipping search index setup')
+        return
+
+    with db.engine.begin() as conn:
+        for model, text_columns, _ in SEARCH_CATALOGS.values():
+            source = model.__tablename__
+            fts = _fts_table_name(model)
+            cols = ', '.join(text_columns)
+            new_values = ', '.join(f'new.{c}' for c in text_columns)
+            old_values = ', '.join(f'old.{c}' for c in text_columns)
+
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': fts}
+            ).first()
+
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{cols}, content='{source}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+            ))
+
+            # Index rows that were inserted before the FTS table existed
+            if not exists:
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def build_match_query(query):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    terms = re.findall(r'\w+', query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_catalog(kind, query='', filters=None, page=1, per_page=20):
+    """Search one catalog, returning a page of models, the total match count and the page and per_page used.
+
+    ``page`` and ``per_page`` are clamped to valid values, so the ones
+    returned may differ from the ones asked for.
+    """
+    model, _, filter_columns = SEARCH_CATALOGS[kind]
+    page = max(1, page)
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+
+    results = model.query
+    filtered = False
+    for name, value in (filters or {}).items():
+        if name in filter_columns and value:
+            results = results.filter(getattr(model, name) == value)
+            filtered = True
+
+    match = build_match_query(query or '')
+    if not match:
+        total = results.count()
+        items = results.order_by(model.id).limit(per_page).offset((page - 1) * per_page).all()
+        return items, total, page, per_page
+
+    fts = _fts_table_name(model)
+    fts_table = table(fts, column('rowid'), column('rank'))
+    matches = text(f'{fts} MATCH :match')
+
+    if filtered:
+        # Counting through a join lets SQLite drive from an attribute index and
+        # re-run the MATCH per row; an IN subquery evaluates the MATCH once.
+        matching_ids = select(fts_table.c.rowid).where(matches)
+        total = results.filter(model.id.in_(matching_ids)).params(match=match).count()
+    else:
+        total = db.session.execute(
+            select(func.count()).select_from(fts_table).where(matches), {'match': match}
+        ).scalar()
+
+    items = results.join(fts_table, fts_table.c.rowid == model.id).filter(matches).params(
+        match=match
+    ).order_by(fts_table.c.rank).limit(per_page).offset((page - 1) * per_page).all()
+    return items, total, page, per_page
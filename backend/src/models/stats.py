@@ -0,0 +1,156 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import String, cast, delete, func, literal, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from src.models.user import db
+from src.models.product import GeneratedContent
+from src.models.catalog import UPSERT_CHUNK_SIZE
+
+# user_id used for rows that count across all users
+ALL_USERS = 0
+
+# Every generated content row is counted once per dimension, for its owner
+# and for ALL_USERS; 'total' has a single empty key
+STAT_DIMENSIONS = ('total', 'content_type', 'product', 'scene', 'avatar', 'pose', 'day')
+
+
+class UsageStat(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)  # ALL_USERS for totals across users
+    dimension = db.Column(db.String(20), nullable=False)  # one of STAT_DIMENSIONS
+    key = db.Column(db.String(50), nullable=False)  # product/scene/avatar id, pose, YYYY-MM-DD, ...
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ux_usage_stat_key', user_id, dimension, key, unique=True),
+        db.Index('ix_usage_stat_top', user_id, dimension, count),
+    )
+
+    def __repr__(self):
+        return f'<UsageStat {self.user_id}:{self.dimension}:{self.key}={self.count}>'
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'dimension': self.dimension,
+            'key': self.key,
+            'count': self.count
+        }
+
+
+def _stat_keys(row):
+    """(dimension, key) pairs a generated content row is counted under"""
+    created_at = row.created_at or datetime.utcnow()
+    return (
+        ('total', ''),
+        ('content_type', row.content_type),
+        ('product', str(row.product_id)),
+        ('scene', str(row.scene_id)),
+        ('avatar', str(row.avatar_id)),
+        ('pose', row.pose or ''),
+        ('day', created_at.date().isoformat()),
+    )
+
+
+def record_usage(rows, sign=1):
+    """Add (or with ``sign=-1`` remove) generated content rows to the counters.
+
+    Runs in the caller's transaction, so the counters commit or roll back
+    together with the content rows. ``rows`` need user_id, product_id,
+    scene_id, avatar_id, pose, content_type and created_at attributes.
+    """
+    deltas = Counter()
+    for row in rows:
+        for dimension, key in _stat_keys(row):
+            deltas[(row.user_id, dimension, key)] += sign
+            deltas[(ALL_USERS, dimension, key)] += sign
+    if not deltas:
+        return
+
+    values = [
+        {'user_id': user_id, 'dimension': dimension, 'key': key, 'count': count}
+        for (user_id, dimension, key), count in deltas.items()
+    ]
+    key_columns = [UsageStat.user_id, UsageStat.dimension, UsageStat.key]
+    for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+        chunk = values[start:start + UPSERT_CHUNK_SIZE]
+        stmt = insert(UsageStat).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={'count': UsageStat.count + stmt.excluded.count}
+        )
+        db.session.execute(stmt)
+        if sign < 0:
+            # Drop counters that reached zero, e.g. for a deleted product
+            db.session.execute(delete(UsageStat).where(
+                tuple_(*key_columns).in_([(row['user_id'], row['dimension'], row['key']) for row in chunk]),
+                UsageStat.count <= 0
+            ))
+
+
+def _dimension_columns():
+    return {
+        'total': literal(''),
+        'content_type': GeneratedContent.content_type,
+        'product': cast(GeneratedContent.product_id, String),
+        'scene': cast(GeneratedContent.scene_id, String),
+        'avatar': cast(GeneratedContent.avatar_id, String),
+        'pose': func.coalesce(GeneratedContent.pose, ''),
+        'day': func.date(GeneratedContent.created_at),
+    }
+
+
+def _recount_queries():
+    """GROUP BY queries yielding (user_id, dimension, key, count) for every counter"""
+    for dimension, column in _dimension_columns().items():
+        yield select(GeneratedContent.user_id, literal(dimension), column, func.count()).group_by(
+            GeneratedContent.user_id, column
+        )
+        # 'total' selects no content column, so name the table explicitly
+        yield select(literal(ALL_USERS), literal(dimension), column, func.count()).select_from(
+            GeneratedContent
+        ).group_by(column)
+
+
+def compute_usage_stats():
+    """Recount every counter from GeneratedContent as {(user_id, dimension, key): count}"""
+    counts = {}
+    for query in _recount_queries():
+        for user_id, dimension, key, count in db.session.execute(query):
+            counts[(user_id, dimension, key)] = count
+    return counts
+
+
+def rebuild_usage_stats():
+    """Replace the counters with a full recount, returning the number of rows written"""
+    db.session.execute(delete(UsageStat))
+    for query in _recount_queries():
+        db.session.execute(insert(UsageStat).from_select(['user_id', 'dimension', 'key', 'count'], query))
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(UsageStat))
+
+
+def init_usage_stats():
+    """Count existing content once when the stats table is new to this database"""
+    if db.session.query(UsageStat.id).first() is None and db.session.query(GeneratedContent.id).first() is not None:
+        print(f'Counted {rebuild_usage_stats()} usage counters from existing content')
+
+
+def usage_stats(user_id=ALL_USERS, dimensions=STAT_DIMENSIONS, limit=50):
+    """Read counters for one user (or all users): the top ``limit`` keys per dimension.
+
+    Days are returned newest first rather than by count.
+    """
+    stats = {}
+    for dimension in dimensions:
+        query = UsageStat.query.filter_by(user_id=user_id, dimension=dimension)
+        if dimension == 'day':
+            query = query.order_by(UsageStat.key.desc())
+        else:
+            query = query.order_by(UsageStat.count.desc(), UsageStat.key)
+        rows = query.limit(limit).all()
+        if dimension == 'total':
+            stats['total'] = rows[0].count if rows else 0
+        else:
+            stats[dimension] = {row.key: row.count for row in rows}
+    return stats
@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
+from sqlalchemy.exc import IntegrityError
 from src.models.product import Avatar, db
+from src.models.catalog import PRESET_AVATARS, normalize_avatar, upsert_avatars
 
 avatar_bp = Blueprint('avatar', __name__)
 
@@ -33,7 +35,12 @@ def create_avatar():
         
         return jsonify(avatar.to_dict()), 201
         
+    except IntegrityError:
+        # Names are a natural key (ux_avatar_owner_name)
+        db.session.rollback()
+        return jsonify({'error': f"An avatar named '{data['name']}' already exists for this user"}), 409
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
 @avatar_bp.route('/avatars/<int:avatar_id>', methods=['GET'])
@@ -46,69 +53,33 @@ def get_avatar(avatar_id):
 def create_preset_avatars():
     """Create preset avatars for the MVP"""
     try:
-        preset_avatars = [
-            {
-                'name': 'Alex - Urban Style',
-                'description': 'Young professional, urban aesthetic',
-                'ethnicity': 'Mixed',
-                'body_type': 'mesomorph',
-                'age_range': '25-30',
-                'gender': 'male',
-                'image_url': '/avatars/alex.jpg',
-                'model_url': '/models/alex.obj',
-                'is_custom': False
-            },
-            {
-                'name': 'Maya - Fashion Forward',
-                'description': 'Fashion-forward model with elegant style',
-                'ethnicity': 'Asian',
-                'body_type': 'ectomorph',
-                'age_range': '22-28',
-                'gender': 'female',
-                'image_url': '/avatars/maya.jpg',
-                'model_url': '/models/maya.obj',
-                'is_custom': False
-            },
-            {
-                'name': 'Jordan - Athletic',
-                'description': 'Athletic build, sporty aesthetic',
-                'ethnicity': 'African American',
-                'body_type': 'mesomorph',
-                'age_range': '20-25',
-                'gender': 'male',
-                'image_url': '/avatars/jordan.jpg',
-                'model_url': '/models/jordan.obj',
-                'is_custom': False
-            },
-            {
-                'name': 'Sofia - Classic',
-                'description': 'Classic beauty with timeless appeal',
-                'ethnicity': 'Latina',
-                'body_type': 'mesomorph',
-                'age_range': '26-32',
-                'gender': 'female',
-                'image_url': '/avatars/sofia.jpg',
-                'model_url': '/models/sofia.obj',
-                'is_custom': False
-            }
-        ]
-        
-        created_avatars = []
-        for avatar_data in preset_avatars:
-            # Check if avatar already exists
-            existing = Avatar.query.filter_by(name=avatar_data['name']).first()
-            if not existing:
-                avatar = Avatar(**avatar_data)
-                db.session.add(avatar)
-                created_avatars.append(avatar_data['name'])
-        
-        db.session.commit()
+        result = upsert_avatars([normalize_avatar(avatar) for avatar in PRESET_AVATARS])
         
         return jsonify({
-            'message': f'Created {len(created_avatars)} preset avatars',
-            'avatars': created_avatars
+            'message': f"Created {len(result['created'])} preset avatars",
+            'avatars': result['created']
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@avatar_bp.route('/avatars/bulk', methods=['PUT'])
+def bulk_upsert_avatars():
+    """Create or update many custom avatars, matched by owner and name"""
+    try:
+        data = request.get_json()
+        user_id = data.get('user_id', 1)
+        
+        rows = [normalize_avatar({**avatar, 'is_custom': True}, user_id) for avatar in data['avatars']]
+        result = upsert_avatars(rows)
+        
+        return jsonify({
+            'created': len(result['created']),
+            'updated': len(result['updated']),
+            'unchanged': result['unchanged']
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,24 @@
+from flask import Blueprint, jsonify, request, send_from_directory
+from src.utils.profiling import PROFILE_DIR, PROFILE_NAME, PROFILE_TOKEN, is_authorized, list_profiles
+
+debug_bp = Blueprint('debug', __name__)
+
+@debug_bp.before_request
+def require_profile_token():
+    if not PROFILE_TOKEN:
+        return jsonify({'error': 'Profiling is not configured; set PROFILE_TOKEN'}), 404
+    if not is_authorized(request):
+        return jsonify({'error': 'Missing or invalid X-Profile-Token'}), 403
+
+@debug_bp.route('/debug/profiles', methods=['GET'])
+def get_profiles():
+    """List captured request profiles, newest first"""
+    return jsonify(list_profiles())
+
+@debug_bp.route('/debug/profiles/<path:filename>', methods=['GET'])
+def download_profile(filename):
+    """Download a pstats dump or its collapsed stacks"""
+    stem = filename[:-len('.collapsed')] + '.prof' if filename.endswith('.collapsed') else filename
+    if not PROFILE_NAME.match(stem):
+        return jsonify({'error': 'Unknown profile'}), 404
+    return send_from_directory(PROFILE_DIR, filename, as_attachment=True)
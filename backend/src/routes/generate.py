@@ -1,18 +1,83 @@
-from flask import Blueprint, jsonify, request
-from src.models.product import GeneratedContent, Product, Avatar, Scene, db
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from src.models.product import GeneratedContent, ContactSheetTile, GarmentAnalysis, Product, Avatar, Scene, db
+import hashlib
+import json
+import math
 import os
 import uuid
+from datetime import datetime, timedelta
+from concurrent.futures import as_completed
 import google.generativeai as genai
 from PIL import Image
-import requests
-from io import BytesIO
 import base64
+import csv
+import io
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from src.models.idempotency import IdempotencyKey
+from src.models.stats import record_usage
+from src.routes.product import fetch_and_inspect, inspect_image, store_product_image
+from src.utils.analysis import get_garment_analyzer
+from src.utils.encoding import completed, encode_image, encode_image_async, resolve_output_format, submit_encode
+from src.utils.images import load_analysis_image, load_image
+from src.utils.ingest import remote_image_fetcher
+from src.utils.reaper import static_path
+from src.utils.scheduler import FairScheduler
+from src.utils.singleflight import SingleFlight
+from src.utils.streaming import stream_json_array
+from src.utils.tracing import span, stage_histograms
+from src.utils.video import render_video, video_options
+from src.utils.zipstream import ZipStream
 
 generate_bp = Blueprint('generate', __name__)
 
 # Configure Gemini API
 genai.configure(api_key=os.getenv('GEMINI_API_KEY', 'your-gemini-api-key-here'))
 
+# How long a completed Idempotency-Key response is replayed to retries
+IDEMPOTENCY_TTL = timedelta(seconds=int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 24 * 60 * 60)))
+# An unfinished claim older than this is assumed abandoned (its worker died) and may be taken over
+IDEMPOTENCY_LEASE = timedelta(seconds=int(os.getenv('IDEMPOTENCY_LEASE_SECONDS', 10 * 60)))
+
+# All rendering goes through one fair scheduler so a tenant's batch work
+# cannot starve other tenants' interactive renders
+generation_scheduler = FairScheduler(
+    workers=int(os.getenv('GENERATION_WORKERS', 4)),
+    tenant_concurrency=int(os.getenv('GENERATION_TENANT_CONCURRENCY', 2)),
+    reserved_interactive=int(os.getenv('GENERATION_RESERVED_INTERACTIVE', 1)),
+    weights={int(user_id): float(weight) for user_id, weight in json.loads(os.getenv('GENERATION_TENANT_WEIGHTS', '{}')).items()}
+)
+
+# Generation requests currently rendering, keyed by idempotency key or request fingerprint
+generation_flights = SingleFlight()
+
+# Largest contact sheet grid a request may ask for
+CONTACT_SHEET_MAX_COLUMNS = int(os.getenv('CONTACT_SHEET_MAX_COLUMNS', 8))
+CONTACT_SHEET_MAX_TILE_WIDTH = int(os.getenv('CONTACT_SHEET_MAX_TILE_WIDTH', 1024))
+
+# Most images one batch analysis request may cover
+ANALYSIS_MAX_ITEMS = int(os.getenv('ANALYSIS_MAX_ITEMS', 1000))
+
+# Query parameters that select generated content for an export, compared for equality
+EXPORT_FILTERS = ('user_id', 'product_id', 'avatar_id', 'scene_id', 'content_type', 'pose')
+EXPORT_MANIFEST_COLUMNS = [
+    'file', 'content_id', 'content_type', 'pose', 'created_at',
+    'product_id', 'product_name', 'fabric_type', 'fit', 'size',
+    'avatar_id', 'avatar_name', 'scene_id', 'scene_name', 'content_url'
+]
+
+AVAILABLE_POSES = [
+    {'name': 'standing', 'description': 'Natural standing pose'},
+    {'name': 'walking', 'description': 'Dynamic walking pose'},
+    {'name': 'sitting', 'description': 'Casual sitting pose'},
+    {'name': 'leaning', 'description': 'Leaning against surface'},
+    {'name': 'hands_on_hips', 'description': 'Confident hands on hips'},
+    {'name': 'crossed_arms', 'description': 'Arms crossed pose'},
+    {'name': 'looking_away', 'description': 'Looking away from camera'},
+    {'name': 'profile', 'description': 'Side profile view'}
+]
+
 def create_placeholder_image(output_path, prompt):
     """Create a placeholder image when AI generation fails"""
     try:
@@ -76,78 +141,152 @@ def create_placeholder_image(output_path, prompt):
         except:
             return False
 
-def create_enhanced_placeholder(output_path, prompt, product, avatar, scene):
-    """Create an enhanced placeholder that looks more like a real fashion photo"""
+def draw_enhanced_placeholder(product, avatar, scene, silhouette_width=1.0):
+    """Draw an enhanced placeholder that looks more like a real fashion photo"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    # Create a 512x768 image (portrait)
+    img = Image.new('RGB', (512, 768), color=(250, 250, 250))
+    draw = ImageDraw.Draw(img)
+    
+    # Try to use fonts
     try:
-        from PIL import Image, ImageDraw, ImageFont
-        import textwrap
-        
-        # Create a 512x768 image (portrait)
-        img = Image.new('RGB', (512, 768), color=(250, 250, 250))
-        draw = ImageDraw.Draw(img)
-        
-        # Try to use fonts
-        try:
-            title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-            subtitle_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
-            text_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 12)
-        except:
-            title_font = ImageFont.load_default()
-            subtitle_font = ImageFont.load_default()
-            text_font = ImageFont.load_default()
-        
-        # Create a fashion photo-like background
-        # Add a subtle gradient
-        for y in range(768):
-            if y < 200:  # Top area - lighter
-                color_val = int(250 - (y / 200) * 30)
-                draw.line([(0, y), (512, y)], fill=(color_val, color_val, color_val + 5))
-            elif y > 500:  # Bottom area - darker
-                color_val = int(220 - ((y - 500) / 268) * 40)
-                draw.line([(0, y), (512, y)], fill=(color_val, color_val, color_val))
-            else:  # Middle area - consistent
-                draw.line([(0, y), (512, y)], fill=(220, 220, 225))
-        
-        # Add a model silhouette area
-        draw.ellipse([(150, 200), (362, 550)], fill=(200, 200, 210), outline=(180, 180, 190), width=2)
-        
-        # Add product info
-        draw.text((50, 50), f"StyleScape Fashion", fill=(34, 197, 94), font=title_font)
-        draw.text((50, 80), f"AI Generated Content", fill=(100, 100, 100), font=subtitle_font)
-        
-        # Product details
-        y_pos = 120
-        draw.text((50, y_pos), f"Product: {product.get('name', 'Fashion Item')}", fill=(60, 60, 60), font=text_font)
-        draw.text((50, y_pos + 20), f"Fabric: {product.get('fabric_type', 'Premium')}", fill=(80, 80, 80), font=text_font)
-        draw.text((50, y_pos + 40), f"Fit: {product.get('fit', 'Regular')}", fill=(80, 80, 80), font=text_font)
-        
-        # Avatar details
-        y_pos = 580
-        draw.text((50, y_pos), f"Model: {avatar.get('name', 'Professional Model')}", fill=(60, 60, 60), font=text_font)
-        draw.text((50, y_pos + 20), f"Scene: {scene.get('name', 'Studio Setting')}", fill=(80, 80, 80), font=text_font)
-        
-        # Add "PREVIEW" watermark
-        draw.text((200, 350), "PREVIEW", fill=(150, 150, 150), font=title_font)
-        draw.text((180, 380), "AI Generated Image", fill=(120, 120, 120), font=subtitle_font)
-        
-        # Add border
-        draw.rectangle([(10, 10), (502, 758)], outline=(34, 197, 94), width=3)
-        
-        img.save(output_path)
-        return True
+        title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
+        subtitle_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
+        text_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 12)
+    except:
+        title_font = ImageFont.load_default()
+        subtitle_font = ImageFont.load_default()
+        text_font = ImageFont.load_default()
+    
+    # Create a fashion photo-like background
+    # Add a subtle gradient
+    for y in range(768):
+        if y < 200:  # Top area - lighter
+            color_val = int(250 - (y / 200) * 30)
+            draw.line([(0, y), (512, y)], fill=(color_val, color_val, color_val + 5))
+        elif y > 500:  # Bottom area - darker
+            color_val = int(220 - ((y - 500) / 268) * 40)
+            draw.line([(0, y), (512, y)], fill=(color_val, color_val, color_val))
+        else:  # Middle area - consistent
+            draw.line([(0, y), (512, y)], fill=(220, 220, 225))
+    
+    # Add a model silhouette area, narrowed as the model turns side-on
+    half_width = int(106 * silhouette_width)
+    draw.ellipse([(256 - half_width, 200), (256 + half_width, 550)], fill=(200, 200, 210), outline=(180, 180, 190), width=2)
+    
+    # Add product info
+    draw.text((50, 50), f"StyleScape Fashion", fill=(34, 197, 94), font=title_font)
+    draw.text((50, 80), f"AI Generated Content", fill=(100, 100, 100), font=subtitle_font)
+    
+    # Product details
+    y_pos = 120
+    draw.text((50, y_pos), f"Product: {product.get('name', 'Fashion Item')}", fill=(60, 60, 60), font=text_font)
+    draw.text((50, y_pos + 20), f"Fabric: {product.get('fabric_type', 'Premium')}", fill=(80, 80, 80), font=text_font)
+    draw.text((50, y_pos + 40), f"Fit: {product.get('fit', 'Regular')}", fill=(80, 80, 80), font=text_font)
+    
+    # Avatar details
+    y_pos = 580
+    draw.text((50, y_pos), f"Model: {avatar.get('name', 'Professional Model')}", fill=(60, 60, 60), font=text_font)
+    draw.text((50, y_pos + 20), f"Scene: {scene.get('name', 'Studio Setting')}", fill=(80, 80, 80), font=text_font)
+    
+    # Add "PREVIEW" watermark
+    draw.text((200, 350), "PREVIEW", fill=(150, 150, 150), font=title_font)
+    draw.text((180, 380), "AI Generated Image", fill=(120, 120, 120), font=subtitle_font)
+    
+    # Add border
+    draw.rectangle([(10, 10), (502, 758)], outline=(34, 197, 94), width=3)
+    
+    return img
+
+def create_enhanced_placeholder(output_base, prompt, product, avatar, scene, output):
+    """Create an enhanced placeholder that looks more like a real fashion photo.
+
+    Returns a Future for the written path; encoding runs on the encode pool.
+    """
+    try:
+        with span('render.draw'):
+            img = draw_enhanced_placeholder(product, avatar, scene)
+        return encode_image_async(img, output_base, output)
         
     except Exception as e:
         print(f"Failed to create enhanced placeholder: {e}")
         # Fallback to basic placeholder
-        return create_placeholder_image(output_path, prompt)
+        create_placeholder_image(f'{output_base}.png', prompt)
+        return completed(f'{output_base}.png')
+
+def transcode_image(source_path, output_base, output):
+    """Re-encode a generated PNG in the requested output format, replacing it"""
+    path = encode_image(load_image(source_path), output_base, output)
+    if path != source_path:
+        os.remove(source_path)
+    return path
+
+def generate_still_image(output_base, prompt, product, avatar, scene, output):
+    """Render a single fashion image, falling back to a placeholder.
+
+    Runs on a scheduler worker and returns a Future for the encoded file's
+    path, so the worker is free for the next render while encoding finishes.
+    """
+    try:
+        # Use the media generation tools to create a real fashion image
+        from media_generate_image import media_generate_image
+        
+        # Generate the fashion image
+        output_path = f'{output_base}.png'
+        result = media_generate_image(
+            brief="Generating fashion content for StyleScape",
+            images=[{
+                "path": output_path,
+                "prompt": prompt,
+                "aspect_ratio": "portrait"
+            }]
+        )
+        print(f"Generated AI image at: {output_path}")
+        if output['format'] == 'png':
+            return completed(output_path)
+        return submit_encode(transcode_image, output_path, output_base, output)
+            
+    except ImportError:
+        print("Media generation tools not available, creating enhanced placeholder")
+        # Create an enhanced placeholder that looks more like a real fashion photo
+        return create_enhanced_placeholder(output_base, prompt, product, avatar, scene, output)
+    except Exception as e:
+        print(f"Image generation error: {e}")
+        # Create a placeholder image if generation fails
+        return create_enhanced_placeholder(output_base, prompt, product, avatar, scene, output)
+
+def render_turnaround_frame(product, avatar, scene, pose, frame_index, frame_count):
+    """Render one frame of a turnaround video (runs in the render process pool)"""
+    from PIL import ImageDraw
+
+    # Sweep a full rotation across the clip; the silhouette narrows side-on
+    angle = 2 * math.pi * frame_index / frame_count
+    with span('render.draw'):
+        img = draw_enhanced_placeholder(product, avatar, scene, silhouette_width=0.55 + 0.45 * abs(math.cos(angle)))
+
+    draw = ImageDraw.Draw(img)
+    draw.text((50, 640), f"Pose: {pose}", fill=(60, 60, 60))
+    draw.text((50, 660), f"Frame {frame_index + 1}/{frame_count}", fill=(120, 120, 120))
+    return img
+
+def generate_turnaround_video(output_base, product, avatar, scene, video_format='webp', fps=8, frames_per_pose=2):
+    """Render a turnaround across all available poses and encode it as a video"""
+    poses = [pose['name'] for pose in AVAILABLE_POSES]
+    frame_count = len(poses) * frames_per_pose
+    frame_args = (
+        (product, avatar, scene, poses[i // frames_per_pose], i, frame_count)
+        for i in range(frame_count)
+    )
+    return render_video(render_turnaround_frame, frame_args, output_base, video_format=video_format, fps=fps)
 
 def analyze_garment_with_gemini(image_path, fabric_type, fit):
     """Use Gemini to analyze garment properties"""
     try:
         model = genai.GenerativeModel('gemini-1.5-flash')
         
-        # Load image
-        img = Image.open(image_path)
+        # Load a cached, downscaled copy rather than the full-resolution upload
+        img = load_analysis_image(image_path)
         
         prompt = f"""
         Analyze this {fabric_type} garment with {fit} fit. Provide a detailed description of:
@@ -190,63 +329,69 @@ def generate_fashion_content_prompt(product, avatar, scene, pose="standing"):
     
     return prompt
 
-@generate_bp.route('/generate/content', methods=['POST'])
-def generate_content():
-    """Generate fashion content using AI"""
+def create_generated_content(data):
+    """Render content for a generation request and record it, returning (payload, status)"""
     try:
-        data = request.get_json()
-        
         product_id = data['product_id']
         avatar_id = data['avatar_id']
         scene_id = data['scene_id']
         content_type = data.get('content_type', 'image')
         pose = data.get('pose', 'standing')
+        user_id = data.get('user_id', 1)
         
         # Get related objects
-        product = Product.query.get_or_404(product_id)
-        avatar = Avatar.query.get_or_404(avatar_id)
-        scene = Scene.query.get_or_404(scene_id)
+        with span('db.lookup'):
+            product = Product.query.get_or_404(product_id)
+            avatar = Avatar.query.get_or_404(avatar_id)
+            scene = Scene.query.get_or_404(scene_id)
+        
+        # Serialize once; the prompt and the renderers share these dicts
+        with span('serialize'):
+            product_data = product.to_dict()
+            avatar_data = avatar.to_dict()
+            scene_data = scene.to_dict()
         
         # Generate content using Gemini and image generation
-        prompt = generate_fashion_content_prompt(
-            product.to_dict(), 
-            avatar.to_dict(), 
-            scene.to_dict(), 
-            pose
-        )
+        with span('prompt'):
+            prompt = generate_fashion_content_prompt(product_data, avatar_data, scene_data, pose)
         
         # Create output directory
-        output_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'generated')
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Generate unique filename
-        filename = f"{uuid.uuid4()}.png"
-        output_path = os.path.join(output_dir, filename)
-        
-        # Generate actual image using AI
-        try:
-            # Use the media generation tools to create a real fashion image
-            from media_generate_image import media_generate_image
-            
-            # Generate the fashion image
-            result = media_generate_image(
-                brief="Generating fashion content for StyleScape",
-                images=[{
-                    "path": output_path,
-                    "prompt": prompt,
-                    "aspect_ratio": "portrait"
-                }]
-            )
-            print(f"Generated AI image at: {output_path}")
-                
-        except ImportError:
-            print("Media generation tools not available, creating enhanced placeholder")
-            # Create an enhanced placeholder that looks more like a real fashion photo
-            create_enhanced_placeholder(output_path, prompt, product.to_dict(), avatar.to_dict(), scene.to_dict())
-        except Exception as e:
-            print(f"Image generation error: {e}")
-            # Create a placeholder image if generation fails
-            create_enhanced_placeholder(output_path, prompt, product.to_dict(), avatar.to_dict(), scene.to_dict())
+        with span('fs.mkdir'):
+            output_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'generated')
+            os.makedirs(output_dir, exist_ok=True)
+        
+        video_stats = None
+        if content_type == 'video':
+            # Render a turnaround clip across all poses instead of a single still
+            fps, frames_per_pose = video_options(data.get('fps', 8), data.get('frames_per_pose', 2))
+            with span('render'):
+                output_path, video_stats = generation_scheduler.submit(
+                    user_id,
+                    generate_turnaround_video,
+                    os.path.join(output_dir, str(uuid.uuid4())),
+                    product_data,
+                    avatar_data,
+                    scene_data,
+                    video_format=data.get('video_format', 'webp'),
+                    fps=fps,
+                    frames_per_pose=frames_per_pose,
+                    cost=len(AVAILABLE_POSES) * frames_per_pose
+                ).result()
+            filename = os.path.basename(output_path)
+            pose = 'turnaround'
+            print(f"Generated {video_stats['frames']} frame video at {video_stats['frames_per_second']} frames/s: {output_path}")
+        else:
+            # Generate unique filename; the extension follows the output format
+            output = resolve_output_format(data.get('output'))
+            with span('render'):
+                encoded = generation_scheduler.submit(
+                    user_id,
+                    generate_still_image,
+                    os.path.join(output_dir, str(uuid.uuid4())), prompt, product_data, avatar_data, scene_data, output,
+                    interactive=True
+                ).result()
+            with span('encode.wait'):
+                filename = os.path.basename(encoded.result())
         
         content_url = f'/generated/{filename}'
         
@@ -258,21 +403,242 @@ def generate_content():
             content_type=content_type,
             content_url=content_url,
             pose=pose,
-            user_id=data.get('user_id', 1)
+            user_id=user_id
         )
         
-        db.session.add(generated_content)
-        db.session.commit()
+        with span('db.commit'):
+            db.session.add(generated_content)
+            db.session.flush()
+            record_usage([generated_content])
+            db.session.commit()
         
-        return jsonify({
+        with span('serialize'):
+            content = generated_content.to_dict()
+        
+        return {
             'id': generated_content.id,
             'content_url': content_url,
             'prompt_used': prompt,
             'status': 'generated',
-            'content': generated_content.to_dict()
+            'content': content,
+            'video_stats': video_stats
+        }, 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return {'error': str(e)}, 400
+
+def generation_fingerprint(data):
+    """Hash the inputs that determine a render, so equivalent requests match"""
+    content_type = data.get('content_type', 'image')
+    normalized = {
+        'product_id': int(data['product_id']),
+        'avatar_id': int(data['avatar_id']),
+        'scene_id': int(data['scene_id']),
+        'content_type': content_type,
+        'pose': data.get('pose', 'standing'),
+        'user_id': int(data.get('user_id', 1))
+    }
+    if content_type == 'video':
+        normalized['video_format'] = data.get('video_format', 'webp')
+        normalized['fps'], normalized['frames_per_pose'] = video_options(
+            data.get('fps', 8), data.get('frames_per_pose', 2)
+        )
+    else:
+        normalized['output'] = resolve_output_format(data.get('output'))
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+def claim_idempotency_key(key, fingerprint):
+    """Reserve an idempotency key, or return the (payload, status) to replay for it"""
+    now = datetime.utcnow()
+    IdempotencyKey.query.filter(IdempotencyKey.expires_at <= now).delete()
+    
+    record = IdempotencyKey.query.filter_by(key=key).first()
+    if record is None:
+        db.session.add(IdempotencyKey(key=key, request_hash=fingerprint, expires_at=now + IDEMPOTENCY_TTL))
+        try:
+            db.session.commit()
+            return None
+        except IntegrityError:
+            # Another worker claimed the key first
+            db.session.rollback()
+            record = IdempotencyKey.query.filter_by(key=key).first()
+    
+    if record.request_hash != fingerprint:
+        return {'error': 'Idempotency-Key was already used with different request parameters'}, 422
+    if record.status_code is None:
+        # created_at is the claim time, since a claim is the only way a row is created
+        if record.created_at <= now - IDEMPOTENCY_LEASE:
+            # Only one worker may take over a stale claim: the one whose update still matches it
+            taken = IdempotencyKey.query.filter_by(
+                id=record.id, created_at=record.created_at, status_code=None
+            ).update({'created_at': now})
+            db.session.commit()
+            if taken:
+                return None
+        return {'error': 'A request with this Idempotency-Key is still in progress'}, 409
+    return json.loads(record.response_body), record.status_code
+
+def complete_idempotency_key(key, payload, status):
+    """Store the result for replay, or release the key so a failed request can be retried"""
+    record = IdempotencyKey.query.filter_by(key=key).first()
+    if status >= 400:
+        db.session.delete(record)
+    else:
+        record.status_code = status
+        record.response_body = json.dumps(payload)
+    db.session.commit()
+
+@generate_bp.route('/generate/content', methods=['POST'])
+def generate_content():
+    """Generate fashion content using AI"""
+    try:
+        data = request.get_json()
+        fingerprint = generation_fingerprint(data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if not idempotency_key:
+        # Identical concurrent requests share one render
+        payload, status = generation_flights.do(f'request:{fingerprint}', lambda: create_generated_content(data))
+        return jsonify(payload), status
+    
+    key = f"{data.get('user_id', 1)}:{idempotency_key}"
+    
+    def run_once():
+        replay = claim_idempotency_key(key, fingerprint)
+        if replay is not None:
+            return replay
+        payload, status = create_generated_content(data)
+        complete_idempotency_key(key, payload, status)
+        return payload, status
+    
+    # A concurrent request reusing the key with a different body must not share this flight;
+    # it runs on its own and gets 422 from claim_idempotency_key
+    payload, status = generation_flights.do(f'key:{key}:{fingerprint}', run_once)
+    return jsonify(payload), status
+
+def load_contact_sheet_tile(path, tile_size):
+    """Decode a rendered image straight down to contact-sheet tile size"""
+    img = load_image(path, tile_size)
+    if img.size != tile_size:
+        img = img.resize(tile_size)
+    return img
+
+@generate_bp.route('/generate/contact-sheet', methods=['POST'])
+def generate_contact_sheet():
+    """Render a product in every pose and composite the tiles into one grid"""
+    try:
+        data = request.get_json()
+        
+        product_id = data['product_id']
+        avatar_id = data['avatar_id']
+        scene_id = data['scene_id']
+        user_id = data.get('user_id', 1)
+        columns = int(data.get('columns', 4))
+        tile_width = int(data.get('tile_width', 256))
+        if not 1 <= columns <= CONTACT_SHEET_MAX_COLUMNS:
+            raise ValueError(f'columns must be between 1 and {CONTACT_SHEET_MAX_COLUMNS}')
+        if not 16 <= tile_width <= CONTACT_SHEET_MAX_TILE_WIDTH:
+            raise ValueError(f'tile_width must be between 16 and {CONTACT_SHEET_MAX_TILE_WIDTH}')
+        tile_size = (tile_width, tile_width * 3 // 2)  # renders are 2:3 portrait
+        output = resolve_output_format(data.get('output'))
+        
+        product = Product.query.get_or_404(product_id).to_dict()
+        avatar = Avatar.query.get_or_404(avatar_id).to_dict()
+        scene = Scene.query.get_or_404(scene_id).to_dict()
+        
+        poses = [pose['name'] for pose in AVAILABLE_POSES]
+        output_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'generated')
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # Reuse the newest existing render of each pose for this combination, from this user only
+        existing = {}
+        candidates = GeneratedContent.query.filter_by(
+            product_id=product_id,
+            avatar_id=avatar_id,
+            scene_id=scene_id,
+            content_type='image',
+            user_id=user_id
+        ).filter(GeneratedContent.pose.in_(poses)).order_by(GeneratedContent.created_at.desc()).all()
+        for item in candidates:
+            path = os.path.join(output_dir, os.path.basename(item.content_url))
+            if item.pose not in existing and os.path.exists(path):
+                existing[item.pose] = item
+        tiles = dict(existing)
+        missing = [pose for pose in poses if pose not in tiles]
+        
+        # Allocate the grid once; each tile is pasted in as soon as it is ready
+        rows = -(-len(poses) // columns)
+        canvas = Image.new('RGB', (columns * tile_size[0], rows * tile_size[1]), color=(255, 255, 255))
+        
+        def paste_tile(pose, path):
+            position = poses.index(pose)
+            tile = load_contact_sheet_tile(path, tile_size)
+            canvas.paste(tile, ((position % columns) * tile_size[0], (position // columns) * tile_size[1]))
+        
+        # Missing tiles render concurrently as batch work for this tenant
+        futures = {}
+        for pose in missing:
+            prompt = generate_fashion_content_prompt(product, avatar, scene, pose)
+            future = generation_scheduler.submit(
+                user_id, generate_still_image, os.path.join(output_dir, str(uuid.uuid4())), prompt, product, avatar, scene, output
+            )
+            futures[future] = pose
+        
+        for pose, item in existing.items():
+            paste_tile(pose, os.path.join(output_dir, os.path.basename(item.content_url)))
+        
+        for future in as_completed(futures):
+            path = future.result().result()
+            pose = futures[future]
+            filename = os.path.basename(path)
+            paste_tile(pose, path)
+            
+            # Record the new tile as a regular render so later sheets can reuse it
+            tiles[pose] = GeneratedContent(
+                product_id=product_id,
+                avatar_id=avatar_id,
+                scene_id=scene_id,
+                content_type='image',
+                content_url=f'/generated/{filename}',
+                pose=pose,
+                user_id=user_id
+            )
+            db.session.add(tiles[pose])
+        
+        path = encode_image_async(canvas, os.path.join(output_dir, str(uuid.uuid4())), output).result()
+        content_url = f'/generated/{os.path.basename(path)}'
+        
+        sheet = GeneratedContent(
+            product_id=product_id,
+            avatar_id=avatar_id,
+            scene_id=scene_id,
+            content_type='contact_sheet',
+            content_url=content_url,
+            pose='all',
+            user_id=user_id
+        )
+        db.session.add(sheet)
+        for position, pose in enumerate(poses):
+            db.session.add(ContactSheetTile(sheet=sheet, tile=tiles[pose], position=position, pose=pose))
+        db.session.flush()
+        record_usage([sheet] + [tiles[pose] for pose in missing])
+        db.session.commit()
+        
+        return jsonify({
+            'id': sheet.id,
+            'content_url': content_url,
+            'status': 'generated',
+            'content': sheet.to_dict(),
+            'tiles': [tile.to_dict() for tile in sorted(sheet.tiles, key=lambda tile: tile.position)],
+            'reused_tiles': len(existing),
+            'rendered_tiles': len(missing)
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
 @generate_bp.route('/generate/analyze-garment', methods=['POST'])
@@ -284,6 +650,12 @@ def analyze_garment():
         fabric_type = data.get('fabric_type', 'cotton')
         fit = data.get('fit', 'regular')
         
+        # Remote images are stored like uploads first, so analysis can cache its copy
+        if image_url.startswith(('http://', 'https://')):
+            image_data = remote_image_fetcher.fetch(image_url)
+            image_url = store_product_image(image_data, inspect_image(image_data), data.get('user_id', 1))['image_url']
+            db.session.commit()
+        
         # For MVP, construct full path to image
         if image_url.startswith('/uploads/'):
             image_path = os.path.join(
@@ -296,6 +668,7 @@ def analyze_garment():
                 
                 return jsonify({
                     'analysis': analysis,
+                    'image_url': image_url,
                     'status': 'success'
                 }), 200
             else:
@@ -306,6 +679,118 @@ def analyze_garment():
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+def analysis_items(data):
+    """Resolve a batch analysis request into items, with an error result for each unusable entry"""
+    fabric_type = data.get('fabric_type', 'cotton')
+    fit = data.get('fit', 'regular')
+    items, errors = [], []
+    
+    product_ids = [int(product_id) for product_id in data.get('product_ids', [])]
+    products = {product.id: product for product in Product.query.filter(Product.id.in_(product_ids))} if product_ids else {}
+    for product_id in product_ids:
+        product = products.get(product_id)
+        if product is None or not product.image_url:
+            errors.append({'product_id': product_id, 'status': 'error', 'error': 'Product not found or has no image'})
+            continue
+        items.append({
+            'product_id': product_id, 'image_url': product.image_url,
+            'fabric_type': product.fabric_type, 'fit': product.fit
+        })
+    
+    for entry in data.get('image_urls', []):
+        entry = {'image_url': entry} if isinstance(entry, str) else entry
+        items.append({
+            'product_id': None, 'image_url': entry['image_url'],
+            'fabric_type': entry.get('fabric_type', fabric_type), 'fit': entry.get('fit', fit)
+        })
+    
+    if not items and not errors:
+        raise ValueError('Provide product_ids or image_urls')
+    if len(items) + len(errors) > ANALYSIS_MAX_ITEMS:
+        raise ValueError(f'At most {ANALYSIS_MAX_ITEMS} images per request')
+    return items, errors
+
+def latest_analyses(user_id, items):
+    """Stored analyses for the items' images, keyed by (product_id, image_url)"""
+    urls = {item['image_url'] for item in items}
+    latest = {}
+    for analysis in GarmentAnalysis.query.filter(
+        GarmentAnalysis.user_id == user_id, GarmentAnalysis.image_url.in_(urls)
+    ).order_by(GarmentAnalysis.id):
+        latest[(analysis.product_id, analysis.image_url)] = analysis
+    return latest
+
+@generate_bp.route('/generate/analyze-garment/batch', methods=['POST'])
+def analyze_garment_batch():
+    """Analyze many garments, several images per model request, streaming one NDJSON result per image"""
+    try:
+        data = request.get_json()
+        user_id = data.get('user_id', 1)
+        items, errors = analysis_items(data)
+        for item in items:
+            if item['image_url'].startswith(('http://', 'https://')):
+                remote_image_fetcher.check_url(item['image_url'])
+        
+        def line(result):
+            return json.dumps(result) + '\n'
+        
+        def generate():
+            for result in errors:
+                yield line(result)
+            
+            # Remote images are fetched concurrently and stored like uploads first
+            remote = {}
+            for item in items:
+                if item['image_url'].startswith(('http://', 'https://')):
+                    remote.setdefault(item['image_url'], []).append(item)
+            for url, fetched, error in remote_image_fetcher.fetch_many(remote, fetch_and_inspect):
+                stored_url = None
+                if error is None:
+                    try:
+                        stored_url = store_product_image(fetched[0], fetched[1], user_id)['image_url']
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        error = e
+                for item in remote[url]:
+                    item['source_url'], item['image_url'] = url, stored_url
+                    if error is not None:
+                        item['error'] = str(error)
+            
+            pending = []
+            cached = {} if data.get('force') else latest_analyses(user_id, [item for item in items if item['image_url']])
+            for item in items:
+                path = static_path(item['image_url']) if item['image_url'] else None
+                if 'error' in item or path is None or not item['image_url'].startswith('/uploads/') or not os.path.exists(path):
+                    yield line({**item, 'status': 'error', 'error': item.get('error', 'Image file not found')})
+                elif (item['product_id'], item['image_url']) in cached:
+                    yield line({**item, 'status': 'cached', 'analysis': cached[(item['product_id'], item['image_url'])].to_dict()})
+                else:
+                    pending.append({**item, 'path': path})
+            
+            for item, text, error in get_garment_analyzer().analyze_many(pending):
+                result = {key: value for key, value in item.items() if key != 'path'}
+                if error is not None:
+                    yield line({**result, 'status': 'error', 'error': str(error)})
+                    continue
+                analysis = GarmentAnalysis(
+                    user_id=user_id, product_id=item['product_id'], image_url=item['image_url'],
+                    fabric_type=item['fabric_type'], fit=item['fit'], analysis=text
+                )
+                db.session.add(analysis)
+                db.session.commit()
+                yield line({**result, 'status': 'analyzed', 'analysis': analysis.to_dict()})
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@generate_bp.route('/generate/analyze-garment/stats', methods=['GET'])
+def get_garment_analysis_stats():
+    """Batch size, model requests made and time spent waiting on the rate limit"""
+    return jsonify(get_garment_analyzer().stats())
+
 @generate_bp.route('/generate/content/<int:content_id>', methods=['GET'])
 def get_generated_content(content_id):
     """Get specific generated content"""
@@ -316,22 +801,104 @@ def get_generated_content(content_id):
 def get_all_generated_content():
     """Get all generated content for user"""
     user_id = request.args.get('user_id', 1)
-    content = GeneratedContent.query.filter_by(user_id=user_id).all()
-    return jsonify([item.to_dict() for item in content])
+    # Load the related product, avatar and scene in the same query as each batch
+    content = GeneratedContent.query.filter_by(user_id=user_id).options(
+        joinedload(GeneratedContent.product),
+        joinedload(GeneratedContent.avatar),
+        joinedload(GeneratedContent.scene)
+    ).order_by(GeneratedContent.id)
+    return stream_json_array(content)
+
+def export_filter(args):
+    """Build the WHERE clause selecting content to export; defaults to user 1 like the content list"""
+    clauses = [] if 'user_id' in args else [GeneratedContent.user_id == 1]
+    for name, value in args.items():
+        if name in EXPORT_FILTERS:
+            clauses.append(getattr(GeneratedContent, name) == value)
+        elif name == 'created_before':
+            clauses.append(GeneratedContent.created_at < datetime.fromisoformat(value))
+        elif name == 'created_after':
+            clauses.append(GeneratedContent.created_at >= datetime.fromisoformat(value))
+        else:
+            raise ValueError(f'Unknown filter: {name}')
+    return and_(*clauses)
+
+def export_file_name(content):
+    """Name of a content item's file inside the export archive"""
+    extension = content.content_url.rsplit('.', 1)[-1]
+    return f'{content.content_type}s/{content.id}.{extension}'
+
+def export_manifest_rows(query, missing):
+    """CSV text for the export manifest, one chunk per batch of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_MANIFEST_COLUMNS)
+    for index, content in enumerate(query.yield_per(1000), 1):
+        product, avatar, scene = content.product, content.avatar, content.scene
+        writer.writerow([
+            '' if content.id in missing else export_file_name(content),
+            content.id, content.content_type, content.pose,
+            content.created_at.isoformat() if content.created_at else '',
+            content.product_id, product.name, product.fabric_type, product.fit, product.size,
+            content.avatar_id, avatar.name, content.scene_id, scene.name, content.content_url
+        ])
+        if index % 1000 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+@generate_bp.route('/generate/export', methods=['GET'])
+def export_generated_content():
+    """Stream a ZIP of matching generated files plus a manifest CSV of their metadata"""
+    try:
+        where = export_filter(request.args)
+        
+        manifest = GeneratedContent.query.filter(where).options(
+            joinedload(GeneratedContent.product),
+            joinedload(GeneratedContent.avatar),
+            joinedload(GeneratedContent.scene)
+        ).order_by(GeneratedContent.id)
+        
+        def generate():
+            archive = ZipStream()
+            # Rows whose file is gone are still listed in the manifest, without a file
+            missing = set()
+            # The file pass only needs the columns that locate and name each file
+            files = db.session.query(
+                GeneratedContent.id, GeneratedContent.content_type, GeneratedContent.content_url
+            ).filter(where).order_by(GeneratedContent.id)
+            for content in files.yield_per(1000):
+                path = static_path(content.content_url)
+                try:
+                    if path is None:
+                        raise FileNotFoundError(content.content_url)
+                    yield from archive.write_file(path, export_file_name(content))
+                except OSError as e:
+                    print(f"Skipping {content.content_url} in export: {e}")
+                    missing.add(content.id)
+            yield from archive.write_chunks('manifest.csv', export_manifest_rows(manifest, missing))
+            yield from archive.close()
+        
+        response = Response(stream_with_context(generate()), mimetype='application/zip')
+        response.headers['Content-Disposition'] = 'attachment; filename="stylescape-export.zip"'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@generate_bp.route('/generate/scheduler', methods=['GET'])
+def get_scheduler_metrics():
+    """Get per-tenant queue depth and wait times for generation work"""
+    return jsonify(generation_scheduler.metrics())
+
+@generate_bp.route('/generate/stage-timings', methods=['GET'])
+def get_stage_timings():
+    """Per-stage latency histograms aggregated from traced requests"""
+    return jsonify(stage_histograms.snapshot())
 
 @generate_bp.route('/generate/poses', methods=['GET'])
 def get_available_poses():
     """Get list of available poses"""
-    poses = [
-        {'name': 'standing', 'description': 'Natural standing pose'},
-        {'name': 'walking', 'description': 'Dynamic walking pose'},
-        {'name': 'sitting', 'description': 'Casual sitting pose'},
-        {'name': 'leaning', 'description': 'Leaning against surface'},
-        {'name': 'hands_on_hips', 'description': 'Confident hands on hips'},
-        {'name': 'crossed_arms', 'description': 'Arms crossed pose'},
-        {'name': 'looking_away', 'description': 'Looking away from camera'},
-        {'name': 'profile', 'description': 'Side profile view'}
-    ]
-    
-    return jsonify(poses)
+    return jsonify(AVAILABLE_POSES)
 
@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from src.utils.jobs import job_registry
+from src.utils.reaper import file_reaper
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs', methods=['GET'])
+def get_jobs():
+    """List background jobs, newest first, with file cleanup progress"""
+    return jsonify({
+        'jobs': [job.to_dict() for job in job_registry.list()],
+        'file_reaper': file_reaper.stats()
+    })
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status and progress of a background job"""
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({**job.to_dict(), 'file_reaper': file_reaper.stats()})
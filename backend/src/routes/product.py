@@ -1,22 +1,75 @@
-from flask import Blueprint, jsonify, request
-from src.models.product import Product, db
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from src.models.product import Product, ImageHash, db
+from src.models.cascade import DELETE_BATCH_SIZE, count_product_cascade, delete_product_ids, delete_products
+import hashlib
+import json
 import os
-import uuid
-from werkzeug.utils import secure_filename
+import threading
+from datetime import datetime
+from io import BytesIO
+from sqlalchemy import and_
+from PIL import UnidentifiedImageError
+from src.utils.images import open_image
+from src.utils.imagehash import HammingIndex, dhash, to_signed64, to_unsigned64
+from src.utils.ingest import remote_image_fetcher
+from src.utils.jobs import job_registry
+from src.utils.streaming import stream_json_array
 
 product_bp = Blueprint('product', __name__)
 
 UPLOAD_FOLDER = 'uploads'
+UPLOAD_DIR = os.path.join(os.path.dirname(__file__), '..', 'static', UPLOAD_FOLDER)
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+# Pillow formats accepted as product images, and the extension they are stored under
+IMAGE_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif'}
+# Most products one ingest request may register
+INGEST_MAX_ITEMS = int(os.getenv('INGEST_MAX_ITEMS', 5000))
+
+# Attribute filters accepted by bulk deletes, besides created_before/created_after
+DELETE_FILTERS = ('user_id', 'fabric_type', 'fit', 'size')
+
+# In-process view of the ImageHash table, topped up from the DB before each lookup
+image_hash_index = HammingIndex()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def find_near_duplicates(image_hash, user_id):
+    """Find this user's products whose image's perceptual hash is close to this one"""
+    with image_hash_index.lock:
+        # Pick up hashes recorded since the last lookup, including other workers'
+        rows = db.session.query(ImageHash.id, ImageHash.hash).filter(
+            ImageHash.id > image_hash_index.last_id
+        ).order_by(ImageHash.id).all()
+        image_hash_index.add_many([row.id for row in rows], [to_unsigned64(row.hash) for row in rows])
+        matches = image_hash_index.search(image_hash)
+    
+    if not matches:
+        return []
+    
+    distances = dict(matches)
+    hashes = ImageHash.query.filter(ImageHash.id.in_(distances)).all()
+    # Other tenants' images and product ids are never reported
+    products = Product.query.filter(
+        Product.user_id == user_id, Product.image_url.in_([item.image_url for item in hashes])
+    ).all()
+    used = {product.image_url for product in products}
+    
+    duplicates = []
+    for item in sorted(hashes, key=lambda item: distances[item.id]):
+        if item.image_url not in used:
+            continue
+        duplicates.append({
+            'image_url': item.image_url,
+            'distance': distances[item.id],
+            'product_ids': [product.id for product in products if product.image_url == item.image_url]
+        })
+    return duplicates
+
 @product_bp.route('/products', methods=['GET'])
 def get_products():
     """Get all products for the current user"""
-    products = Product.query.all()
-    return jsonify([product.to_dict() for product in products])
+    return stream_json_array(Product.query.order_by(Product.id))
 
 @product_bp.route('/products', methods=['POST'])
 def create_product():
@@ -69,13 +122,113 @@ def update_product(product_id):
     db.session.commit()
     return jsonify(product.to_dict())
 
+def product_delete_filter(filters):
+    """Build the WHERE clause for a filtered bulk delete; at least one filter is required"""
+    clauses = []
+    for name, value in filters.items():
+        if name in DELETE_FILTERS:
+            clauses.append(getattr(Product, name) == value)
+        elif name == 'created_before':
+            clauses.append(Product.created_at < datetime.fromisoformat(value))
+        elif name == 'created_after':
+            clauses.append(Product.created_at >= datetime.fromisoformat(value))
+        else:
+            raise ValueError(f'Unknown filter: {name}')
+    if not clauses:
+        raise ValueError('Provide ids or at least one filter')
+    return and_(*clauses)
+
 @product_bp.route('/products/<int:product_id>', methods=['DELETE'])
 def delete_product(product_id):
-    """Delete a product"""
-    product = Product.query.get_or_404(product_id)
-    db.session.delete(product)
-    db.session.commit()
-    return '', 204
+    """Delete a product and its generated content; large cascades continue as a background job"""
+    Product.query.get_or_404(product_id)
+    
+    if count_product_cascade(Product.id == product_id) <= DELETE_BATCH_SIZE:
+        delete_product_ids([product_id])
+        return '', 204
+    
+    job = job_registry.submit('delete_products', lambda job: delete_product_ids([product_id], job.report), {'ids': [product_id]})
+    return jsonify({'job': job.to_dict()}), 202
+
+@product_bp.route('/products/bulk', methods=['DELETE'])
+def bulk_delete_products():
+    """Delete products by id list or filters, with their generated content, as a background job"""
+    try:
+        data = request.get_json()
+        ids = data.get('ids')
+        
+        if ids:
+            ids = [int(product_id) for product_id in ids]
+            job = job_registry.submit('delete_products', lambda job: delete_product_ids(ids, job.report), {'ids': ids})
+        else:
+            filters = data.get('filters') or {}
+            where = product_delete_filter(filters)
+            
+            def run(job):
+                job.set(total_rows=count_product_cascade(where))
+                delete_products(where, job.report)
+            
+            job = job_registry.submit('delete_products', run, {'filters': filters})
+        
+        return jsonify({'job': job.to_dict()}), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+def inspect_image(data):
+    """Check image bytes are an accepted format and compute their content and perceptual hashes"""
+    try:
+        img = open_image(BytesIO(data))
+    except UnidentifiedImageError:
+        raise ValueError('Not an image file')
+    with img:
+        extension = IMAGE_EXTENSIONS.get(img.format)
+        if extension is None:
+            raise ValueError(f'Unsupported image format: {img.format}')
+        image_hash = dhash(img)
+    return {'extension': extension, 'sha256': hashlib.sha256(data).hexdigest(), 'hash': image_hash}
+
+def refresh_stored_file(path):
+    """Mark a stored file as just used, returning False if it is missing"""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return os.path.exists(path)
+
+def store_product_image(data, info, user_id):
+    """Save inspected image bytes under their content hash and record the perceptual hash.
+
+    Identical bytes always map to the same file, so re-uploads and images
+    shared between CDN URLs are stored once. Near duplicates are looked up
+    among ``user_id``'s products. The ImageHash row is added to the
+    session; the caller commits.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    filename = f"{info['sha256']}.{info['extension']}"
+    filepath = os.path.join(UPLOAD_DIR, filename)
+    file_url = f'/{UPLOAD_FOLDER}/{filename}'
+    
+    # Touch an existing copy so a reaper queued by a concurrent delete keeps it,
+    # then check it survived; otherwise write it again
+    stored = refresh_stored_file(filepath)
+    if not stored:
+        tmp_path = f'{filepath}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    
+    # Flag resized or re-compressed copies of garments we already have
+    near_duplicates = find_near_duplicates(info['hash'], user_id)
+    if not ImageHash.query.filter_by(image_url=file_url).count():
+        db.session.add(ImageHash(image_url=file_url, hash=to_signed64(info['hash'])))
+    
+    return {
+        'image_url': file_url,
+        'deduplicated': stored,
+        'near_duplicates': near_duplicates,
+        'duplicate_product_ids': sorted({pid for item in near_duplicates for pid in item['product_ids']})
+    }
 
 @product_bp.route('/products/upload', methods=['POST'])
 def upload_product_image():
@@ -88,18 +241,100 @@ def upload_product_image():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
-        # Create uploads directory if it doesn't exist
-        upload_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads')
-        os.makedirs(upload_dir, exist_ok=True)
+        data = file.read()
+        try:
+            # Decompression bombs are rejected from the header, before decoding
+            info = inspect_image(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Generate unique filename
-        filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
-        filepath = os.path.join(upload_dir, filename)
-        file.save(filepath)
+        try:
+            result = store_product_image(data, info, request.form.get('user_id', 1, type=int))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
         
-        # Return the URL path
-        file_url = f'/uploads/{filename}'
-        return jsonify({'image_url': file_url}), 200
+        return jsonify(result), 200
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+def fetch_and_inspect(data):
+    """Runs on an ingest worker after each download"""
+    return data, inspect_image(data)
+
+def ingest_item(index, item, data, info, user_id):
+    """Store one fetched image and register its product, unless the user already has it"""
+    stored = store_product_image(data, info, user_id)
+    result = {'index': index, 'source_url': item['image_url'], **stored}
+    if 'name' not in item:
+        result['status'] = 'stored'
+        return result
+    
+    existing = Product.query.filter_by(user_id=user_id, image_url=stored['image_url']).first()
+    if existing is not None:
+        result.update(status='exists', product=existing.to_dict())
+        return result
+    
+    product = Product(
+        name=item['name'],
+        description=item.get('description', ''),
+        fabric_type=item['fabric_type'],
+        fit=item['fit'],
+        size=item['size'],
+        image_url=stored['image_url'],
+        user_id=user_id
+    )
+    db.session.add(product)
+    db.session.flush()
+    product.digital_twin_url = f"/api/digital-twins/{product.id}.obj"
+    result.update(status='created', product=product.to_dict())
+    return result
+
+@product_bp.route('/products/ingest', methods=['POST'])
+def ingest_products():
+    """Register products from remote image URLs, streaming one NDJSON result per item as it finishes"""
+    try:
+        data = request.get_json()
+        user_id = data.get('user_id', 1)
+        if 'products' in data:
+            items = data['products']
+            required = ('image_url', 'name', 'fabric_type', 'fit', 'size')
+        else:
+            # Bare URLs only store the images, for products created later
+            items = [{'image_url': url} for url in data.get('urls', [])]
+            required = ('image_url',)
+        if not items:
+            raise ValueError('Provide products or urls')
+        if len(items) > INGEST_MAX_ITEMS:
+            raise ValueError(f'At most {INGEST_MAX_ITEMS} items per request')
+        for index, item in enumerate(items):
+            missing = [field for field in required if not item.get(field)]
+            if missing:
+                raise ValueError(f"Item {index} is missing {', '.join(missing)}")
+            remote_image_fetcher.check_url(item['image_url'])
+        
+        indexes = {}
+        for index, item in enumerate(items):
+            indexes.setdefault(item['image_url'], []).append(index)
+        
+        def generate():
+            # Downloads, decoding and hashing run on the fetcher's workers; rows are written here
+            for url, fetched, error in remote_image_fetcher.fetch_many(indexes, fetch_and_inspect):
+                for index in indexes[url]:
+                    try:
+                        if error is not None:
+                            raise error
+                        result = ingest_item(index, items[index], *fetched, user_id)
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        if not isinstance(e, ValueError):
+                            print(f"Could not ingest {url}: {e}")
+                        result = {'index': index, 'source_url': url, 'status': 'error', 'error': str(e)}
+                    yield json.dumps(result) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
+from sqlalchemy.exc import IntegrityError
 from src.models.product import Scene, db
+from src.models.catalog import PRESET_SCENES, normalize_scene, upsert_scenes
 
 scene_bp = Blueprint('scene', __name__)
 
@@ -29,7 +31,12 @@ def create_scene():
         
         return jsonify(scene.to_dict()), 201
         
+    except IntegrityError:
+        # Names are a natural key (ux_scene_name)
+        db.session.rollback()
+        return jsonify({'error': f"A scene named '{data['name']}' already exists"}), 409
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
 @scene_bp.route('/scenes/<int:scene_id>', methods=['GET'])
@@ -42,73 +49,31 @@ def get_scene(scene_id):
 def create_preset_scenes():
     """Create preset scenes for the MVP"""
     try:
-        preset_scenes = [
-            {
-                'name': 'Urban Street',
-                'description': 'Modern city street with urban architecture',
-                'category': 'Urban',
-                'image_url': '/scenes/urban_street.jpg',
-                'environment_url': '/environments/urban_street.hdr',
-                'lighting_preset': 'Natural'
-            },
-            {
-                'name': 'Minimalist Studio',
-                'description': 'Clean white studio with professional lighting',
-                'category': 'Studio',
-                'image_url': '/scenes/minimalist_studio.jpg',
-                'environment_url': '/environments/studio.hdr',
-                'lighting_preset': 'Studio'
-            },
-            {
-                'name': 'Golden Hour Park',
-                'description': 'Beautiful park setting during golden hour',
-                'category': 'Nature',
-                'image_url': '/scenes/golden_hour_park.jpg',
-                'environment_url': '/environments/park.hdr',
-                'lighting_preset': 'Golden Hour'
-            },
-            {
-                'name': 'Industrial Loft',
-                'description': 'Modern industrial loft with exposed brick',
-                'category': 'Indoor',
-                'image_url': '/scenes/industrial_loft.jpg',
-                'environment_url': '/environments/loft.hdr',
-                'lighting_preset': 'Moody'
-            },
-            {
-                'name': 'Beach Sunset',
-                'description': 'Tropical beach with stunning sunset backdrop',
-                'category': 'Nature',
-                'image_url': '/scenes/beach_sunset.jpg',
-                'environment_url': '/environments/beach.hdr',
-                'lighting_preset': 'Golden Hour'
-            },
-            {
-                'name': 'Rooftop City View',
-                'description': 'Modern rooftop with city skyline view',
-                'category': 'Urban',
-                'image_url': '/scenes/rooftop_city.jpg',
-                'environment_url': '/environments/rooftop.hdr',
-                'lighting_preset': 'Natural'
-            }
-        ]
-        
-        created_scenes = []
-        for scene_data in preset_scenes:
-            # Check if scene already exists
-            existing = Scene.query.filter_by(name=scene_data['name']).first()
-            if not existing:
-                scene = Scene(**scene_data)
-                db.session.add(scene)
-                created_scenes.append(scene_data['name'])
-        
-        db.session.commit()
+        result = upsert_scenes([normalize_scene(scene) for scene in PRESET_SCENES])
         
         return jsonify({
-            'message': f'Created {len(created_scenes)} preset scenes',
-            'scenes': created_scenes
+            'message': f"Created {len(result['created'])} preset scenes",
+            'scenes': result['created']
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@scene_bp.route('/scenes/bulk', methods=['PUT'])
+def bulk_upsert_scenes():
+    """Create or update many scenes, matched by name"""
+    try:
+        data = request.get_json()
+        
+        result = upsert_scenes([normalize_scene(scene) for scene in data['scenes']])
+        
+        return jsonify({
+            'created': len(result['created']),
+            'updated': len(result['updated']),
+            'unchanged': result['unchanged']
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,32 @@
+from flask import Blueprint, jsonify, request
+from src.models.search import SEARCH_CATALOGS, search_catalog
+
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('/search/<kind>', methods=['GET'])
+def search(kind):
+    """Full-text search over products, avatars or scenes with attribute filters"""
+    if kind not in SEARCH_CATALOGS:
+        return jsonify({'error': f'Unknown catalog: {kind}'}), 404
+    
+    try:
+        _, _, filter_columns = SEARCH_CATALOGS[kind]
+        filters = {name: request.args.get(name) for name in filter_columns}
+        try:
+            page = int(request.args.get('page', 1))
+            per_page = int(request.args.get('per_page', 20))
+        except ValueError:
+            return jsonify({'error': 'page and per_page must be integers'}), 400
+        
+        # The catalog clamps paging, so report the values it actually used
+        items, total, page, per_page = search_catalog(kind, request.args.get('q', ''), filters, page, per_page)
+        
+        return jsonify({
+            'results': [item.to_dict() for item in items],
+            'total': total,
+            'page': page,
+            'per_page': per_page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify, request
+from src.models.stats import ALL_USERS, STAT_DIMENSIONS, usage_stats
+
+stats_bp = Blueprint('stats', __name__)
+
+@stats_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """Generated content counts per content type, product, scene, avatar, pose and day"""
+    try:
+        user_id = int(request.args.get('user_id', ALL_USERS))
+        limit = min(int(request.args.get('limit', 50)), 1000)
+        dimensions = request.args.get('dimensions')
+        dimensions = dimensions.split(',') if dimensions else STAT_DIMENSIONS
+        
+        unknown = [dimension for dimension in dimensions if dimension not in STAT_DIMENSIONS]
+        if unknown:
+            return jsonify({'error': f"Unknown dimensions: {', '.join(unknown)}"}), 400
+        
+        return jsonify({
+            'user_id': user_id or None,
+            **usage_stats(user_id, dimensions, limit)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
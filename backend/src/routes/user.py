@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db
+from src.models.cascade import DELETE_BATCH_SIZE, count_user_cascade, delete_users
+from src.utils.jobs import job_registry
 
 user_bp = Blueprint('user', __name__)
 
@@ -33,7 +35,18 @@ def update_user(user_id):
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    user = User.query.get_or_404(user_id)
-    db.session.delete(user)
-    db.session.commit()
-    return '', 204
+    User.query.get_or_404(user_id)
+    if count_user_cascade([user_id]) <= DELETE_BATCH_SIZE:
+        delete_users([user_id])
+        return '', 204
+    job = job_registry.submit('delete_users', lambda job: delete_users([user_id], job.report), {'ids': [user_id]})
+    return jsonify({'job': job.to_dict()}), 202
+
+@user_bp.route('/users/bulk', methods=['DELETE'])
+def bulk_delete_users():
+    try:
+        ids = [int(user_id) for user_id in request.get_json()['ids']]
+        job = job_registry.submit('delete_users', lambda job: delete_users(ids, job.report), {'ids': ids})
+        return jsonify({'job': job.to_dict()}), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,295 @@
+import base64
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from src.utils.images import analysis_input_path, load_analysis_image
+
+# Images packed into one model request, capped by what the backend accepts
+ANALYSIS_BATCH_SIZE = int(os.getenv('ANALYSIS_BATCH_SIZE', 8))
+# Model requests in flight at once
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 4))
+# Model requests allowed per minute across all workers (the upstream quota)
+ANALYSIS_RATE_LIMIT = float(os.getenv('ANALYSIS_RATE_LIMIT', 60))
+# Send analysis requests to this URL instead of Gemini, e.g. a self-hosted or fake model
+ANALYSIS_ENDPOINT = os.getenv('ANALYSIS_ENDPOINT', '')
+# Retries of a batch after a transient failure (rate limited, unavailable, timed out)
+ANALYSIS_RETRIES = int(os.getenv('ANALYSIS_RETRIES', 3))
+# Seconds before the first retry, doubling each time, unless the backend sends Retry-After
+ANALYSIS_RETRY_BACKOFF = float(os.getenv('ANALYSIS_RETRY_BACKOFF', 1.0))
+
+ANALYSIS_POINTS = """1. The garment's style and design elements
+2. Color and pattern details
+3. How it would look when worn
+4. Suitable styling suggestions
+5. Target demographic"""
+
+
+class AnalysisResponseError(ValueError):
+    """The model answered, but the answer held no analysis text"""
+
+
+def batch_prompt(items):
+    """One prompt covering every image of a batch, asking for the analyses as a JSON array in order"""
+    garments = '\n'.join(
+        f"Image {number}: a {item['fabric_type']} garment with {item['fit']} fit"
+        for number, item in enumerate(items, 1)
+    )
+    return f"""
+You are given {len(items)} garment images, in this order:
+{garments}
+
+For each image, provide a concise description for fashion marketing purposes of:
+{ANALYSIS_POINTS}
+
+Answer with a JSON array of {len(items)} strings, one analysis per image in the same order, and nothing else.
+"""
+
+
+def parse_batch_response(text, count):
+    """Analyses from a model's JSON array answer; None if it does not hold exactly ``count``"""
+    match = re.search(r'\[.*\]', text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        analyses = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(analyses, list) or len(analyses) != count:
+        return None
+    return [analysis if isinstance(analysis, str) else json.dumps(analysis) for analysis in analyses]
+
+
+class GeminiBackend:
+    """Gemini accepts many images per request; all are sent alongside one prompt"""
+
+    max_images = 16
+
+    def __init__(self, model='gemini-1.5-flash'):
+        self.model = model
+
+    def prepare(self, path):
+        """Decode and cache one image's downscaled copy, raising if it is unusable"""
+        load_analysis_image(path)
+
+    def analyze(self, prompt, image_paths):
+        import google.generativeai as genai
+        model = genai.GenerativeModel(self.model)
+        response = model.generate_content([prompt] + [load_analysis_image(path) for path in image_paths])
+        try:
+            return response.text
+        except ValueError as e:
+            # Blocked or empty candidates
+            raise AnalysisResponseError(str(e)) from e
+
+    def is_transient(self, error):
+        from google.api_core import exceptions
+        return isinstance(error, (exceptions.TooManyRequests, exceptions.ServiceUnavailable,
+                                  exceptions.InternalServerError, exceptions.DeadlineExceeded))
+
+
+class HTTPBackend:
+    """POST ``{"prompt", "images": [base64 JPEG]}`` to ``url`` and read ``{"text"}`` back.
+
+    Pass ``session`` to reuse connections or to route to a stand-in server.
+    """
+
+    def __init__(self, url, session=None, max_images=ANALYSIS_BATCH_SIZE, timeout=60):
+        self.url = url
+        self.session = session or requests.Session()
+        self.max_images = max_images
+        self.timeout = timeout
+
+    def prepare(self, path):
+        """Decode and cache one image's downscaled copy, raising if it is unusable"""
+        load_analysis_image(path)
+
+    def analyze(self, prompt, image_paths):
+        images = []
+        for path in image_paths:
+            load_analysis_image(path)  # make sure the downscaled copy exists
+            with open(analysis_input_path(path), 'rb') as f:
+                images.append(base64.b64encode(f.read()).decode())
+        response = self.session.post(self.url, json={'prompt': prompt, 'images': images}, timeout=self.timeout)
+        response.raise_for_status()
+        try:
+            return response.json()['text']
+        except (ValueError, KeyError, TypeError) as e:
+            raise AnalysisResponseError(f'Unreadable model response: {e}') from e
+
+    def is_transient(self, error):
+        if isinstance(error, requests.HTTPError):
+            status = error.response.status_code if error.response is not None else None
+            return status == 429 or (status is not None and status >= 500)
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def default_backend():
+    return HTTPBackend(ANALYSIS_ENDPOINT) if ANALYSIS_ENDPOINT else GeminiBackend()
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` acquisitions per minute.
+
+    The default burst of one spaces requests evenly, which also keeps any
+    sliding one-minute window of an upstream quota within ``rate``.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate / 60.0
+        self.capacity = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.waited += now - started
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class BatchAnalyzer:
+    """Analyse many garment images, several per model request, within a request rate.
+
+    Items are dicts with ``path``, ``fabric_type`` and ``fit``. Batches run
+    on a thread pool. Each image is prepared by the backend before its
+    batch is sent, so an unreadable upload fails only its own item. A batch
+    whose request fails transiently (as judged by the backend's
+    ``is_transient``) is retried whole with exponential backoff; any other
+    failure, or running out of retries, is reported for every item of the
+    batch. Only a batch whose answer arrived but cannot be split into one
+    analysis per image is retried one image per request.
+    """
+
+    def __init__(self, backend=None, batch_size=ANALYSIS_BATCH_SIZE, workers=ANALYSIS_WORKERS,
+                 rate_limit=ANALYSIS_RATE_LIMIT, retries=ANALYSIS_RETRIES, retry_backoff=ANALYSIS_RETRY_BACKOFF):
+        self.backend = backend or default_backend()
+        self.batch_size = max(1, min(batch_size, self.backend.max_images))
+        self.workers = workers
+        self.limiter = RateLimiter(rate_limit)
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.requests = 0
+        self.retried = 0
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='garment-analysis')
+        return self._pool
+
+    def _call(self, items):
+        self.limiter.acquire()
+        with self._pool_lock:
+            self.requests += 1
+        return self.backend.analyze(batch_prompt(items), [item['path'] for item in items])
+
+    def _retry_delay(self, error, attempt):
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+        if retry_after.isdigit():
+            # Never wait longer than the last backoff step, whatever the server asks for
+            return min(int(retry_after), self.retry_backoff * 2 ** self.retries)
+        return self.retry_backoff * 2 ** attempt
+
+    def _call_with_retries(self, items):
+        for attempt in range(self.retries + 1):
+            try:
+                return self._call(items)
+            except Exception as e:
+                if attempt == self.retries or not self.backend.is_transient(e):
+                    raise
+                with self._pool_lock:
+                    self.retried += 1
+                time.sleep(self._retry_delay(e, attempt))
+
+    def _analyze_batch(self, items):
+        """Return one ``(analysis, error)`` per item"""
+        results = [None] * len(items)
+        ready = []
+        for index, item in enumerate(items):
+            try:
+                self.backend.prepare(item['path'])
+                ready.append(index)
+            except Exception as e:
+                results[index] = (None, e)
+        if ready:
+            for index, result in zip(ready, self._analyze_prepared([items[index] for index in ready])):
+                results[index] = result
+        return results
+
+    def _analyze_prepared(self, items):
+        try:
+            text = self._call_with_retries(items)
+        except AnalysisResponseError:
+            text = ''
+        except Exception as e:
+            # The request itself failed; asking about each image alone would fail the same way
+            return [(None, e)] * len(items)
+        analyses = parse_batch_response(text, len(items))
+        if analyses is None and len(items) == 1 and text.strip():
+            # A lone image may be answered in plain text
+            analyses = [text.strip()]
+        if analyses is not None:
+            return [(analysis, None) for analysis in analyses]
+        if len(items) == 1:
+            return [(None, AnalysisResponseError('Model returned no analysis'))]
+        # The model answered, but not with one analysis per image
+        return [result for item in items for result in self._analyze_prepared([item])]
+
+    def analyze_many(self, items):
+        """Yield ``(item, analysis, error)`` for every item as its batch finishes"""
+        pool = self._get_pool()
+        items = list(items)
+        pending = deque(items[start:start + self.batch_size] for start in range(0, len(items), self.batch_size))
+        in_flight = {}
+        while pending or in_flight:
+            while pending and len(in_flight) < self.workers:
+                batch = pending.popleft()
+                in_flight[pool.submit(self._analyze_batch, batch)] = batch
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                for item, (analysis, error) in zip(batch, future.result()):
+                    yield item, analysis, error
+
+    def stats(self):
+        return {
+            'batch_size': self.batch_size,
+            'workers': self.workers,
+            'requests': self.requests,
+            'retries': self.retried,
+            'rate_limit_wait_seconds': round(self.limiter.waited, 2)
+        }
+
+
+garment_analyzer = None
+_garment_analyzer_lock = threading.Lock()
+
+
+def get_garment_analyzer():
+    """The shared analyzer, created on first use; assign ``garment_analyzer`` to plug in another"""
+    global garment_analyzer
+    with _garment_analyzer_lock:
+        if garment_analyzer is None:
+            garment_analyzer = BatchAnalyzer()
+    return garment_analyzer
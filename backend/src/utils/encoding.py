@@ -0,0 +1,153 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image
+from werkzeug.security import safe_join
+
+from src.utils.images import load_image
+from src.utils.tracing import span
+
+# name -> (Pillow format, file extension, mimetype)
+IMAGE_FORMATS = {
+    'png': ('PNG', 'png', 'image/png'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+    'webp': ('WEBP', 'webp', 'image/webp'),
+}
+FORMAT_ALIASES = {'jpg': 'jpeg'}
+EXTENSION_FORMATS = {'png': 'png', 'jpg': 'jpeg', 'jpeg': 'jpeg', 'webp': 'webp'}
+
+
+def _env_flag(name, default=False):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+# Deployment defaults for rendered stills; requests may override any of them
+DEFAULT_OUTPUT = {
+    'format': os.getenv('IMAGE_FORMAT', 'png'),
+    'quality': int(os.getenv('IMAGE_QUALITY', 85)),
+    'optimize': _env_flag('IMAGE_OPTIMIZE'),
+    'progressive': _env_flag('IMAGE_PROGRESSIVE'),
+}
+ENCODE_WORKERS = int(os.getenv('IMAGE_ENCODE_WORKERS', os.cpu_count() or 1))
+# Formats /generated/ may convert stills into when the client prefers them
+NEGOTIATED_FORMATS = tuple(name for name in os.getenv('IMAGE_NEGOTIATED_FORMATS', 'webp,jpeg').split(',') if name)
+
+_encode_pool = None
+_encode_pool_lock = threading.Lock()
+
+
+def resolve_output_format(options=None):
+    """Merge per-request output options over the deployment defaults and validate them"""
+    settings = dict(DEFAULT_OUTPUT)
+    settings.update({key: value for key, value in (options or {}).items() if value is not None})
+
+    name = str(settings['format']).lower()
+    name = FORMAT_ALIASES.get(name, name)
+    if name not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {settings['format']}")
+    quality = int(settings['quality'])
+    if not 1 <= quality <= 100:
+        raise ValueError('quality must be between 1 and 100')
+
+    return {
+        'format': name,
+        'quality': quality,
+        'optimize': bool(settings['optimize']),
+        'progressive': bool(settings['progressive']),
+    }
+
+
+def save_options(settings):
+    """Pillow save() arguments for resolved output settings"""
+    name = settings['format']
+    if name == 'jpeg':
+        return {
+            'quality': settings['quality'],
+            'optimize': settings['optimize'],
+            'progressive': settings['progressive'],
+        }
+    if name == 'webp':
+        # method trades encode time for size: 4 is Pillow's default, 6 the slowest/smallest
+        return {'quality': settings['quality'], 'method': 6 if settings['optimize'] else 4}
+    return {'optimize': settings['optimize']}
+
+
+def encode_image(img, output_base, settings):
+    """Write ``img`` to ``output_base`` plus the format's extension and return the path"""
+    name = settings['format']
+    pil_format, extension, _ = IMAGE_FORMATS[name]
+    path = f'{output_base}.{extension}'
+    if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    with span(f'encode.{name}'):
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        img.save(tmp_path, pil_format, **save_options(settings))
+        os.replace(tmp_path, path)
+    return path
+
+
+def get_encode_pool():
+    """Return the shared thread pool that encodes images (Pillow releases the GIL while encoding)"""
+    global _encode_pool
+    with _encode_pool_lock:
+        if _encode_pool is None:
+            _encode_pool = ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix='image-encode')
+    return _encode_pool
+
+
+def submit_encode(fn, *args):
+    """Run ``fn`` on the encode pool in the caller's context, so its spans join the request trace"""
+    return get_encode_pool().submit(contextvars.copy_context().run, fn, *args)
+
+
+def encode_image_async(img, output_base, settings):
+    """Encode on the pool, returning a Future for the written path"""
+    return submit_encode(encode_image, img, output_base, settings)
+
+
+def completed(path):
+    """A Future that already holds ``path``, for images written without the pool"""
+    future = Future()
+    future.set_result(path)
+    return future
+
+
+def _is_animated(path):
+    with Image.open(path) as img:
+        return getattr(img, 'is_animated', False)
+
+
+def _encode_variant(path, name):
+    return encode_image(load_image(path), path, resolve_output_format({'format': name}))
+
+
+def negotiate_image(directory, filename, accept_mimetypes):
+    """Pick the stored still or a converted variant for an Accept header.
+
+    Returns the filename to send (relative to ``directory``) and its
+    mimetype. Variants are encoded once on the pool and kept next to the
+    original as ``<name>.<ext>.<variant ext>``; animations and other files
+    are always sent as stored.
+    """
+    extension = filename.rsplit('.', 1)[-1].lower()
+    stored = EXTENSION_FORMATS.get(extension)
+    path = safe_join(directory, filename)
+    if stored is None or path is None or not os.path.isfile(path):
+        return filename, None
+
+    candidates = {IMAGE_FORMATS[stored][2]: stored}
+    for name in NEGOTIATED_FORMATS:
+        candidates.setdefault(IMAGE_FORMATS[name][2], name)
+    # Ties go to the first candidate, so wildcards keep the stored format
+    mimetype = accept_mimetypes.best_match(list(candidates), default=IMAGE_FORMATS[stored][2])
+    chosen = candidates[mimetype]
+    if chosen == stored or (stored == 'webp' and _is_animated(path)):
+        return filename, IMAGE_FORMATS[stored][2]
+
+    variant = f'{path}.{IMAGE_FORMATS[chosen][1]}'
+    if not os.path.exists(variant) or os.path.getmtime(variant) < os.path.getmtime(path):
+        submit_encode(_encode_variant, path, chosen).result()
+    return f'{filename}.{IMAGE_FORMATS[chosen][1]}', mimetype
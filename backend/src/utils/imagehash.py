@@ -0,0 +1,128 @@
+import itertools
+import threading
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8  # 8x8 difference grid -> 64-bit hash
+CHUNKS = 4
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+MERGE_THRESHOLD = 4096
+
+# Uploads within this many differing bits are treated as the same garment photo
+NEAR_DUPLICATE_DISTANCE = 6
+
+
+def dhash(img, hash_size=HASH_SIZE):
+    """Compute a 64-bit difference hash, robust to resizing and re-compression"""
+    # JPEGs can be decoded at a fraction of their size; the hash only needs a few pixels
+    img.draft('L', (hash_size * 8, hash_size * 8))
+    small = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def to_signed64(value):
+    """Map an unsigned 64-bit hash onto SQLite's signed INTEGER range"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned64(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def _flip_masks(radius):
+    """All CHUNK_BITS-wide masks with at most ``radius`` bits set"""
+    masks = [0]
+    for r in range(1, radius + 1):
+        for bits in itertools.combinations(range(CHUNK_BITS), r):
+            masks.append(sum(1 << b for b in bits))
+    return np.array(masks, dtype=np.uint16)
+
+
+def _expand_ranges(starts, stops):
+    """Concatenate ``arange(start, stop)`` for each pair without a Python loop"""
+    lengths = stops - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return offsets + np.arange(total)
+
+
+class HammingIndex:
+    """Multi-index hashing over 64-bit perceptual hashes.
+
+    Each hash is split into four 16-bit chunks, and each chunk position
+    keeps a sorted array of its values. Two hashes within distance ``d``
+    must agree to within ``d // 4`` bits on at least one chunk, so a lookup
+    only probes those neighbouring chunk values with binary search and then
+    checks the full distance of the few candidates in one vectorized pass.
+    New hashes go to a small pending buffer that is scanned linearly and
+    merged into the sorted arrays once it grows past ``MERGE_THRESHOLD``.
+    """
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self._chunks = []
+        self._pending_ids = []
+        self._pending_hashes = []
+        self._masks = {}
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids) + len(self._pending_ids)
+
+    def add_many(self, ids, hashes):
+        self._pending_ids.extend(ids)
+        self._pending_hashes.extend(hashes)
+        if ids:
+            self.last_id = max(self.last_id, max(ids))
+        if len(self._pending_ids) >= MERGE_THRESHOLD:
+            self._merge()
+
+    def _merge(self):
+        self.ids = np.concatenate((self.ids, np.array(self._pending_ids, dtype=np.int64)))
+        self.hashes = np.concatenate((self.hashes, np.array(self._pending_hashes, dtype=np.uint64)))
+        self._pending_ids, self._pending_hashes = [], []
+
+        self._chunks = []
+        for j in range(CHUNKS):
+            values = ((self.hashes >> np.uint64(j * CHUNK_BITS)) & np.uint64(CHUNK_MASK)).astype(np.uint16)
+            order = np.argsort(values, kind='stable')
+            self._chunks.append((values[order], order))
+
+    def search(self, value, max_distance=NEAR_DUPLICATE_DISTANCE):
+        """Return ``(id, distance)`` pairs within ``max_distance``, nearest first"""
+        query = np.uint64(value)
+        matches = []
+
+        if len(self.ids):
+            radius = max_distance // CHUNKS
+            if radius not in self._masks:
+                self._masks[radius] = _flip_masks(radius)
+            masks = self._masks[radius]
+
+            candidates = []
+            for j, (sorted_values, order) in enumerate(self._chunks):
+                chunk = np.uint16((value >> (j * CHUNK_BITS)) & CHUNK_MASK)
+                probes = np.sort(masks ^ chunk)
+                starts = np.searchsorted(sorted_values, probes, side='left')
+                stops = np.searchsorted(sorted_values, probes, side='right')
+                candidates.append(order[_expand_ranges(starts, stops)])
+
+            positions = np.unique(np.concatenate(candidates))
+            distances = np.bitwise_count(self.hashes[positions] ^ query)
+            keep = distances <= max_distance
+            matches.extend(zip(self.ids[positions[keep]].tolist(), distances[keep].tolist()))
+
+        if self._pending_ids:
+            distances = np.bitwise_count(np.array(self._pending_hashes, dtype=np.uint64) ^ query)
+            for i in np.flatnonzero(distances <= max_distance):
+                matches.append((self._pending_ids[i], int(distances[i])))
+
+        return sorted(matches, key=lambda match: match[1])
@@ -0,0 +1,89 @@
+import os
+
+from PIL import ExifTags, Image
+
+# Refuse to decode anything larger than this (decompression bomb guard)
+MAX_IMAGE_PIXELS = int(os.getenv('MAX_IMAGE_PIXELS', 64_000_000))
+
+# Longest side of the image sent to Gemini for garment analysis
+ANALYSIS_MAX_SIDE = int(os.getenv('ANALYSIS_MAX_SIDE', 1024))
+
+_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+class ImageTooLargeError(ValueError):
+    pass
+
+
+def open_image(path):
+    """Open an image lazily, rejecting decompression bombs from the header alone"""
+    img = Image.open(path)
+    if img.width * img.height > MAX_IMAGE_PIXELS:
+        img.close()
+        raise ImageTooLargeError(
+            f'Image is {img.width}x{img.height}, larger than the {MAX_IMAGE_PIXELS} pixel limit'
+        )
+    return img
+
+
+def load_image(path, max_size=None):
+    """Decode an upright RGB image no larger than ``max_size`` (width, height).
+
+    JPEGs are decoded directly at a reduced DCT scale (draft mode) and any
+    remaining size is removed with ``reduce`` before the final resample, so
+    a full-resolution copy never exists in memory. Transparent images are
+    flattened onto white.
+    """
+    img = open_image(path)
+    orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+
+    if max_size:
+        # Size the decode in stored orientation; 5-8 swap width and height
+        box = max_size[::-1] if orientation in (5, 6, 7, 8) else max_size
+        img.draft('RGB', box)
+        factor = min(img.width // box[0], img.height // box[1])
+        if factor > 1:
+            img = img.reduce(factor)
+        img.thumbnail(box, Image.Resampling.LANCZOS)
+
+    if orientation in _ORIENTATION_TRANSPOSE:
+        img = img.transpose(_ORIENTATION_TRANSPOSE[orientation])
+
+    if img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    return img
+
+
+def analysis_input_path(path):
+    """Location of the cached, downscaled copy of an upload used for analysis"""
+    return f'{os.path.splitext(path)[0]}.analysis.jpg'
+
+
+def load_analysis_image(path):
+    """Load the analysis-sized copy of an upload, creating it next to the upload once"""
+    cache_path = analysis_input_path(path)
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        # Decode now and release the file, as the freshly built copy below is
+        with Image.open(cache_path) as img:
+            img.load()
+        return img
+
+    img = load_image(path, (ANALYSIS_MAX_SIDE, ANALYSIS_MAX_SIDE))
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    img.save(tmp_path, 'JPEG', quality=90)
+    os.replace(tmp_path, cache_path)
+    return img
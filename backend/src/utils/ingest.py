@@ -0,0 +1,215 @@
+import ipaddress
+import os
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', 16))
+INGEST_MAX_BYTES = int(os.getenv('INGEST_MAX_BYTES', 20 * 1024 * 1024))
+INGEST_CONNECT_TIMEOUT = float(os.getenv('INGEST_CONNECT_TIMEOUT', 5))
+INGEST_READ_TIMEOUT = float(os.getenv('INGEST_READ_TIMEOUT', 10))
+# Wall-clock limit for one download, however steadily a slow server trickles bytes
+INGEST_TOTAL_TIMEOUT = float(os.getenv('INGEST_TOTAL_TIMEOUT', 30))
+# Comma-separated hosts images may be fetched from; empty allows any host with a public address
+INGEST_ALLOWED_HOSTS = {host.strip().lower() for host in os.getenv('INGEST_ALLOWED_HOSTS', '').split(',') if host.strip()}
+# Also fetch from loopback, private, link-local and reserved addresses (local stand-in servers only)
+INGEST_ALLOW_PRIVATE = os.getenv('INGEST_ALLOW_PRIVATE', '').lower() in ('1', 'true', 'yes')
+INGEST_MAX_REDIRECTS = int(os.getenv('INGEST_MAX_REDIRECTS', 3))
+
+_CHUNK_BYTES = 64 * 1024
+
+
+class RemoteImageError(ValueError):
+    pass
+
+
+def is_public_address(address):
+    """Whether an IP address is routable on the internet, i.e. not loopback, private, link-local or reserved"""
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not (
+        ip.is_loopback or ip.is_private or ip.is_link_local or ip.is_reserved
+        or ip.is_multicast or ip.is_unspecified
+    )
+
+
+def _check_peer(connection):
+    # DNS may answer differently than when the URL was checked, so check where we actually connected
+    address = connection.sock.getpeername()[0]
+    if not is_public_address(address):
+        connection.close()
+        raise RemoteImageError(f'Host {connection.host} resolved to non-public address {address}')
+
+
+class _PublicHTTPConnection(HTTPConnection):
+    def connect(self):
+        super().connect()
+        _check_peer(self)
+
+
+class _PublicHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        super().connect()
+        _check_peer(self)
+
+
+class _PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _PublicHTTPConnection
+
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PublicHTTPSConnection
+
+
+class PublicAddressAdapter(HTTPAdapter):
+    """Refuses connections to non-public addresses before any request is sent on them"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _PublicHTTPConnectionPool,
+            'https': _PublicHTTPSConnectionPool,
+        }
+
+
+def make_session(pool_size=INGEST_WORKERS, allow_private=INGEST_ALLOW_PRIVATE):
+    """A keep-alive session whose connection pool fits one connection per worker per host"""
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=('GET',))
+    adapter_cls = HTTPAdapter if allow_private else PublicAddressAdapter
+    adapter = adapter_cls(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = 'StyleScape-Ingest/1.0'
+    return session
+
+
+class RemoteImageFetcher:
+    """Download images over a shared connection pool with size and time limits.
+
+    Only public addresses are fetched: every URL, including each redirect
+    hop, must resolve to public addresses, and the default session also
+    checks the address it connected to. With an empty ``allowed_hosts`` any
+    public host is allowed. ``allow_private`` lifts the address checks for
+    local stand-in servers in tests and benchmarks; a ``session`` passed in
+    replaces the connection-time check.
+
+    Downloads run on a thread pool; ``fetch_many`` keeps at most twice as
+    many downloads in flight as there are workers, so results waiting to be
+    consumed never pile up in memory.
+    """
+
+    def __init__(self, session=None, workers=INGEST_WORKERS, max_bytes=INGEST_MAX_BYTES,
+                 timeout=(INGEST_CONNECT_TIMEOUT, INGEST_READ_TIMEOUT), total_timeout=INGEST_TOTAL_TIMEOUT,
+                 allowed_hosts=INGEST_ALLOWED_HOSTS, allow_private=INGEST_ALLOW_PRIVATE,
+                 max_redirects=INGEST_MAX_REDIRECTS):
+        self.session = session or make_session(workers, allow_private)
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        self.allowed_hosts = allowed_hosts
+        self.allow_private = allow_private
+        self.max_redirects = max_redirects
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-ingest')
+        return self._pool
+
+    def check_url(self, url):
+        """Reject URLs the fetcher will not request, without any network access"""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise RemoteImageError(f'Not an http(s) URL: {url}')
+        if self.allowed_hosts and parts.hostname.lower() not in self.allowed_hosts:
+            raise RemoteImageError(f'Host not allowed: {parts.hostname}')
+
+    def check_addresses(self, url):
+        """Reject URLs whose host resolves to any non-public address"""
+        if self.allow_private:
+            return
+        hostname = urlsplit(url).hostname
+        try:
+            addresses = {info[4][0] for info in socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)}
+        except (socket.gaierror, UnicodeError) as e:
+            raise RemoteImageError(f'Could not resolve host {hostname}: {e}') from e
+        blocked = sorted(address for address in addresses if not is_public_address(address))
+        if blocked:
+            raise RemoteImageError(f'Host {hostname} resolves to non-public address {blocked[0]}')
+
+    def _get(self, url):
+        """GET ``url`` as a stream, checking it and every redirect target before requesting it"""
+        for _ in range(self.max_redirects + 1):
+            self.check_url(url)
+            self.check_addresses(url)
+            response = self.session.get(url, stream=True, timeout=self.timeout, allow_redirects=False)
+            if not response.is_redirect:
+                return response
+            response.close()
+            url = urljoin(url, response.headers['Location'])
+        raise RemoteImageError(f'More than {self.max_redirects} redirects')
+
+    def fetch(self, url):
+        """Download ``url`` and return its body, enforcing the size and time limits"""
+        deadline = time.monotonic() + self.total_timeout
+        try:
+            with self._get(url) as response:
+                response.raise_for_status()
+                length = response.headers.get('Content-Length')
+                if length and length.isdigit() and int(length) > self.max_bytes:
+                    raise RemoteImageError(f'Image is {length} bytes, larger than the {self.max_bytes} byte limit')
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(_CHUNK_BYTES):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise RemoteImageError(f'Image is larger than the {self.max_bytes} byte limit')
+                    if time.monotonic() > deadline:
+                        raise RemoteImageError(f'Download took longer than {self.total_timeout:g}s')
+                    chunks.append(chunk)
+        except requests.RequestException as e:
+            raise RemoteImageError(f'Could not fetch {url}: {e}') from e
+        return b''.join(chunks)
+
+    def _fetch_and_process(self, url, process):
+        data = self.fetch(url)
+        return process(data) if process else data
+
+    def fetch_many(self, urls, process=None):
+        """Fetch each distinct URL once, yielding ``(url, result, error)`` as downloads finish.
+
+        ``process(data)`` runs on the worker after the download, so CPU
+        work such as decoding and hashing overlaps with other downloads;
+        its return value is the result.
+        """
+        pool = self._get_pool()
+        pending = deque(dict.fromkeys(urls))
+        in_flight = {}
+        while pending or in_flight:
+            while pending and len(in_flight) < self.workers * 2:
+                url = pending.popleft()
+                in_flight[pool.submit(self._fetch_and_process, url, process)] = url
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = in_flight.pop(future)
+                try:
+                    yield url, future.result(), None
+                except Exception as e:
+                    yield url, None, e
+
+
+remote_image_fetcher = RemoteImageFetcher()
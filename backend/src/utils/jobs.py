@@ -0,0 +1,110 @@
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+
+
+class Job:
+    """A unit of background work and the progress it has reported"""
+
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = 'queued'
+        self.progress = {}
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def report(self, **counts):
+        """Add to the job's progress counters"""
+        with self._lock:
+            for name, count in counts.items():
+                self.progress[name] = self.progress.get(name, 0) + count
+
+    def set(self, **values):
+        """Set progress values outright, e.g. a total known up front"""
+        with self._lock:
+            self.progress.update(values)
+
+    def to_dict(self):
+        with self._lock:
+            progress = dict(self.progress)
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'progress': progress,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobRegistry:
+    """Run jobs one at a time on a background thread and keep their progress.
+
+    Jobs run in order on a single worker so large writes never compete with
+    each other for the database; only the newest ``max_finished`` finished
+    jobs are remembered.
+    """
+
+    def __init__(self, max_finished=100):
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, kind, fn, params=None):
+        """Queue ``fn(job)`` to run inside the current app's context"""
+        app = current_app._get_current_object()
+        job = Job(kind, params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='job-worker', daemon=True)
+                self._thread.start()
+        self._queue.put((app, job, fn))
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at]
+        for job_id in finished[:-self.max_finished]:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            app, job, fn = self._queue.get()
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            try:
+                with app.app_context():
+                    fn(job)
+                job.status = 'completed'
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+                print(f"Job {job.id} ({job.kind}) failed: {e}")
+            finally:
+                job.finished_at = datetime.utcnow()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+
+job_registry = JobRegistry()
@@ -0,0 +1,161 @@
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+# Fraction of requests to profile; 0 disables sampling
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+# Requests sending this value in the X-Profile-Token header are always profiled
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(__file__), '..', 'profiles'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 200))
+# Also write flamegraph-compatible collapsed stacks from a stack sampler
+PROFILE_COLLAPSED = os.getenv('PROFILE_COLLAPSED', '').lower() in ('1', 'true', 'yes')
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))
+
+PROFILE_NAME = re.compile(r'^(?P<timestamp>\d{8}T\d{6}\.\d{6})_(?P<route>[\w.-]+)_(?P<duration>\d+)ms\.prof$')
+
+
+def profiling_enabled():
+    return PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_TOKEN)
+
+
+def is_authorized(req):
+    return bool(PROFILE_TOKEN) and req.headers.get('X-Profile-Token') == PROFILE_TOKEN
+
+
+class StackSampler(threading.Thread):
+    """Periodically sample one thread's Python stack into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def _start_profile():
+    if request.blueprint == 'debug':
+        return
+    if not (is_authorized(request) or random.random() < PROFILE_SAMPLE_RATE):
+        return
+    g.profile_sampler = None
+    if PROFILE_COLLAPSED:
+        g.profile_sampler = StackSampler(threading.get_ident())
+        g.profile_sampler.start()
+    g.profile_started = time.perf_counter()
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+
+def _finish_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    started = g.pop('profile_started')
+    sampler = g.pop('profile_sampler', None)
+    route = request.url_rule.rule if request.url_rule else request.path
+    route = re.sub(r'[^\w.-]+', '-', f'{request.method}{route}').strip('-')
+
+    if response.is_streamed:
+        # The body is produced while it is sent, so keep profiling until the server closes the response
+        response.call_on_close(lambda: _write_profile(profiler, sampler, started, route))
+    else:
+        _write_profile(profiler, sampler, started, route)
+    return response
+
+
+def _write_profile(profiler, sampler, started, route):
+    profiler.disable()
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    if sampler is not None:
+        sampler.stop()
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S.%f')
+        base = os.path.join(PROFILE_DIR, f'{timestamp}_{route}_{duration_ms}ms')
+
+        profiler.dump_stats(f'{base}.prof')
+        if sampler is not None:
+            with open(f'{base}.collapsed', 'w') as f:
+                for stack, count in sampler.stacks.items():
+                    f.write(f'{stack} {count}\n')
+
+        rotate_profiles()
+    except Exception as e:
+        print(f"Failed to write request profile: {e}")
+
+
+def _abandon_profile(exc):
+    # after_request is skipped when a view raises; never leave a profiler running
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+    sampler = g.pop('profile_sampler', None)
+    if sampler is not None:
+        sampler.stop()
+
+
+def rotate_profiles():
+    """Keep only the newest PROFILE_MAX_FILES profiles"""
+    profiles = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith('.prof'))
+    for name in profiles[:-PROFILE_MAX_FILES]:
+        for path in (name, name[:-len('.prof')] + '.collapsed'):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, path))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """Describe captured profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        match = PROFILE_NAME.match(name)
+        if not match:
+            continue
+        collapsed = name[:-len('.prof')] + '.collapsed'
+        profiles.append({
+            'name': name,
+            'route': match.group('route'),
+            'duration_ms': int(match.group('duration')),
+            'captured_at': datetime.strptime(match.group('timestamp'), '%Y%m%dT%H%M%S.%f').isoformat(),
+            'size': os.path.getsize(os.path.join(PROFILE_DIR, name)),
+            'collapsed': collapsed if os.path.exists(os.path.join(PROFILE_DIR, collapsed)) else None
+        })
+    return profiles
+
+
+def init_profiling(app):
+    """Register the profiling hooks; nothing is installed when profiling is off"""
+    if not profiling_enabled():
+        return
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_abandon_profile)
@@ -0,0 +1,104 @@
+import os
+import queue
+import threading
+
+from src.utils.encoding import IMAGE_FORMATS, NEGOTIATED_FORMATS
+from src.utils.images import analysis_input_path
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static'))
+
+# Files modified this recently are kept when reaped with a cutoff: a content-
+# addressed upload may be in use by a request that has not committed yet
+UPLOAD_GRACE_SECONDS = int(os.getenv('UPLOAD_GRACE_SECONDS', 3600))
+
+# URL prefixes served from files under STATIC_DIR; anything else (preset
+# /avatars/..., /scenes/... assets) is not owned by a row and never removed
+FILE_URL_PREFIXES = ('/uploads/', '/generated/')
+
+
+def static_path(url):
+    """Path on disk behind an upload or generated-content URL, or None for any other URL"""
+    if not url or not url.startswith(FILE_URL_PREFIXES):
+        return None
+    path = os.path.normpath(os.path.join(STATIC_DIR, url.lstrip('/')))
+    return path if path.startswith(STATIC_DIR + os.sep) else None
+
+
+def files_for_urls(urls):
+    """Paths on disk behind upload and generated-content URLs, including derived copies"""
+    for url in urls:
+        path = static_path(url)
+        if path is None:
+            continue
+        yield path
+        if url.startswith('/uploads/'):
+            yield analysis_input_path(path)
+        else:
+            # Variants encoded by /generated/ format negotiation
+            for name in NEGOTIATED_FORMATS:
+                yield f'{path}.{IMAGE_FORMATS[name][1]}'
+
+
+class FileReaper:
+    """Delete files on a background thread so requests never wait on the filesystem.
+
+    Callers enqueue paths once the rows referencing them are committed; a
+    file that is already gone counts as missing rather than failed. Paths
+    queued with ``keep_modified_after`` are kept when the file was written
+    or touched after that time.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.removed = 0
+        self.missing = 0
+        self.kept = 0
+        self.failed = 0
+
+    def enqueue(self, paths, keep_modified_after=None):
+        """Queue paths for removal, returning how many were queued"""
+        count = 0
+        for path in paths:
+            self._queue.put((path, keep_modified_after))
+            count += 1
+        if count:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='file-reaper', daemon=True)
+                    self._thread.start()
+        return count
+
+    def _run(self):
+        while True:
+            path, keep_modified_after = self._queue.get()
+            try:
+                if keep_modified_after is not None and os.path.getmtime(path) > keep_modified_after:
+                    self.kept += 1
+                    continue
+                os.remove(path)
+                self.removed += 1
+            except FileNotFoundError:
+                self.missing += 1
+            except OSError as e:
+                self.failed += 1
+                print(f"Could not remove {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Block until every queued path has been handled"""
+        self._queue.join()
+
+    def stats(self):
+        return {
+            'pending': self._queue.qsize(),
+            'removed': self.removed,
+            'missing': self.missing,
+            'kept': self.kept,
+            'failed': self.failed
+        }
+
+
+file_reaper = FileReaper()
@@ -0,0 +1,164 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from src.utils.tracing import record_span
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+LANES = (INTERACTIVE, BATCH)
+
+
+def tenant_key(tenant):
+    """Tenants are user ids, which arrive as ints or strings; "5" and 5 are the same tenant"""
+    try:
+        return int(tenant)
+    except (TypeError, ValueError):
+        return tenant
+
+
+class _Tenant:
+    def __init__(self, weight):
+        self.weight = weight
+        self.queues = {lane: deque() for lane in LANES}
+        self.virtual_time = 0.0
+        self.running = {lane: 0 for lane in LANES}
+        self.started = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def has_work(self):
+        return any(self.queues.values())
+
+    def is_running(self):
+        return any(self.running.values())
+
+
+class FairScheduler:
+    """Weighted fair queuing of generation work across tenants.
+
+    Every tenant has its own FIFO per lane and a virtual clock that
+    advances by ``cost / weight`` each time one of its jobs starts; free
+    workers always take the eligible tenant with the smallest clock, so a
+    tenant with a deep batch queue gets its share and no more. Tenants
+    are capped at ``tenant_concurrency`` running jobs per lane, so a
+    tenant's own batch work never blocks its interactive renders.
+    Interactive jobs are dispatched before batch jobs, and
+    ``reserved_interactive`` workers never pick up batch work so single
+    renders are not stuck behind it. Tenant ids and weight keys go through
+    ``tenant_key``.
+    """
+
+    def __init__(self, workers=4, tenant_concurrency=2, reserved_interactive=1, weights=None):
+        self.workers = workers
+        self.tenant_concurrency = tenant_concurrency
+        self.reserved_interactive = min(reserved_interactive, workers - 1)
+        self.weights = {tenant_key(tenant): weight for tenant, weight in (weights or {}).items()}
+        self._tenants = {}
+        self._running = {lane: 0 for lane in LANES}
+        self._virtual_time = 0.0
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def submit(self, tenant, fn, *args, interactive=False, cost=1.0, **kwargs):
+        """Queue ``fn`` for ``tenant`` and return a Future for its result"""
+        future = Future()
+        lane = INTERACTIVE if interactive else BATCH
+        tenant = tenant_key(tenant)
+
+        with self._condition:
+            self._start_workers()
+            state = self._tenants.get(tenant)
+            if state is None:
+                state = self._tenants[tenant] = _Tenant(float(self.weights.get(tenant, 1.0)))
+            if not state.has_work() and not state.is_running():
+                # Idle tenants don't bank credit while away
+                state.virtual_time = max(state.virtual_time, self._virtual_time)
+            # The caller's context (and so its trace) follows the job onto the worker
+            context = contextvars.copy_context()
+            state.queues[lane].append((future, fn, args, kwargs, cost, time.monotonic(), context))
+            self._condition.notify()
+
+        return future
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'generation-worker-{len(self._threads)}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_job(self):
+        """Pick the next job under the fairness and cap rules, or None"""
+        batch_slots = self.workers - self.reserved_interactive - self._running[BATCH]
+        for lane in LANES:
+            if lane == BATCH and batch_slots <= 0:
+                continue
+            eligible = [
+                (state.virtual_time, tenant, state)
+                for tenant, state in self._tenants.items()
+                if state.queues[lane] and state.running[lane] < self.tenant_concurrency
+            ]
+            if eligible:
+                _, tenant, state = min(eligible, key=lambda item: item[0])
+                job = state.queues[lane].popleft()
+                state.virtual_time += job[4] / state.weight
+                self._virtual_time = state.virtual_time
+                return tenant, state, lane, job
+        return None
+
+    def _work(self):
+        while True:
+            with self._condition:
+                picked = self._next_job()
+                while picked is None:
+                    self._condition.wait()
+                    picked = self._next_job()
+                tenant, state, lane, (future, fn, args, kwargs, cost, queued_at, context) = picked
+                wait = time.monotonic() - queued_at
+                state.running[lane] += 1
+                state.started += 1
+                state.total_wait += wait
+                state.max_wait = max(state.max_wait, wait)
+                self._running[lane] += 1
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    context.run(record_span, 'queue.wait', time.perf_counter() - wait, wait)
+                    future.set_result(context.run(fn, *args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            with self._condition:
+                state.running[lane] -= 1
+                state.completed += 1
+                self._running[lane] -= 1
+                self._condition.notify_all()
+
+    def metrics(self):
+        """Per-tenant queue depth, running jobs and wait times"""
+        with self._condition:
+            now = time.monotonic()
+            tenants = {}
+            for tenant, state in self._tenants.items():
+                queued = [job for lane in LANES for job in state.queues[lane]]
+                tenants[str(tenant)] = {
+                    'weight': state.weight,
+                    'queued_interactive': len(state.queues[INTERACTIVE]),
+                    'queued_batch': len(state.queues[BATCH]),
+                    'running': sum(state.running.values()),
+                    'completed': state.completed,
+                    'avg_wait_seconds': round(state.total_wait / state.started, 3) if state.started else 0.0,
+                    'max_wait_seconds': round(state.max_wait, 3),
+                    'oldest_queued_seconds': round(max((now - job[5] for job in queued), default=0.0), 3)
+                }
+            return {
+                'workers': self.workers,
+                'tenant_concurrency': self.tenant_concurrency,
+                'reserved_interactive': self.reserved_interactive,
+                'running_interactive': self._running[INTERACTIVE],
+                'running_batch': self._running[BATCH],
+                'tenants': tenants
+            }
@@ -0,0 +1,46 @@
+import os
+
+from flask import Response, current_app, stream_with_context
+
+# Rows fetched from the database per round trip while streaming
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 1000))
+# Serialized items are gathered into chunks of about this size before sending
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _to_dict(item):
+    return item.to_dict()
+
+
+def stream_json_array(query, serialize=_to_dict, batch_size=STREAM_BATCH_SIZE):
+    """Respond with the query's rows as a JSON array, serialized while they are fetched.
+
+    Rows are loaded ``batch_size`` at a time and written out in chunks, so
+    neither the model list nor the full JSON text ever exists in memory.
+    Items are encoded with the app's JSON provider, exactly as ``jsonify``
+    would encode them.
+    """
+    provider = current_app.json
+    # Same whitespace rules as jsonify: compact unless debugging
+    compact = provider.compact if provider.compact is not None else not current_app.debug
+    separators = (',', ':') if compact else (', ', ': ')
+
+    def dumps(obj):
+        return provider.dumps(obj, separators=separators)
+
+    def generate():
+        chunk = ['[']
+        size = 1
+        separator = ''
+        for item in query.yield_per(batch_size):
+            text = separator + dumps(serialize(item))
+            separator = ','
+            chunk.append(text)
+            size += len(text)
+            if size >= STREAM_CHUNK_BYTES:
+                yield ''.join(chunk)
+                chunk, size = [], 0
+        chunk.append(']\n')
+        yield ''.join(chunk)
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
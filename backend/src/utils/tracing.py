@@ -0,0 +1,199 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import request
+
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Append one JSON line per traced request here (unset: only the logger is used)
+TRACE_LOG_FILE = os.getenv('TRACE_LOG_FILE', '')
+
+# Histogram bucket upper bounds in milliseconds
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+logger = logging.getLogger('stylescape.trace')
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Trace:
+    """Spans recorded for one request, possibly from several threads"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, name, start, duration, parent=None):
+        with self._lock:
+            self.spans.append({
+                'name': name,
+                'start_ms': round((start - self.started) * 1000, 3),
+                'duration_ms': round(duration * 1000, 3),
+                'parent': parent
+            })
+
+    def extend(self, spans, offset, parent=None):
+        """Merge spans collected in another process, shifted to this trace's clock"""
+        with self._lock:
+            for item in spans:
+                self.spans.append({
+                    **item,
+                    'start_ms': round(item['start_ms'] + offset * 1000, 3),
+                    'parent': item['parent'] or parent
+                })
+
+    def totals(self):
+        """Summed duration per stage name, in first-seen order"""
+        totals = {}
+        with self._lock:
+            for item in self.spans:
+                totals[item['name']] = totals.get(item['name'], 0.0) + item['duration_ms']
+        return totals
+
+
+class StageHistograms:
+    """Per-stage latency histograms aggregated across requests"""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS_MS):
+        self.buckets = buckets
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, duration_ms):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {'count': 0, 'sum_ms': 0.0, 'counts': [0] * (len(self.buckets) + 1)}
+            stage['count'] += 1
+            stage['sum_ms'] += duration_ms
+            stage['counts'][bisect_left(self.buckets, duration_ms)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    'count': stage['count'],
+                    'mean_ms': round(stage['sum_ms'] / stage['count'], 3),
+                    'buckets': {
+                        **{f'le_{bound}': count for bound, count in zip(self.buckets, stage['counts'])},
+                        'le_inf': stage['counts'][-1]
+                    }
+                }
+                for name, stage in self._stages.items()
+            }
+
+
+stage_histograms = StageHistograms()
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name):
+    """Time a stage of the current request; a no-op outside a traced request"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    parent = _current_span.get()
+    token = _current_span.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter() - start, parent)
+        _current_span.reset(token)
+
+
+def record_span(name, start, duration):
+    """Record a span measured elsewhere, e.g. time spent waiting in a queue"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, start, duration, _current_span.get())
+
+
+def run_traced(fn, *args, **kwargs):
+    """Run ``fn`` under a fresh trace in a worker process, returning (result, spans, started).
+
+    ``started`` is the worker's ``time.time()`` at the start, so the parent
+    can place the spans on its own timeline with ``merge_spans``.
+    """
+    trace = Trace()
+    started = time.time()
+    token = _current_trace.set(trace)
+    try:
+        return fn(*args, **kwargs), trace.spans, started
+    finally:
+        _current_trace.reset(token)
+
+
+def merge_spans(spans, started):
+    """Attach spans returned by ``run_traced`` to the current trace"""
+    trace = _current_trace.get()
+    if trace is not None and spans:
+        elapsed_at_start = time.perf_counter() - trace.started - (time.time() - started)
+        trace.extend(spans, elapsed_at_start, _current_span.get())
+
+
+def _start_trace():
+    request.trace_token = _current_trace.set(Trace())
+
+
+def _finish_trace(response):
+    trace = _current_trace.get()
+    if trace is None:
+        return response
+    total_ms = (time.perf_counter() - trace.started) * 1000
+    totals = trace.totals()
+
+    metrics = [f'{name};dur={duration:.1f}' for name, duration in totals.items()]
+    metrics.append(f'total;dur={total_ms:.1f}')
+    response.headers['Server-Timing'] = ', '.join(metrics)
+
+    for item in trace.spans:
+        stage_histograms.observe(item['name'], item['duration_ms'])
+    stage_histograms.observe('total', total_ms)
+
+    if not logger.isEnabledFor(logging.INFO):
+        # Only TRACE_LOG_FILE enables the log; skip serializing spans nobody reads
+        return response
+    route = request.url_rule.rule if request.url_rule else request.path
+    logger.info(json.dumps({
+        'method': request.method,
+        'route': route,
+        'status': response.status_code,
+        'total_ms': round(total_ms, 3),
+        'spans': trace.spans
+    }))
+    return response
+
+
+def _end_trace(exc):
+    # Teardown can run more than once for a request (e.g. a test client used
+    # as a context manager), and a token may only be reset once
+    token = request.__dict__.pop('trace_token', None)
+    if token is not None:
+        _current_trace.reset(token)
+
+
+def init_tracing(app):
+    """Trace every request and report per-stage timings in a Server-Timing header"""
+    if not TRACING_ENABLED:
+        return
+    if TRACE_LOG_FILE:
+        handler = logging.FileHandler(TRACE_LOG_FILE)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    app.before_request(_start_trace)
+    app.after_request(_finish_trace)
+    app.teardown_request(_end_trace)
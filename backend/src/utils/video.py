@@ -0,0 +1,263 @@
+import multiprocessing
+import os
+import shutil
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils.tracing import merge_spans, run_traced, span
+
+VIDEO_FORMATS = ('webp', 'mp4')
+RENDER_WORKERS = int(os.getenv('VIDEO_RENDER_WORKERS', os.cpu_count() or 1))
+# Workers start from a fresh interpreter rather than a fork of a process holding threads and DB connections
+RENDER_START_METHOD = os.getenv('VIDEO_RENDER_START_METHOD', 'spawn')
+VIDEO_MAX_FPS = int(os.getenv('VIDEO_MAX_FPS', 60))
+VIDEO_MAX_FRAMES_PER_POSE = int(os.getenv('VIDEO_MAX_FRAMES_PER_POSE', 30))
+
+_render_pool = None
+
+
+def get_render_pool():
+    """Return the shared process pool used for frame rendering"""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(
+            max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context(RENDER_START_METHOD)
+        )
+    return _render_pool
+
+
+def video_options(fps, frames_per_pose):
+    """Validate the frame rate and frames per pose of a requested clip, raising ValueError when out of range"""
+    fps = int(fps)
+    frames_per_pose = int(frames_per_pose)
+    if not 1 <= fps <= VIDEO_MAX_FPS:
+        raise ValueError(f'fps must be between 1 and {VIDEO_MAX_FPS}')
+    if not 1 <= frames_per_pose <= VIDEO_MAX_FRAMES_PER_POSE:
+        raise ValueError(f'frames_per_pose must be between 1 and {VIDEO_MAX_FRAMES_PER_POSE}')
+    return fps, frames_per_pose
+
+
+def _streaming_webp_supported():
+    # WebPAnimEncoder is Pillow's private binding; its signature is only known for the pinned major version
+    import PIL
+    from PIL import features
+
+    if PIL.__version__.split('.')[0] != '11' or not features.check('webp'):
+        return False
+    from PIL import _webp
+    return hasattr(_webp, 'WebPAnimEncoder')
+
+
+def _remove_partial(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class WebPStreamEncoder:
+    """Animated WebP encoder that accepts frames one at a time.
+
+    Pillow's ``save_all`` needs every frame up front, so with the pinned
+    Pillow this drives the underlying WebP animation encoder directly and
+    only keeps compressed frames around. Other Pillow versions, or a private
+    encoder whose signature has changed, fall back to collecting the frames
+    and calling the public ``save_all``.
+    """
+
+    extension = 'webp'
+
+    def __init__(self, output_path, size, fps, quality=80):
+        self.output_path = output_path
+        self.size = size
+        self.frame_duration = 1000.0 / fps
+        self.quality = quality
+        self.timestamp = 0.0
+        self._encoder = None
+        self._frames = []
+        if _streaming_webp_supported():
+            from PIL import _webp
+            try:
+                # size, background, loop, minimize_size, kmin, kmax, allow_mixed, verbose
+                self._encoder = _webp.WebPAnimEncoder(size, 0, 0, False, 3, 5, False, False)
+            except TypeError:
+                self._encoder = None
+
+    def add(self, frame):
+        if frame.mode not in ('RGB', 'RGBA', 'RGBX'):
+            frame = frame.convert('RGB')
+        if self._encoder is None:
+            self._frames.append(frame)
+        else:
+            self._encoder.add(frame.getim(), round(self.timestamp), False, self.quality, 100, 0)
+        self.timestamp += self.frame_duration
+
+    def close(self):
+        if self._encoder is None:
+            first, *rest = self._frames
+            first.save(self.output_path, 'WEBP', save_all=True, append_images=rest,
+                       duration=round(self.frame_duration), loop=0, quality=self.quality)
+            self._frames = []
+            return
+        self._encoder.add(None, round(self.timestamp), False, self.quality, 100, 0)
+        data = self._encoder.assemble('', '', '')
+        if data is None:
+            raise OSError('WebP encoder returned no data')
+        with open(self.output_path, 'wb') as f:
+            f.write(data)
+
+    def abort(self):
+        """Drop buffered frames and any partial output after a failed render"""
+        self._encoder = None
+        self._frames = []
+        _remove_partial(self.output_path)
+
+
+class MP4StreamEncoder:
+    """H.264 encoder that pipes raw RGB frames into an ffmpeg process"""
+
+    extension = 'mp4'
+
+    def __init__(self, output_path, size, fps, quality=80):
+        self.output_path = output_path
+        self.size = size
+        # Map 0-100 quality onto x264's CRF scale (lower is better)
+        crf = str(max(0, min(51, round(51 - quality * 0.4))))
+        self._process = subprocess.Popen(
+            [
+                'ffmpeg', '-loglevel', 'error', '-y',
+                '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                '-s', f'{size[0]}x{size[1]}', '-r', str(fps),
+                '-i', '-',
+                '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-crf', crf,
+                '-movflags', '+faststart',
+                output_path,
+            ],
+            stdin=subprocess.PIPE,
+        )
+
+    def add(self, frame):
+        self._process.stdin.write(frame.convert('RGB').tobytes())
+
+    def close(self):
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            raise OSError('ffmpeg failed to encode video')
+
+    def abort(self):
+        """Stop ffmpeg and remove the partial file after a failed render"""
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        self._process.kill()
+        self._process.wait()
+        _remove_partial(self.output_path)
+
+
+def open_video_encoder(output_base, video_format, size, fps, quality=80):
+    """Open a streaming encoder, falling back to WebP when ffmpeg is missing"""
+    if video_format not in VIDEO_FORMATS:
+        raise ValueError(f'Unsupported video format: {video_format}')
+
+    if video_format == 'mp4' and shutil.which('ffmpeg') is None:
+        print('ffmpeg not available, encoding video as animated WebP')
+        video_format = 'webp'
+
+    encoder_cls = MP4StreamEncoder if video_format == 'mp4' else WebPStreamEncoder
+    return encoder_cls(f'{output_base}.{encoder_cls.extension}', size, fps, quality)
+
+
+def _current_rss_mb():
+    # Resident set size now, unlike ru_maxrss which is the peak over the whole process lifetime
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+
+
+def _render_in_worker(render_frame, args):
+    # Spans recorded in the worker process travel back with the frame
+    frame, spans, started = run_traced(render_frame, *args)
+    return frame, _current_rss_mb(), spans, started
+
+
+def render_video(render_frame, frame_args, output_base, video_format='webp', fps=8, quality=80):
+    """Render frames in parallel and stream them, in order, into an encoder.
+
+    ``render_frame`` must be a module-level function (so it can be sent to
+    the process pool) returning a PIL image for each tuple in ``frame_args``.
+    At most two frames per worker are in flight, so memory stays bounded by
+    the pool size rather than the clip length. ``rss_growth_mb`` in the
+    returned stats is how far this process's RSS rose above where it was
+    when the job started; ``max_worker_rss_mb`` is the largest worker RSS
+    sampled after a frame.
+    """
+    pool = get_render_pool()
+    window = RENDER_WORKERS * 2
+    pending = deque()
+    frame_args = iter(frame_args)
+    encoder = None
+    frames = 0
+    # RSS is sampled after every frame; the job's footprint is the growth over the starting sample
+    start_rss = _current_rss_mb()
+    max_rss = start_rss
+    max_worker_rss = None
+    started = time.perf_counter()
+
+    def submit_next():
+        args = next(frame_args, None)
+        if args is not None:
+            pending.append(pool.submit(_render_in_worker, render_frame, args))
+
+    for _ in range(window):
+        submit_next()
+
+    try:
+        while pending:
+            frame, worker_rss, spans, worker_started = pending.popleft().result()
+            if worker_rss is not None:
+                max_worker_rss = max(max_worker_rss or 0.0, worker_rss)
+            merge_spans(spans, worker_started)
+            submit_next()
+
+            if encoder is None:
+                encoder = open_video_encoder(output_base, video_format, frame.size, fps, quality)
+            with span('encode.frame'):
+                encoder.add(frame)
+            frames += 1
+            del frame
+            rss = _current_rss_mb()
+            if rss is not None:
+                max_rss = max(max_rss, rss)
+
+        if encoder is None:
+            raise ValueError('No frames to render')
+        with span('encode.finish'):
+            encoder.close()
+    except Exception:
+        for future in pending:
+            future.cancel()
+        # A failed frame or encode must not leave an encoder process or a partial file behind
+        if encoder is not None:
+            encoder.abort()
+        raise
+
+    rss = _current_rss_mb()
+    if rss is not None:
+        max_rss = max(max_rss, rss)
+
+    elapsed = time.perf_counter() - started
+    return encoder.output_path, {
+        'format': encoder.extension,
+        'frames': frames,
+        'fps': fps,
+        'render_seconds': round(elapsed, 3),
+        'frames_per_second': round(frames / elapsed, 2) if elapsed else None,
+        'rss_growth_mb': round(max_rss - start_rss, 1) if start_rss is not None else None,
+        'max_worker_rss_mb': max_worker_rss,
+    }
@@ -0,0 +1,132 @@
+import os
+import struct
+import time
+import zlib
+
+# Bytes read from a member file per write, and gathered before each chunk is sent
+ZIP_CHUNK_BYTES = 64 * 1024
+# Formats that are already compressed; deflating them again costs CPU for no gain
+STORED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'gif', 'mp4', 'zip'}
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+# Bit 3: sizes and CRC follow the data in a descriptor; bit 11: names are UTF-8
+_FLAGS = 0x0008 | 0x0800
+_UINT32_MAX = 0xFFFFFFFF
+_UINT16_MAX = 0xFFFF
+
+
+def _dos_time(timestamp):
+    year, month, day, hour, minute, second = time.localtime(timestamp)[:6]
+    year = min(max(year, 1980), 2107)
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+class ZipStream:
+    """Write a ZIP archive as a sequence of byte chunks, one member at a time.
+
+    Each method is a generator of the archive bytes it produces, so a
+    response can send members as they are read. Member sizes go in a data
+    descriptor after the data, so nothing is seeked or buffered; the only
+    state kept per member is its packed central directory record (under
+    100 bytes). Offsets and member counts past the classic limits are
+    written as ZIP64.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._buffered = 0
+        self._offset = 0
+        self._directory = bytearray()
+        self._count = 0
+
+    def _emit(self, data):
+        if data:
+            self._buffer.append(data)
+            self._buffered += len(data)
+            self._offset += len(data)
+
+    def _flush(self, force=False):
+        # Small members are gathered so each chunk sent is about ZIP_CHUNK_BYTES
+        if self._buffered >= ZIP_CHUNK_BYTES or (force and self._buffered):
+            data = b''.join(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            yield data
+
+    def _write_member(self, arcname, chunks, method, timestamp):
+        name = arcname.encode('utf-8')
+        dos_time, dos_date = _dos_time(timestamp)
+        header_offset = self._offset
+        self._emit(struct.pack(
+            '<IHHHHHIIIHH', 0x04034B50, 20, _FLAGS, method, dos_time, dos_date, 0, 0, 0, len(name), 0
+        ) + name)
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15) if method == ZIP_DEFLATED else None
+        crc = size = compressed_size = 0
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            compressed_size += len(chunk)
+            self._emit(chunk)
+            yield from self._flush()
+        if compressor is not None:
+            tail = compressor.flush()
+            compressed_size += len(tail)
+            self._emit(tail)
+        if size > _UINT32_MAX or compressed_size > _UINT32_MAX:
+            raise ValueError(f'{arcname} is too large for a streamed archive member')
+        self._emit(struct.pack('<IIII', 0x08074B50, crc, compressed_size, size))
+
+        extra = b''
+        if header_offset > _UINT32_MAX:
+            extra = struct.pack('<HHQ', 0x0001, 8, header_offset)
+            header_offset = _UINT32_MAX
+        self._directory += struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014B50, (3 << 8) | 45, 45 if extra else 20, _FLAGS, method,
+            dos_time, dos_date, crc, compressed_size, size, len(name), len(extra), 0, 0, 0,
+            0o100644 << 16, header_offset
+        ) + name + extra
+        self._count += 1
+        yield from self._flush()
+
+    def write_file(self, path, arcname):
+        """Add a file from disk; raises OSError before yielding anything if it cannot be opened"""
+        source = open(path, 'rb')
+        with source:
+            extension = arcname.rsplit('.', 1)[-1].lower()
+            method = ZIP_STORED if extension in STORED_EXTENSIONS else ZIP_DEFLATED
+            chunks = iter(lambda: source.read(ZIP_CHUNK_BYTES), b'')
+            yield from self._write_member(arcname, chunks, method, os.fstat(source.fileno()).st_mtime)
+
+    def write_chunks(self, arcname, chunks):
+        """Add a deflated member from an iterable of str or bytes chunks"""
+        yield from self._write_member(arcname, chunks, ZIP_DEFLATED, time.time())
+
+    def close(self):
+        """Write the central directory and end records"""
+        directory_offset = self._offset
+        directory_size = len(self._directory)
+        for start in range(0, directory_size, ZIP_CHUNK_BYTES):
+            self._emit(bytes(self._directory[start:start + ZIP_CHUNK_BYTES]))
+            yield from self._flush()
+        self._directory = bytearray()
+
+        if self._count > _UINT16_MAX or directory_offset > _UINT32_MAX or directory_size > _UINT32_MAX:
+            zip64_offset = self._offset
+            self._emit(struct.pack(
+                '<IQHHIIQQQQ', 0x06064B50, 44, 45, 45, 0, 0,
+                self._count, self._count, directory_size, directory_offset
+            ))
+            self._emit(struct.pack('<IIQI', 0x07064B50, 0, zip64_offset, 1))
+            count = min(self._count, _UINT16_MAX)
+            directory_offset = min(directory_offset, _UINT32_MAX)
+            directory_size = min(directory_size, _UINT32_MAX)
+        else:
+            count = self._count
+        self._emit(struct.pack('<IHHHHIIH', 0x06054B50, 0, 0, count, count, directory_size, directory_offset, 0))
+        yield from self._flush(force=True)
@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# src.main configures the database when it is imported, so point it at a scratch file first
+_database_dir = tempfile.mkdtemp(prefix='stylescape-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ.setdefault('TRACING_ENABLED', 'false')
+
+STATIC_DIRS = [os.path.join(BACKEND_DIR, 'src', 'static', folder) for folder in ('uploads', 'generated')]
+
+
+def _static_files():
+    files = set()
+    for folder in STATIC_DIRS:
+        for root, _, names in os.walk(folder):
+            files.update(os.path.join(root, name) for name in names)
+    return files
+
+
+@pytest.fixture(scope='session')
+def app():
+    from src.main import app
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def clean_state(app):
+    """Empty every table and remove files written under src/static after each test"""
+    before = _static_files()
+    yield
+    from src.models.user import db
+    with app.app_context():
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+    for path in _static_files() - before:
+        os.remove(path)
+
+
+@pytest.fixture
+def catalog(app):
+    """One user with a product, avatar and scene; returns their ids"""
+    from src.models.product import Avatar, Product, Scene
+    from src.models.user import User, db
+    with app.app_context():
+        user = User(username='tester', email='tester@example.com')
+        db.session.add(user)
+        db.session.flush()
+        product = Product(name='Linen Shirt', fabric_type='Linen', fit='Regular', size='M', user_id=user.id)
+        avatar = Avatar(name='Alex', ethnicity='Mixed', body_type='mesomorph', age_range='26-35', gender='female')
+        scene = Scene(name='Studio White', description='Plain studio backdrop', category='Studio',
+                      lighting_preset='Studio')
+        db.session.add_all([product, avatar, scene])
+        db.session.commit()
+        return {'user_id': user.id, 'product_id': product.id, 'avatar_id': avatar.id, 'scene_id': scene.id}
+
+
+@pytest.fixture
+def render(client, catalog):
+    """Generate content for the catalog with request overrides, returning the created content"""
+    def render(**overrides):
+        response = client.post('/api/generate/content', json=dict(catalog, **overrides))
+        assert response.status_code == 201
+        return response.get_json()
+    return render
@@ -0,0 +1,162 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from PIL import Image
+
+from src.utils.analysis import AnalysisResponseError, BatchAnalyzer, HTTPBackend, RateLimiter, parse_batch_response
+
+
+class TransientError(Exception):
+    pass
+
+
+class FakeBackend:
+    """Answers from a script of replies; a reply is text, an exception to raise, or a callable of the batch size"""
+
+    max_images = 8
+
+    def __init__(self, *replies, corrupt=()):
+        self.replies = list(replies)
+        self.corrupt = set(corrupt)
+        self.calls = []
+
+    def prepare(self, path):
+        if path in self.corrupt:
+            raise OSError(f'cannot identify image file {path!r}')
+
+    def analyze(self, prompt, image_paths):
+        self.calls.append(len(image_paths))
+        reply = self.replies.pop(0) if self.replies else (lambda count: json.dumps([f'look {n}' for n in range(count)]))
+        if isinstance(reply, Exception):
+            raise reply
+        return reply(len(image_paths)) if callable(reply) else reply
+
+    def is_transient(self, error):
+        return isinstance(error, TransientError)
+
+
+def items(count):
+    return [{'path': f'/tmp/garment-{n}.jpg', 'fabric_type': 'Cotton', 'fit': 'Slim'} for n in range(count)]
+
+
+def analyze(backend, count, **options):
+    analyzer = BatchAnalyzer(backend, batch_size=4, workers=1, rate_limit=60000, retry_backoff=0, **options)
+    return analyzer, list(analyzer.analyze_many(items(count)))
+
+
+def test_images_are_packed_into_batches():
+    backend = FakeBackend()
+    analyzer, results = analyze(backend, 10)
+    assert backend.calls == [4, 4, 2]
+    assert all(error is None and analysis.startswith('look') for _, analysis, error in results)
+    assert analyzer.stats()['requests'] == 3
+
+
+def test_transient_failures_retry_the_whole_batch():
+    backend = FakeBackend(TransientError('429'), TransientError('503'))
+    analyzer, results = analyze(backend, 4)
+    assert backend.calls == [4, 4, 4]
+    assert all(error is None for _, _, error in results)
+    assert analyzer.stats()['retries'] == 2
+
+
+def test_exhausted_retries_report_every_item_without_splitting():
+    failure = TransientError('429')
+    backend = FakeBackend(failure, failure, failure)
+    _, results = analyze(backend, 4, retries=2)
+    assert backend.calls == [4, 4, 4]
+    assert [error for _, _, error in results] == [failure] * 4
+
+
+def test_permanent_failures_are_not_retried_or_split():
+    failure = PermissionError('bad key')
+    backend = FakeBackend(failure)
+    _, results = analyze(backend, 4)
+    assert backend.calls == [4]
+    assert [error for _, _, error in results] == [failure] * 4
+
+
+def test_unparseable_answer_is_split_into_single_requests():
+    backend = FakeBackend('Sorry, here is one paragraph about all of them.', 'a', 'b', 'c', 'd')
+    _, results = analyze(backend, 4)
+    assert backend.calls == [4, 1, 1, 1, 1]
+    assert [analysis for _, analysis, _ in results] == ['a', 'b', 'c', 'd']
+
+
+def test_unreadable_response_is_split_into_single_requests():
+    backend = FakeBackend(AnalysisResponseError('blocked'), 'a', AnalysisResponseError('blocked'))
+    _, results = analyze(backend, 2)
+    assert backend.calls == [2, 1, 1]
+    assert results[0][1] == 'a'
+    assert isinstance(results[1][2], AnalysisResponseError)
+
+
+def test_corrupt_image_fails_only_its_own_item():
+    backend = FakeBackend(corrupt={'/tmp/garment-1.jpg'})
+    _, results = analyze(backend, 4)
+    assert backend.calls == [3]
+    assert [analysis for _, analysis, _ in results] == ['look 0', None, 'look 1', 'look 2']
+    assert isinstance(results[1][2], OSError)
+
+
+def test_retry_after_is_capped_by_the_backoff():
+    response = requests.Response()
+    response.headers['Retry-After'] = '3600'
+    analyzer = BatchAnalyzer(FakeBackend(), retries=3, retry_backoff=0.5)
+    assert analyzer._retry_delay(requests.HTTPError(response=response), 0) == 4
+    response.headers['Retry-After'] = '2'
+    assert analyzer._retry_delay(requests.HTTPError(response=response), 0) == 2
+
+
+def test_parse_batch_response_requires_one_analysis_per_image():
+    assert parse_batch_response('Here you go: ["a", "b"]', 2) == ['a', 'b']
+    assert parse_batch_response('["a"]', 2) is None
+    assert parse_batch_response('no json', 1) is None
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=600)
+    for _ in range(3):
+        limiter.acquire()
+    assert 0.15 <= limiter.waited < 1
+
+
+class ModelHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        payload = {'text': json.dumps(['ok'] * len(body['images']))} if status == 200 else {'error': 'busy'}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_http_backend_retries_rate_limited_requests(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ModelHandler)
+    server.statuses = [429, 503]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        paths = []
+        for n in range(3):
+            path = str(tmp_path / f'{n}.jpg')
+            Image.new('RGB', (30, 40)).save(path)
+            paths.append({'path': path, 'fabric_type': 'Silk', 'fit': 'Regular'})
+        backend = HTTPBackend(f'http://127.0.0.1:{server.server_address[1]}/analyze', session=requests.Session())
+        analyzer = BatchAnalyzer(backend, batch_size=8, workers=1, rate_limit=60000, retry_backoff=0)
+        results = list(analyzer.analyze_many(paths))
+        assert [analysis for _, analysis, _ in results] == ['ok'] * 3
+        assert analyzer.stats()['requests'] == 3
+        assert analyzer.stats()['retries'] == 2
+        assert not backend.is_transient(requests.HTTPError(response=requests.Response()))
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,159 @@
+import io
+import os
+import time
+
+from PIL import Image
+
+from src.models import cascade
+from src.models.idempotency import IdempotencyKey
+from src.models.product import Avatar, GarmentAnalysis, GeneratedContent, ImageHash, Product
+from src.models.stats import UsageStat
+from src.models.user import User, db
+from src.utils.reaper import file_reaper, static_path
+
+
+def wait_for_job(client, job_id):
+    for _ in range(200):
+        job = client.get(f'/api/jobs/{job_id}').get_json()
+        if job['finished_at']:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_product_delete_cascades_rows_counters_and_files(app, client, catalog, render):
+    paths = [static_path(render(pose=pose)['content_url']) for pose in ('standing', 'walking')]
+    assert all(os.path.exists(path) for path in paths)
+
+    assert client.delete(f"/api/products/{catalog['product_id']}").status_code == 204
+    with app.app_context():
+        assert db.session.get(Product, catalog['product_id']) is None
+        assert GeneratedContent.query.count() == 0
+        assert UsageStat.query.count() == 0
+
+    file_reaper.join()
+    assert not any(os.path.exists(path) for path in paths)
+
+
+def test_large_cascade_runs_as_job_in_batches(app, client, monkeypatch, render):
+    monkeypatch.setattr(cascade, 'DELETE_BATCH_SIZE', 2)
+    for pose in ('standing', 'walking', 'sitting'):
+        render(pose=pose)
+
+    response = client.delete('/api/products/bulk', json={'filters': {'fabric_type': 'Linen'}})
+    assert response.status_code == 202
+    job = wait_for_job(client, response.get_json()['job']['id'])
+    assert job['status'] == 'completed'
+    assert job['progress']['total_rows'] == 4
+    assert job['progress']['products'] == 1
+    assert job['progress']['generated_content'] == 3
+    with app.app_context():
+        assert Product.query.count() == GeneratedContent.query.count() == 0
+
+
+def test_bulk_delete_requires_ids_or_filters(client):
+    assert client.delete('/api/products/bulk', json={}).get_json() == {'error': 'Provide ids or at least one filter'}
+    response = client.delete('/api/products/bulk', json={'filters': {'colour': 'red'}})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Unknown filter: colour'}
+
+
+def test_user_delete_removes_owned_avatars_keys_and_renders_of_them(app, client, catalog, render):
+    with app.app_context():
+        other = User(username='other', email='other@example.com')
+        avatar = Avatar(name='Mine', is_custom=True, user_id=catalog['user_id'])
+        db.session.add_all([other, avatar])
+        db.session.commit()
+        other_id, avatar_id = other.id, avatar.id
+
+    # Another user's render of the deleted user's custom avatar goes too
+    render(avatar_id=avatar_id, user_id=other_id)
+    client.post('/api/generate/content', json=dict(catalog, user_id=catalog['user_id']),
+                headers={'Idempotency-Key': 'once'})
+    with app.app_context():
+        assert IdempotencyKey.query.count() == 1
+
+    assert client.delete(f"/api/users/{catalog['user_id']}").status_code == 204
+    with app.app_context():
+        assert db.session.get(User, catalog['user_id']) is None
+        assert db.session.get(User, other_id) is not None
+        assert Avatar.query.filter_by(user_id=catalog['user_id']).count() == 0
+        assert GeneratedContent.query.count() == 0
+        assert IdempotencyKey.query.count() == 0
+
+
+def test_static_path_only_maps_owned_urls():
+    assert static_path('/generated/a.png').endswith(os.path.join('static', 'generated', 'a.png'))
+    assert static_path('/avatars/preset.jpg') is None
+    assert static_path('/generated/../../main.py') is None
+
+
+def upload(client, color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 96), color).save(buffer, 'PNG')
+    response = client.post('/api/products/upload', data={'file': (io.BytesIO(buffer.getvalue()), 'garment.png')})
+    assert response.status_code == 200
+    return response.get_json()['image_url']
+
+
+def add_product(app, image_url, user_id):
+    with app.app_context():
+        product = Product(name='Wool Coat', fabric_type='Wool', fit='Regular', size='L', image_url=image_url,
+                          user_id=user_id)
+        db.session.add(product)
+        db.session.commit()
+        return product.id
+
+
+def test_recent_uploads_survive_the_delete_of_their_product(app, client, catalog):
+    image_url = upload(client, (200, 40, 40))
+    product_id = add_product(app, image_url, catalog['user_id'])
+
+    assert client.delete(f'/api/products/{product_id}').status_code == 204
+    file_reaper.join()
+    assert os.path.exists(static_path(image_url))
+
+
+def test_orphaned_uploads_are_reaped_unless_still_analysed(app, client, catalog, monkeypatch):
+    # A cutoff in the future: no upload counts as recent
+    monkeypatch.setattr(cascade, 'UPLOAD_GRACE_SECONDS', -60)
+    orphan_url, analysed_url = upload(client, (40, 200, 40)), upload(client, (40, 40, 200))
+    orphan_id = add_product(app, orphan_url, catalog['user_id'])
+    analysed_id = add_product(app, analysed_url, catalog['user_id'])
+    with app.app_context():
+        db.session.add(GarmentAnalysis(user_id=catalog['user_id'], image_url=analysed_url, analysis='{}'))
+        db.session.commit()
+
+    response = client.delete('/api/products/bulk', json={'ids': [orphan_id, analysed_id]})
+    assert wait_for_job(client, response.get_json()['job']['id'])['status'] == 'completed'
+    file_reaper.join()
+    assert not os.path.exists(static_path(orphan_url))
+    assert os.path.exists(static_path(analysed_url))
+    with app.app_context():
+        assert [row.image_url for row in ImageHash.query] == [analysed_url]
+
+
+def test_reaper_keeps_files_rewritten_after_the_cutoff(tmp_path):
+    path = tmp_path / 'upload.png'
+    path.write_bytes(b'old')
+    os.utime(path, (time.time() - 60, time.time() - 60))
+    cutoff = time.time() - 30
+
+    path.write_bytes(b'new')
+    kept = file_reaper.stats()['kept']
+    file_reaper.enqueue([str(path)], keep_modified_after=cutoff)
+    file_reaper.join()
+    assert path.exists()
+    assert file_reaper.stats()['kept'] == kept + 1
+
+
+def test_reupload_refreshes_stored_copy(client):
+    image_url = upload(client, (90, 90, 90))
+    path = static_path(image_url)
+    os.utime(path, (0, 0))
+    assert upload(client, (90, 90, 90)) == image_url
+    assert os.path.getmtime(path) > time.time() - 60
+
+    os.remove(path)
+    upload(client, (90, 90, 90))
+    assert os.path.exists(path)
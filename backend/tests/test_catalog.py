@@ -0,0 +1,54 @@
+from src.models.catalog import PRESET_AVATARS, PRESET_SCENES
+
+
+def test_bulk_scene_upsert_reports_created_updated_unchanged(client):
+    scenes = [{'name': f'Scene {n}', 'category': 'Studio'} for n in range(3)]
+    assert client.put('/api/scenes/bulk', json={'scenes': scenes}).get_json() == {
+        'created': 3, 'updated': 0, 'unchanged': 0
+    }
+
+    scenes[0]['category'] = 'Urban'
+    scenes.append({'name': 'Scene 3'})
+    assert client.put('/api/scenes/bulk', json={'scenes': scenes}).get_json() == {
+        'created': 1, 'updated': 1, 'unchanged': 2
+    }
+    assert len(client.get('/api/scenes').get_json()) == 4
+
+
+def test_bulk_avatar_upsert_is_keyed_by_owner(client):
+    avatars = [{'name': 'Kai', 'gender': 'male'}]
+    assert client.put('/api/avatars/bulk', json={'user_id': 1, 'avatars': avatars}).get_json()['created'] == 1
+    assert client.put('/api/avatars/bulk', json={'user_id': 2, 'avatars': avatars}).get_json()['created'] == 1
+    result = client.put('/api/avatars/bulk', json={'user_id': 1, 'avatars': [{'name': 'Kai', 'gender': 'female'}]})
+    assert result.get_json() == {'created': 0, 'updated': 1, 'unchanged': 0}
+
+
+def test_presets_are_created_once(client):
+    first = client.post('/api/scenes/preset').get_json()
+    assert first['scenes'] == [scene['name'] for scene in PRESET_SCENES]
+    assert client.post('/api/scenes/preset').get_json()['scenes'] == []
+
+    client.post('/api/avatars/preset')
+    client.post('/api/avatars/preset')
+    assert len(client.get('/api/avatars').get_json()) == len(PRESET_AVATARS)
+
+
+def test_bulk_avatar_items_cannot_choose_their_owner(client):
+    avatars = [{'name': 'Kai', 'user_id': 2}, {'name': PRESET_AVATARS[0]['name'], 'user_id': None}]
+    assert client.put('/api/avatars/bulk', json={'user_id': 1, 'avatars': avatars}).get_json()['created'] == 2
+    owners = {avatar['name']: avatar['user_id'] for avatar in client.get('/api/avatars').get_json()}
+    assert owners == {'Kai': 1, PRESET_AVATARS[0]['name']: 1}
+
+    response = client.put('/api/avatars/bulk', json={'user_id': None, 'avatars': avatars})
+    assert response.status_code == 400
+
+
+def test_failed_seed_leaves_no_presets(client, monkeypatch):
+    from src.routes import init
+
+    def failing_upsert(rows, commit=True):
+        raise RuntimeError('scene upsert failed')
+
+    monkeypatch.setattr(init, 'upsert_scenes', failing_upsert)
+    assert client.post('/api/init/database').status_code == 400
+    assert client.get('/api/init/status').get_json() == {'avatars': 0, 'scenes': 0, 'initialized': False}
@@ -0,0 +1,92 @@
+import gzip
+import json
+import threading
+import zlib
+
+import pytest
+from flask import Flask, Response
+
+from src.utils.compression import init_compression
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+@pytest.fixture
+def stream_app():
+    app = Flask(__name__)
+    init_compression(app)
+
+    @app.route('/stream/<int:count>')
+    def stream(count):
+        return Response((json.dumps({'n': n}) + '\n' for n in range(count)), mimetype='application/x-ndjson')
+
+    return app
+
+
+def test_short_stream_is_compressed_without_length(stream_app):
+    response = stream_app.test_client().get('/stream/1', headers=GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data) == b'{"n": 0}\n'
+
+
+def test_first_ndjson_line_arrives_before_the_stream_ends():
+    app = Flask(__name__)
+    init_compression(app)
+    release = threading.Event()
+
+    @app.route('/results')
+    def results():
+        def generate():
+            yield json.dumps({'n': 0}) + '\n'
+            assert release.wait(10)
+            yield json.dumps({'n': 1}) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    response = app.test_client().get('/results', headers=GZIP, buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    chunks = iter(response.response)
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    first = decompressor.decompress(next(chunks))
+    assert not release.is_set()
+    assert first == b'{"n": 0}\n'
+
+    release.set()
+    rest = b''.join(decompressor.decompress(chunk) for chunk in chunks) + decompressor.flush()
+    assert rest == b'{"n": 1}\n'
+    response.close()
+
+
+def test_long_stream_is_compressed(stream_app):
+    response = stream_app.test_client().get('/stream/500', headers=GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert [json.loads(line)['n'] for line in lines] == list(range(500))
+
+
+def test_stream_without_accept_encoding_is_untouched(stream_app):
+    response = stream_app.test_client().get('/stream/500')
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.data.splitlines()) == 500
+
+
+def test_empty_product_list_is_still_valid_json(client):
+    response = client.get('/api/products', headers=GZIP)
+    assert response.status_code == 200
+    assert json.loads(gzip.decompress(response.data)) == []
+
+
+def test_large_product_list_is_compressed(app, client, catalog):
+    from src.models.product import Product
+    from src.models.user import db
+    with app.app_context():
+        db.session.add_all([
+            Product(name=f'Shirt {n}', fabric_type='Cotton', fit='Slim', size='S', user_id=catalog['user_id'])
+            for n in range(50)
+        ])
+        db.session.commit()
+    response = client.get('/api/products', headers=GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(response.data))) == 51
+
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+from PIL import Image
+
+from src.routes.generate import AVAILABLE_POSES
+
+
+def test_contact_sheet_composites_every_pose(app, client, catalog):
+    response = client.post('/api/generate/contact-sheet', json=dict(catalog, columns=3, tile_width=60))
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['rendered_tiles'] == len(AVAILABLE_POSES)
+    assert [tile['pose'] for tile in body['tiles']] == [pose['name'] for pose in AVAILABLE_POSES]
+
+    rows = -(-len(AVAILABLE_POSES) // 3)
+    with Image.open(os.path.join(app.static_folder, 'generated', os.path.basename(body['content_url']))) as sheet:
+        assert sheet.size == (3 * 60, rows * 90)
+
+
+def test_contact_sheet_reuses_existing_renders(client, catalog):
+    first = client.post('/api/generate/contact-sheet', json=catalog).get_json()
+    second = client.post('/api/generate/contact-sheet', json=catalog).get_json()
+    assert second['reused_tiles'] == len(AVAILABLE_POSES)
+    assert second['rendered_tiles'] == 0
+    assert [tile['tile_id'] for tile in second['tiles']] == [tile['tile_id'] for tile in first['tiles']]
+
+
+def test_contact_sheet_reuses_only_the_same_users_renders(app, client, catalog):
+    from src.models.user import User, db
+    with app.app_context():
+        other = User(username='other', email='other@example.com')
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+
+    first = client.post('/api/generate/contact-sheet', json=catalog).get_json()
+    second = client.post('/api/generate/contact-sheet', json=dict(catalog, user_id=other_id)).get_json()
+    assert second['reused_tiles'] == 0
+    assert not {tile['tile_id'] for tile in first['tiles']} & {tile['tile_id'] for tile in second['tiles']}
+
+
+@pytest.mark.parametrize('options, error', [
+    ({'columns': 0}, 'columns must be between 1 and 8'),
+    ({'columns': 100000}, 'columns must be between 1 and 8'),
+    ({'tile_width': 100000}, 'tile_width must be between 16 and 1024'),
+])
+def test_contact_sheet_size_is_bounded(client, catalog, options, error):
+    response = client.post('/api/generate/contact-sheet', json=dict(catalog, **options))
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
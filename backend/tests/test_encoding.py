@@ -0,0 +1,61 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from src.utils.encoding import resolve_output_format
+from src.utils.reaper import file_reaper, static_path
+
+
+def test_output_options_merge_over_defaults():
+    settings = resolve_output_format({'format': 'JPG', 'quality': 70, 'progressive': None})
+    assert settings['format'] == 'jpeg'
+    assert settings['quality'] == 70
+    assert settings['progressive'] is False
+
+    with pytest.raises(ValueError, match='Unsupported image format: gif'):
+        resolve_output_format({'format': 'gif'})
+    with pytest.raises(ValueError, match='quality must be between 1 and 100'):
+        resolve_output_format({'quality': 0})
+
+
+def test_render_is_saved_in_requested_format(client, catalog, render):
+    content_url = render(output={'format': 'jpeg', 'quality': 60})['content_url']
+    assert content_url.endswith('.jpg')
+    with Image.open(static_path(content_url)) as img:
+        assert img.format == 'JPEG'
+
+    response = client.post('/api/generate/content', json=dict(catalog, output={'format': 'tiff'}))
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Unsupported image format: tiff'}
+
+
+def test_generated_stills_follow_accept_header(client, render):
+    content_url = render()['content_url']
+    assert content_url.endswith('.png')
+
+    stored = client.get(content_url, headers={'Accept': '*/*'})
+    assert stored.mimetype == 'image/png'
+    assert 'Accept' in stored.headers['Vary']
+
+    converted = client.get(content_url, headers={'Accept': 'image/webp,image/*;q=0.8'})
+    assert converted.mimetype == 'image/webp'
+    assert Image.open(io.BytesIO(converted.data)).format == 'WEBP'
+
+    variant = f'{static_path(content_url)}.webp'
+    encoded_at = os.path.getmtime(variant)
+    assert client.get(content_url, headers={'Accept': 'image/webp'}).data == converted.data
+    assert os.path.getmtime(variant) == encoded_at
+
+
+def test_variants_are_reaped_with_their_source(client, catalog, render):
+    content_url = render()['content_url']
+    client.get(content_url, headers={'Accept': 'image/jpeg'})
+    variant = f'{static_path(content_url)}.jpg'
+    assert os.path.exists(variant)
+
+    assert client.delete(f"/api/products/{catalog['product_id']}").status_code == 204
+    file_reaper.join()
+    assert not os.path.exists(variant)
+    assert not os.path.exists(static_path(content_url))
@@ -0,0 +1,65 @@
+import csv
+import io
+import os
+import zipfile
+
+from src.utils.reaper import static_path
+from src.utils.zipstream import ZIP_CHUNK_BYTES, ZipStream
+
+
+def export(client, query):
+    response = client.get(f'/api/generate/export?{query}')
+    assert response.status_code == 200
+    assert response.is_streamed
+    return zipfile.ZipFile(io.BytesIO(response.data))
+
+
+def test_export_streams_files_and_manifest(client, catalog, render):
+    rendered = [render(pose=pose) for pose in ('standing', 'walking')]
+    archive = export(client, f"product_id={catalog['product_id']}&user_id={catalog['user_id']}")
+    assert archive.testzip() is None
+
+    names = [f"images/{item['id']}.png" for item in rendered]
+    assert archive.namelist() == names + ['manifest.csv']
+    for name, item in zip(names, rendered):
+        info = archive.getinfo(name)
+        assert info.compress_type == zipfile.ZIP_STORED
+        with open(static_path(item['content_url']), 'rb') as f:
+            assert archive.read(name) == f.read()
+    assert archive.getinfo('manifest.csv').compress_type == zipfile.ZIP_DEFLATED
+
+    rows = list(csv.DictReader(io.StringIO(archive.read('manifest.csv').decode())))
+    assert [row['file'] for row in rows] == names
+    assert [row['pose'] for row in rows] == ['standing', 'walking']
+    assert {row['product_name'] for row in rows} == {'Linen Shirt'}
+    assert {row['scene_name'] for row in rows} == {'Studio White'}
+
+
+def test_export_lists_missing_files_without_a_member(client, catalog, render):
+    kept, lost = render(), render(pose='sitting')
+    os.remove(static_path(lost['content_url']))
+
+    archive = export(client, f"user_id={catalog['user_id']}")
+    assert archive.namelist() == [f"images/{kept['id']}.png", 'manifest.csv']
+    rows = list(csv.DictReader(io.StringIO(archive.read('manifest.csv').decode())))
+    assert [(row['content_id'], row['file']) for row in rows] == [(str(kept['id']), f"images/{kept['id']}.png"),
+                                                                  (str(lost['id']), '')]
+
+
+def test_export_rejects_unknown_filters(client):
+    response = client.get('/api/generate/export?colour=red')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Unknown filter: colour'}
+
+
+def test_zip_stream_sends_bounded_chunks_and_zip64_counts():
+    archive = ZipStream()
+    chunks = list(archive.write_chunks('big.txt', (b'x' * 1000 for _ in range(1000))))
+    for index in range(70000):
+        chunks.extend(archive.write_chunks(f'{index}.txt', [b'']))
+    chunks.extend(archive.close())
+    assert max(len(chunk) for chunk in chunks[:-1]) <= 2 * ZIP_CHUNK_BYTES
+
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as result:
+        assert len(result.infolist()) == 70001
+        assert result.read('big.txt') == b'x' * 1000000
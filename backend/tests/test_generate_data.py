@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import sys
+
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from generate_data import FileWriter, generate, plan_counts
+from src.models.catalog import PRESET_AVATARS, PRESET_SCENES
+from src.models.stats import UsageStat, compute_usage_stats
+from src.models.user import db
+
+
+def _generate(tmp_path, name='synthetic.db', **kwargs):
+    path = tmp_path / name
+    generate(f'sqlite:///{path}', plan_counts(300), log=lambda message: None, **kwargs)
+    return path
+
+
+def _rows(path, query):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(query).fetchall()
+
+
+def test_plan_counts_scales_with_overrides():
+    assert plan_counts(10000) == {'users': 100, 'products': 10000, 'avatars': 100, 'scenes': 10, 'content': 10000}
+    assert plan_counts(10000, products=5, scenes=0)['products'] == 5
+    assert plan_counts(10000, scenes=0)['scenes'] == 0
+    assert plan_counts(50)['users'] == 1
+
+
+def test_generate_fills_every_table(tmp_path):
+    path = _generate(tmp_path)
+    count = lambda table: _rows(path, f'SELECT COUNT(*) FROM {table}')[0][0]
+    assert count('user') == 3
+    assert count('product') == 300
+    assert count('avatar') == len(PRESET_AVATARS) + 3
+    assert count('scene') == len(PRESET_SCENES)
+    assert count('generated_content') == 300
+
+    # Every content row references rows that exist
+    dangling = _rows(path, """
+        SELECT COUNT(*) FROM generated_content c
+        LEFT JOIN product p ON p.id = c.product_id
+        LEFT JOIN avatar a ON a.id = c.avatar_id
+        LEFT JOIN scene s ON s.id = c.scene_id
+        LEFT JOIN user u ON u.id = c.user_id
+        WHERE p.id IS NULL OR a.id IS NULL OR s.id IS NULL OR u.id IS NULL
+    """)
+    assert dangling == [(0,)]
+
+
+def test_generate_is_deterministic_for_a_seed(tmp_path):
+    first = _generate(tmp_path, 'first.db')
+    second = _generate(tmp_path, 'second.db')
+    query = 'SELECT name, fabric_type, fit, size, user_id FROM product ORDER BY id'
+    assert _rows(first, query) == _rows(second, query)
+
+
+def test_generate_builds_search_index_and_usage_stats(tmp_path):
+    path = _generate(tmp_path)
+    fabric = _rows(path, 'SELECT fabric_type FROM product WHERE id = 1')[0][0]
+    expected = _rows(path, f"SELECT COUNT(*) FROM product WHERE fabric_type = '{fabric}'")
+    assert _rows(path, f"SELECT COUNT(*) FROM product_fts WHERE product_fts MATCH '{fabric.lower()}'") == expected
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    with app.app_context():
+        stored = {(row.user_id, row.dimension, row.key): row.count for row in UsageStat.query}
+        assert stored == compute_usage_stats()
+        db.engine.dispose()
+
+
+def test_generate_writes_placeholder_files(tmp_path):
+    static_dir = tmp_path / 'static'
+    files = FileWriter(str(static_dir))
+    path = _generate(tmp_path, files=files)
+
+    urls = [url for (url,) in _rows(path, 'SELECT image_url FROM product UNION ALL SELECT content_url FROM generated_content')]
+    assert files.written == len(urls) == 600
+    assert all((static_dir / url.lstrip('/')).is_file() for url in urls)
@@ -0,0 +1,134 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.idempotency import IdempotencyKey
+from src.models.user import db
+from src.routes import generate
+
+
+def post(client, catalog, key, **overrides):
+    return client.post('/api/generate/content', json=dict(catalog, **overrides), headers={'Idempotency-Key': key})
+
+
+@pytest.fixture
+def held_render(monkeypatch):
+    """Make renders wait for ``release`` so requests overlap; ``started`` is set once one is running"""
+    started, release = threading.Event(), threading.Event()
+    renders = []
+    real = generate.create_generated_content
+
+    def create(data):
+        renders.append(data)
+        started.set()
+        assert release.wait(10)
+        return real(data)
+
+    monkeypatch.setattr(generate, 'create_generated_content', create)
+    yield started, release, renders
+    release.set()
+
+
+def test_replays_completed_request(client, catalog):
+    first = post(client, catalog, 'k1')
+    second = post(client, catalog, 'k1')
+    assert first.status_code == second.status_code == 201
+    assert second.get_json()['id'] == first.get_json()['id']
+
+
+def test_reused_key_with_different_body_is_rejected(client, catalog):
+    assert post(client, catalog, 'k2').status_code == 201
+    assert post(client, catalog, 'k2', pose='walking').status_code == 422
+
+
+def test_concurrent_reuse_with_different_body_does_not_join_flight(app, catalog, held_render):
+    started, release, renders = held_render
+    results = {}
+    first = threading.Thread(target=lambda: results.setdefault('first', post(app.test_client(), catalog, 'k3')))
+    first.start()
+    assert started.wait(10)
+
+    mismatch = post(app.test_client(), catalog, 'k3', pose='walking')
+    release.set()
+    first.join(10)
+
+    assert mismatch.status_code == 422
+    assert results['first'].status_code == 201
+    assert len(renders) == 1
+
+
+@pytest.fixture
+def flight_entries(monkeypatch):
+    """Count callers that have entered generation_flights, so tests can wait for them to join"""
+    entered = []
+    do = generate.generation_flights.do
+
+    def counting_do(key, fn):
+        entered.append(key)
+        return do(key, fn)
+
+    monkeypatch.setattr(generate.generation_flights, 'do', counting_do)
+    return entered
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 10
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    # Let the last caller get from the count into the flight
+    time.sleep(0.1)
+
+
+def run_concurrently(app, request, held_render, flight_entries, count=3):
+    started, release, renders = held_render
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(request(app.test_client()))) for _ in range(count)]
+    threads[0].start()
+    assert started.wait(10)
+    for thread in threads[1:]:
+        thread.start()
+    wait_for(lambda: len(flight_entries) == count)
+    release.set()
+    for thread in threads:
+        thread.join(10)
+    return results, renders
+
+
+def test_concurrent_identical_requests_share_one_render(app, catalog, held_render, flight_entries):
+    results, renders = run_concurrently(app, lambda client: post(client, catalog, 'k4'), held_render, flight_entries)
+    assert len(renders) == 1
+    assert [response.status_code for response in results] == [201] * 3
+    assert len({response.get_json()['id'] for response in results}) == 1
+
+
+def test_concurrent_requests_without_key_coalesce_on_fingerprint(app, catalog, held_render, flight_entries):
+    request = lambda client: client.post('/api/generate/content', json=catalog)
+    results, renders = run_concurrently(app, request, held_render, flight_entries)
+    assert len(renders) == 1
+    assert len(set(flight_entries)) == 1 and flight_entries[0].startswith('request:')
+    assert [response.status_code for response in results] == [201] * 3
+    assert len({response.get_json()['id'] for response in results}) == 1
+
+
+def claim(app, catalog, key, age):
+    with app.app_context():
+        db.session.add(IdempotencyKey(
+            key=f"{catalog['user_id']}:{key}", request_hash=generate.generation_fingerprint(dict(catalog)),
+            created_at=datetime.utcnow() - age, expires_at=datetime.utcnow() + generate.IDEMPOTENCY_TTL
+        ))
+        db.session.commit()
+
+
+def test_unfinished_claim_blocks_retries_within_its_lease(app, client, catalog):
+    claim(app, catalog, 'k5', timedelta(seconds=5))
+    assert post(client, catalog, 'k5').status_code == 409
+
+
+def test_abandoned_claim_is_taken_over_after_its_lease(app, client, catalog):
+    claim(app, catalog, 'k6', generate.IDEMPOTENCY_LEASE + timedelta(seconds=5))
+    first = post(client, catalog, 'k6')
+    assert first.status_code == 201
+    assert post(client, catalog, 'k6').get_json()['id'] == first.get_json()['id']
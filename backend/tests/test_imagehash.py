@@ -0,0 +1,105 @@
+import io
+import random
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from src.utils.imagehash import MERGE_THRESHOLD, HammingIndex, dhash
+
+
+def garment_photo(seed, size=(600, 900)):
+    rng = random.Random(seed)
+    img = Image.new('RGB', size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.ellipse([x, y, x + rng.randrange(50, 300), y + rng.randrange(50, 300)],
+                     fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return img
+
+
+def jpeg(img, quality=90):
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def test_dhash_survives_resizing_and_recompression():
+    original = garment_photo(1)
+    copy = Image.open(io.BytesIO(jpeg(original.resize((300, 450)), quality=60)))
+    assert distance(dhash(original), dhash(copy)) <= 6
+    assert distance(dhash(original), dhash(garment_photo(2))) > 6
+
+
+@pytest.mark.parametrize('count', [50, MERGE_THRESHOLD + 50])
+def test_index_matches_brute_force(count):
+    rng = np.random.default_rng(7)
+    hashes = rng.integers(0, 2 ** 63, size=count, dtype=np.uint64).tolist()
+    index = HammingIndex()
+    index.add_many(list(range(1, count + 1)), hashes)
+
+    for _ in range(20):
+        base = hashes[rng.integers(count)]
+        query = base ^ sum(1 << int(bit) for bit in rng.choice(64, size=3, replace=False))
+        expected = sorted((i + 1, distance(h, query)) for i, h in enumerate(hashes) if distance(h, query) <= 6)
+        assert sorted(index.search(query)) == expected
+
+
+def upload(client, data, name, user_id):
+    return client.post('/api/products/upload', data={'file': (io.BytesIO(data), name), 'user_id': str(user_id)})
+
+
+def add_product(app, image_url, user_id):
+    from src.models.product import Product
+    from src.models.user import db
+    with app.app_context():
+        product = Product(name='Shirt', fabric_type='Cotton', fit='Slim', size='M', image_url=image_url, user_id=user_id)
+        db.session.add(product)
+        db.session.commit()
+        return product.id
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    from src.routes import product
+    monkeypatch.setattr(product, 'image_hash_index', HammingIndex())
+
+
+def test_upload_flags_near_duplicates(app, client, catalog, fresh_index):
+    user_id = catalog['user_id']
+    original = garment_photo(3)
+
+    first = upload(client, jpeg(original), 'shirt.jpg', user_id)
+    assert first.status_code == 200
+    assert first.get_json()['near_duplicates'] == []
+    product_id = add_product(app, first.get_json()['image_url'], user_id)
+
+    resized = jpeg(original.resize((400, 600)), quality=70)
+    second = upload(client, resized, 'shirt-small.jpg', user_id).get_json()
+    assert [match['image_url'] for match in second['near_duplicates']] == [first.get_json()['image_url']]
+    assert second['duplicate_product_ids'] == [product_id]
+
+    unrelated = upload(client, jpeg(garment_photo(4)), 'other.jpg', user_id)
+    assert unrelated.get_json()['near_duplicates'] == []
+
+
+def test_near_duplicates_are_scoped_to_the_uploading_user(app, client, catalog, fresh_index):
+    from src.models.user import User, db
+    with app.app_context():
+        other = User(username='other', email='other@example.com')
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+
+    original = garment_photo(5)
+    first = upload(client, jpeg(original), 'shirt.jpg', catalog['user_id']).get_json()
+    add_product(app, first['image_url'], catalog['user_id'])
+
+    copy = upload(client, jpeg(original.resize((400, 600)), quality=70), 'copy.jpg', other_id).get_json()
+    assert copy['near_duplicates'] == []
+    assert copy['duplicate_product_ids'] == []
@@ -0,0 +1,41 @@
+import os
+import warnings
+
+from PIL import Image
+
+from src.utils.images import ANALYSIS_MAX_SIDE, analysis_input_path, load_analysis_image, load_image
+
+
+def make_upload(tmp_path, size=(2400, 3200)):
+    path = str(tmp_path / 'garment.jpg')
+    Image.new('RGB', size, (200, 40, 90)).save(path, 'JPEG')
+    return path
+
+
+def test_analysis_copy_is_downscaled_and_cached(tmp_path):
+    path = make_upload(tmp_path)
+    first = load_analysis_image(path)
+    assert max(first.size) == ANALYSIS_MAX_SIDE
+    assert os.path.exists(analysis_input_path(path))
+
+    second = load_analysis_image(path)
+    assert second.size == first.size
+
+
+def test_cache_hit_leaves_no_open_file(tmp_path):
+    path = make_upload(tmp_path)
+    load_analysis_image(path)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', ResourceWarning)
+        img = load_analysis_image(path)
+    assert img.fp is None
+    assert img.getpixel((0, 0))[0] > 150
+
+
+def test_load_image_applies_exif_orientation(tmp_path):
+    path = str(tmp_path / 'rotated.jpg')
+    exif = Image.Exif()
+    exif[0x0112] = 6  # stored sideways, displayed rotated 90 degrees
+    Image.new('RGB', (400, 200)).save(path, 'JPEG', exif=exif)
+    assert load_image(path).size == (200, 400)
+    assert load_image(path, (100, 100)).size == (50, 100)
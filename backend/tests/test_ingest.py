@@ -0,0 +1,148 @@
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from src.utils import ingest
+from src.utils.ingest import RemoteImageError, RemoteImageFetcher, is_public_address
+
+
+def jpeg_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 60), (10, 120, 200)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """/img.jpg serves an image; /redirect?to=<url> redirects there"""
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        if self.path.startswith('/redirect?to='):
+            self.send_response(302)
+            self.send_header('Location', self.path.split('=', 1)[1])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = self.server.image
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.paths = []
+    server.image = jpeg_bytes()
+    server.url = lambda path, host='127.0.0.1': f'http://{host}:{server.server_address[1]}{path}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('address, public', [
+    ('93.184.216.34', True),
+    ('2606:2800:220:1::1', True),
+    ('127.0.0.1', False),
+    ('10.1.2.3', False),
+    ('172.16.0.1', False),
+    ('192.168.1.1', False),
+    ('169.254.169.254', False),
+    ('100.64.0.1', False),
+    ('0.0.0.0', False),
+    ('240.0.0.1', False),
+    ('::1', False),
+    ('fe80::1%eth0', False),
+    ('fd00::1', False),
+    ('::ffff:127.0.0.1', False),
+])
+def test_public_addresses(address, public):
+    assert is_public_address(address) is public
+
+
+def test_private_hosts_are_refused_before_connecting(stand_in):
+    fetcher = RemoteImageFetcher(workers=1)
+    with pytest.raises(RemoteImageError, match='non-public address 127.0.0.1'):
+        fetcher.fetch(stand_in.url('/img.jpg'))
+    assert stand_in.paths == []
+
+
+def test_connected_address_is_checked(stand_in, monkeypatch):
+    # As if DNS answered with a public address when checked and a private one when connecting
+    fetcher = RemoteImageFetcher(workers=1)
+    monkeypatch.setattr(fetcher, 'check_addresses', lambda url: None)
+    with pytest.raises(RemoteImageError, match='non-public address'):
+        fetcher.fetch(stand_in.url('/img.jpg'))
+    assert stand_in.paths == []
+
+
+def test_redirect_targets_are_checked(stand_in, monkeypatch):
+    # Treat 127.0.0.1 as public so only the redirect target, 127.0.0.2, counts as internal
+    monkeypatch.setattr(ingest, 'is_public_address', lambda address: address == '127.0.0.1')
+    fetcher = RemoteImageFetcher(workers=1, session=ingest.requests.Session())
+    target = stand_in.url('/img.jpg', host='127.0.0.2')
+    with pytest.raises(RemoteImageError, match='non-public address 127.0.0.2'):
+        fetcher.fetch(stand_in.url(f'/redirect?to={target}'))
+    assert stand_in.paths == [f'/redirect?to={target}']
+
+
+def test_redirect_targets_must_be_allowed_hosts(stand_in):
+    fetcher = RemoteImageFetcher(workers=1, allow_private=True, allowed_hosts={'127.0.0.1'})
+    target = stand_in.url('/img.jpg', host='localhost')
+    with pytest.raises(RemoteImageError, match='Host not allowed: localhost'):
+        fetcher.fetch(stand_in.url(f'/redirect?to={target}'))
+
+    assert fetcher.fetch(stand_in.url(f"/redirect?to={stand_in.url('/img.jpg')}")) == stand_in.image
+
+
+def test_redirect_chains_are_limited(stand_in):
+    fetcher = RemoteImageFetcher(workers=1, allow_private=True, max_redirects=1)
+    url = stand_in.url('/img.jpg')
+    for _ in range(2):
+        url = stand_in.url(f'/redirect?to={url}')
+    with pytest.raises(RemoteImageError, match='More than 1 redirects'):
+        fetcher.fetch(url)
+
+
+def test_size_limit(stand_in):
+    fetcher = RemoteImageFetcher(workers=1, allow_private=True, max_bytes=100)
+    with pytest.raises(RemoteImageError, match='byte limit'):
+        fetcher.fetch(stand_in.url('/img.jpg'))
+
+
+def test_fetch_many_fetches_each_url_once(stand_in):
+    fetcher = RemoteImageFetcher(workers=2, allow_private=True)
+    urls = [stand_in.url(f'/img.jpg?n={n}') for n in range(5)]
+    results = list(fetcher.fetch_many(urls + urls[:2], process=len))
+    assert sorted(url for url, _, _ in results) == sorted(urls)
+    assert {result for _, result, error in results if error is None} == {len(stand_in.image)}
+
+
+def test_ingest_endpoint_reports_refused_urls(client, stand_in):
+    response = client.post('/api/products/ingest', json={'urls': [stand_in.url('/img.jpg')]})
+    assert response.status_code == 200
+    result = json.loads(response.data.decode().splitlines()[0])
+    assert result['status'] == 'error'
+    assert 'non-public address' in result['error']
+    assert stand_in.paths == []
+
+
+def test_ingest_endpoint_stores_images_once(client, stand_in, monkeypatch):
+    from src.routes import product
+    monkeypatch.setattr(product, 'remote_image_fetcher', RemoteImageFetcher(workers=2, allow_private=True))
+    urls = [stand_in.url('/img.jpg'), stand_in.url('/img.jpg?copy=1')]
+    response = client.post('/api/products/ingest', json={'urls': urls})
+    results = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert len(results) == 2
+    assert len({result['image_url'] for result in results}) == 1
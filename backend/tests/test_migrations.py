@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import text
+
+from src.models.catalog import normalize_scene, upsert_scenes
+from src.models.migrations import SchemaMigrationError, migrate_schema
+from src.models.product import GeneratedContent, Scene
+from src.models.stats import UsageStat, record_usage
+from src.models.user import db
+
+
+def index_names():
+    return {row.name for row in db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+
+
+@pytest.fixture
+def legacy_db(app):
+    """An app context on a database whose natural-key indexes predate the data"""
+    with app.app_context():
+        yield
+        db.session.rollback()
+        db.session.execute(UsageStat.__table__.delete())
+        db.session.commit()
+        migrate_schema()
+
+
+def test_duplicates_are_merged_before_unique_index(legacy_db, catalog):
+    db.session.execute(text('DROP INDEX ux_scene_name'))
+    original = db.session.get(Scene, catalog['scene_id'])
+    duplicate = Scene(name=original.name, description='Copy', category='Studio', lighting_preset='Studio')
+    db.session.add(duplicate)
+    db.session.flush()
+    content = GeneratedContent(product_id=catalog['product_id'], avatar_id=catalog['avatar_id'],
+                               scene_id=duplicate.id, content_type='image', content_url='/generated/x.png',
+                               user_id=catalog['user_id'])
+    db.session.add(content)
+    db.session.flush()
+    record_usage([content])
+    db.session.commit()
+    name, duplicate_id, content_id = original.name, duplicate.id, content.id
+    db.session.expunge_all()
+
+    migrate_schema()
+
+    assert 'ux_scene_name' in index_names()
+    assert [scene.id for scene in Scene.query.filter_by(name=name)] == [catalog['scene_id']]
+    assert db.session.get(GeneratedContent, content_id).scene_id == catalog['scene_id']
+    assert UsageStat.query.filter_by(dimension='scene', key=str(duplicate_id)).count() == 0
+    assert UsageStat.query.filter_by(dimension='scene', key=str(catalog['scene_id'])).count() == 2
+
+    # Upserts rely on the index for ON CONFLICT
+    result = upsert_scenes([normalize_scene({'name': name, 'description': 'Updated'})])
+    assert result['updated'] == [name]
+
+
+def test_unmergeable_duplicates_stop_startup(legacy_db):
+    db.session.execute(text('DROP INDEX ux_usage_stat_key'))
+    db.session.add_all([UsageStat(user_id=1, dimension='total', key='', count=1) for _ in range(2)])
+    db.session.commit()
+
+    with pytest.raises(SchemaMigrationError, match='ux_usage_stat_key'):
+        migrate_schema()
+
+
+def test_duplicate_scene_name_is_a_conflict(client, catalog):
+    response = client.post('/api/scenes', json={'name': 'Studio White'})
+    assert response.status_code == 409
+    assert response.get_json() == {'error': "A scene named 'Studio White' already exists"}
+
+
+def test_duplicate_avatar_name_is_a_conflict_per_owner(client):
+    assert client.post('/api/avatars', json={'name': 'Kai', 'user_id': 1}).status_code == 201
+    assert client.post('/api/avatars', json={'name': 'Kai', 'user_id': 2}).status_code == 201
+    response = client.post('/api/avatars', json={'name': 'Kai', 'user_id': 1})
+    assert response.status_code == 409
+    assert response.get_json() == {'error': "An avatar named 'Kai' already exists for this user"}
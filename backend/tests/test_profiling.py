@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+
+import pytest
+from flask import Flask, Response
+
+from src.utils import profiling
+
+
+@pytest.fixture
+def profiled_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    app = Flask(__name__)
+    profiling.init_profiling(app)
+
+    @app.route('/stream')
+    def stream():
+        def generate():
+            for n in range(3):
+                time.sleep(0.05)
+                yield f'{n}\n'
+        return Response(generate(), mimetype='text/plain')
+
+    @app.route('/plain')
+    def plain():
+        return 'done'
+
+    return app
+
+
+def test_plain_response_is_profiled(profiled_app, tmp_path):
+    profiled_app.test_client().get('/plain')
+    assert [profile['route'] for profile in profiling.list_profiles()] == ['GET-plain']
+
+
+def test_streamed_response_is_profiled_until_closed(profiled_app, tmp_path):
+    response = profiled_app.test_client().get('/stream', buffered=False)
+    assert os.listdir(tmp_path) == []
+    assert response.get_data() == b'0\n1\n2\n'
+    response.close()
+
+    profiles = profiling.list_profiles()
+    assert [profile['route'] for profile in profiles] == ['GET-stream']
+    # The profile covers producing the body, not just the view returning a generator
+    assert profiles[0]['duration_ms'] >= 150
+
+
+@pytest.fixture
+def token_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 'secret')
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    app = Flask(__name__)
+    profiling.init_profiling(app)
+
+    @app.route('/plain')
+    def plain():
+        return 'done'
+
+    @app.route('/broken')
+    def broken():
+        raise RuntimeError('boom')
+
+    return app
+
+
+def test_token_selects_requests_to_profile(token_app):
+    client = token_app.test_client()
+    client.get('/plain')
+    client.get('/plain', headers={'X-Profile-Token': 'wrong'})
+    assert profiling.list_profiles() == []
+
+    client.get('/plain', headers={'X-Profile-Token': 'secret'})
+    assert len(profiling.list_profiles()) == 1
+
+
+def test_failed_view_does_not_leave_profiler_running(token_app):
+    response = token_app.test_client().get('/broken', headers={'X-Profile-Token': 'secret'})
+    assert response.status_code == 500
+    response.close()
+    assert sys.getprofile() is None
+    assert [profile['route'] for profile in profiling.list_profiles()] == ['GET-broken']
+
+
+def test_only_newest_profiles_are_kept(token_app, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_MAX_FILES', 2)
+    client = token_app.test_client()
+    for _ in range(4):
+        client.get('/plain', headers={'X-Profile-Token': 'secret'})
+        time.sleep(0.001)
+    assert len(profiling.list_profiles()) == 2
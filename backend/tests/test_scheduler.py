@@ -0,0 +1,73 @@
+import threading
+
+from src.utils.scheduler import FairScheduler
+
+
+def hold(gate, started=None):
+    if started is not None:
+        started.set()
+    assert gate.wait(10)
+
+
+def test_backlogged_tenants_alternate():
+    scheduler = FairScheduler(workers=1, reserved_interactive=0)
+    gate = threading.Event()
+    order = []
+    blocker = scheduler.submit('other', hold, gate)
+    futures = [scheduler.submit(tenant, order.append, tenant) for tenant in ['a'] * 4 + ['b'] * 4]
+    gate.set()
+    blocker.result(10)
+    for future in futures:
+        future.result(10)
+    assert order == ['a', 'b'] * 4
+
+
+def test_weights_give_proportional_share():
+    scheduler = FairScheduler(workers=1, reserved_interactive=0, weights={'1': 3})
+    gate = threading.Event()
+    order = []
+    blocker = scheduler.submit(9, hold, gate)
+    futures = [scheduler.submit(tenant, order.append, tenant) for tenant in [1] * 6 + [2] * 6]
+    gate.set()
+    blocker.result(10)
+    for future in futures:
+        future.result(10)
+    assert order[:8].count(1) == 6
+
+
+def test_tenant_ids_are_normalized():
+    scheduler = FairScheduler(workers=1, weights={5: 2.0})
+    assert scheduler.submit('5', lambda: 'done').result(10) == 'done'
+    assert scheduler.submit(5, lambda: 'done').result(10) == 'done'
+    tenants = scheduler.metrics()['tenants']
+    assert list(tenants) == ['5']
+    assert tenants['5']['weight'] == 2.0
+    assert tenants['5']['completed'] == 2
+
+
+def test_own_batch_work_does_not_block_interactive():
+    scheduler = FairScheduler(workers=3, tenant_concurrency=1, reserved_interactive=1)
+    gate = threading.Event()
+    batch_started = threading.Event()
+    batch = scheduler.submit(1, hold, gate, batch_started)
+    assert batch_started.wait(10)
+    try:
+        assert scheduler.submit(1, lambda: 'rendered', interactive=True).result(5) == 'rendered'
+    finally:
+        gate.set()
+    batch.result(10)
+
+
+def test_reserved_worker_stays_free_of_batch_work():
+    scheduler = FairScheduler(workers=2, tenant_concurrency=4, reserved_interactive=1)
+    gate = threading.Event()
+    started = [threading.Event() for _ in range(2)]
+    batch = [scheduler.submit(1, hold, gate, event) for event in started]
+    assert started[0].wait(10)
+    try:
+        assert not started[1].wait(0.2)
+        assert scheduler.submit(2, lambda: 'rendered', interactive=True).result(5) == 'rendered'
+    finally:
+        gate.set()
+    for future in batch:
+        future.result(10)
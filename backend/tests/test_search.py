@@ -0,0 +1,22 @@
+from src.models.search import MAX_PER_PAGE
+
+
+def test_search_reports_clamped_paging(client, catalog):
+    response = client.get('/api/search/products?page=0&per_page=100000')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['page'] == 1
+    assert body['per_page'] == MAX_PER_PAGE
+    assert body['total'] == 1
+
+
+def test_search_matches_text_and_filters(client, catalog):
+    body = client.get('/api/search/products?q=lin&fabric_type=Linen').get_json()
+    assert [item['name'] for item in body['results']] == ['Linen Shirt']
+    assert client.get('/api/search/products?q=lin&fabric_type=Silk').get_json()['total'] == 0
+
+
+def test_search_rejects_non_integer_page(client):
+    response = client.get('/api/search/products?page=two')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'page and per_page must be integers'}
@@ -0,0 +1,67 @@
+import os
+import sys
+
+from src.models.product import Product
+from src.models.stats import UsageStat, compute_usage_stats, rebuild_usage_stats
+from src.models.user import db
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+
+def stored_counters():
+    return {(row.user_id, row.dimension, row.key): row.count for row in UsageStat.query}
+
+
+def test_stats_count_renders_per_dimension(client, catalog, render):
+    render(pose='standing')
+    render(pose='walking')
+    render(pose='walking')
+
+    body = client.get('/api/stats').get_json()
+    assert body['user_id'] is None
+    assert body['total'] == 3
+    assert body['pose'] == {'walking': 2, 'standing': 1}
+    assert body['product'] == {str(catalog['product_id']): 3}
+    assert sum(body['day'].values()) == 3
+
+    own = client.get(f"/api/stats?user_id={catalog['user_id']}&dimensions=total,scene").get_json()
+    assert own == {'user_id': catalog['user_id'], 'total': 3, 'scene': {str(catalog['scene_id']): 3}}
+    assert client.get('/api/stats?user_id=999').get_json()['total'] == 0
+
+
+def test_counters_match_recount_after_renders_and_deletes(app, client, catalog, render):
+    with app.app_context():
+        other = Product(name='Silk Dress', fabric_type='Silk', fit='Slim', size='S', user_id=catalog['user_id'])
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+
+    render()
+    render(product_id=other_id, pose='sitting')
+    assert client.delete(f"/api/products/{catalog['product_id']}").status_code == 204
+
+    with app.app_context():
+        assert stored_counters() == compute_usage_stats()
+        assert stored_counters()[(0, 'product', str(other_id))] == 1
+        assert (0, 'product', str(catalog['product_id'])) not in stored_counters()
+
+
+def test_unknown_dimension_is_rejected(client):
+    response = client.get('/api/stats?dimensions=total,colour')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Unknown dimensions: colour'}
+
+
+def test_rebuild_check_reports_and_repairs_drift(app, render):
+    from rebuild_stats import check
+
+    render()
+    with app.app_context():
+        assert check()
+        UsageStat.query.filter_by(dimension='total').update({'count': 7})
+        db.session.commit()
+        assert not check()
+
+        rebuild_usage_stats()
+        assert check()
+        assert stored_counters() == compute_usage_stats()
@@ -0,0 +1,52 @@
+import logging
+
+import pytest
+from flask import Flask
+
+from src.utils import tracing
+from src.utils.tracing import current_trace, span
+
+
+@pytest.fixture
+def traced_app(monkeypatch):
+    monkeypatch.setattr(tracing, 'TRACING_ENABLED', True)
+    app = Flask(__name__)
+    tracing.init_tracing(app)
+
+    @app.route('/work')
+    def work():
+        with span('db.lookup'):
+            with span('serialize'):
+                pass
+        return 'done'
+
+    return app
+
+
+def test_server_timing_reports_stages(traced_app):
+    response = traced_app.test_client().get('/work')
+    metrics = response.headers['Server-Timing'].split(', ')
+    assert [metric.split(';')[0] for metric in metrics] == ['serialize', 'db.lookup', 'total']
+
+
+def test_teardown_is_idempotent_with_preserved_context(traced_app):
+    with traced_app.test_client() as client:
+        assert client.get('/work').status_code == 200
+        assert client.get('/work').status_code == 200
+    assert current_trace() is None
+
+
+def test_spans_are_not_serialized_unless_logged(traced_app, monkeypatch):
+    dumped = []
+    monkeypatch.setattr(tracing.json, 'dumps', lambda *args, **kwargs: dumped.append(args) or '{}')
+    level = tracing.logger.level
+    try:
+        tracing.logger.setLevel(logging.WARNING)
+        traced_app.test_client().get('/work')
+        assert dumped == []
+
+        tracing.logger.setLevel(logging.INFO)
+        traced_app.test_client().get('/work')
+        assert len(dumped) == 1
+    finally:
+        tracing.logger.setLevel(level)
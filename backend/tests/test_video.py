@@ -0,0 +1,115 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from PIL import Image
+
+from src.routes import generate
+from src.utils import video
+from src.utils.video import MP4StreamEncoder, WebPStreamEncoder, render_video, video_options
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def video_request(catalog, **options):
+    return dict(catalog, content_type='video', **options)
+
+
+@pytest.mark.parametrize('options', [{'fps': 0}, {'fps': 1000}, {'fps': 'fast'}, {'frames_per_pose': 0}])
+def test_out_of_range_video_options_are_rejected(client, catalog, options):
+    response = client.post('/api/generate/content', json=video_request(catalog, **options))
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_video_options_normalizes_numbers():
+    assert video_options('12', 3) == (12, 3)
+
+
+def test_video_renders_with_per_job_memory_stats(client, catalog):
+    response = client.post('/api/generate/content', json=video_request(catalog, fps=4, frames_per_pose=1))
+    assert response.status_code == 201
+    body = response.get_json()
+    stats = body['video_stats']
+    assert stats['frames'] == len(generate.AVAILABLE_POSES)
+    assert stats['fps'] == 4
+    assert stats['format'] == 'webp' and body['content_url'].endswith('.webp')
+    assert stats['rss_growth_mb'] >= 0
+    assert stats['max_worker_rss_mb'] > 0
+
+
+def render_gradient_frame(shade):
+    # Module level so the render pool can pickle it
+    if shade is None:
+        raise ValueError('frame failed')
+    return Image.new('RGB', (32, 32), (shade, shade, shade))
+
+
+def test_failed_frame_leaves_no_output(tmp_path, monkeypatch):
+    aborted = []
+    abort = WebPStreamEncoder.abort
+    monkeypatch.setattr(WebPStreamEncoder, 'abort', lambda self: aborted.append(self) or abort(self))
+
+    output_base = str(tmp_path / 'clip')
+    with pytest.raises(ValueError, match='frame failed'):
+        render_video(render_gradient_frame, [(0,), (64,), (None,), (192,)], output_base)
+    assert len(aborted) == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_webp_fallback_uses_public_save_all(tmp_path, monkeypatch):
+    monkeypatch.setattr(video, '_streaming_webp_supported', lambda: False)
+    path = tmp_path / 'clip.webp'
+    encoder = WebPStreamEncoder(str(path), (32, 32), fps=10)
+    for shade in (0, 128, 255):
+        encoder.add(Image.new('RGB', (32, 32), (shade, shade, shade)))
+    encoder.close()
+    with Image.open(path) as clip:
+        assert clip.n_frames == 3
+
+
+def test_webp_falls_back_when_private_encoder_signature_changes(tmp_path, monkeypatch):
+    from PIL import _webp
+    real, calls = _webp.WebPAnimEncoder, []
+
+    def changed_signature(*args):
+        # Reject our direct call; Pillow's own save_all keeps working
+        calls.append(args)
+        if len(calls) == 1:
+            raise TypeError('unexpected arguments')
+        return real(*args)
+
+    monkeypatch.setattr(video, '_streaming_webp_supported', lambda: True)
+    monkeypatch.setattr(_webp, 'WebPAnimEncoder', changed_signature)
+    path = tmp_path / 'clip.webp'
+    encoder = WebPStreamEncoder(str(path), (32, 32), fps=10)
+    encoder.add(Image.new('RGB', (32, 32)))
+    encoder.add(Image.new('RGB', (32, 32), (255, 255, 255)))
+    encoder.close()
+    with Image.open(path) as clip:
+        assert clip.n_frames == 2
+    assert len(calls) == 2
+
+
+def test_mp4_abort_stops_encoder_and_removes_partial_file(tmp_path, monkeypatch):
+    # Stand in for ffmpeg with a process that writes stdin to the output path until killed
+    popen = subprocess.Popen
+    monkeypatch.setattr(video.subprocess, 'Popen', lambda args, **kwargs: popen(['sh', '-c', 'cat > "$0"', args[-1]], **kwargs))
+    path = tmp_path / 'clip.mp4'
+    encoder = MP4StreamEncoder(str(path), (32, 32), fps=10)
+    encoder.add(Image.new('RGB', (32, 32)))
+    process = encoder._process
+
+    encoder.abort()
+    assert process.returncode is not None
+    assert not path.exists()
+
+
+def test_spawned_workers_do_not_set_up_the_database(tmp_path):
+    # Spawn re-imports the launching script as __mp_main__; it must not open the database
+    database = tmp_path / 'worker.db'
+    script = "import runpy; runpy.run_path('src/main.py', run_name='__mp_main__')"
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{database}'}
+    subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, check=True)
+    assert not database.exists()